@@ -1,4 +1,6 @@
-from flask import Blueprint, jsonify, request
+import os
+
+from flask import Blueprint, jsonify, request, send_from_directory
 from flask_jwt_extended import create_access_token
 from werkzeug.security import check_password_hash
 
@@ -20,6 +22,15 @@ def health():
 	return jsonify({"status": "ok"})
 
 
+# Posters saved by the email scraper; paths are content-addressed, so they never change
+POSTER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "event_posters")
+
+
+@api.get("/posters/<path:filename>")
+def poster(filename):
+	return send_from_directory(POSTER_DIR, filename, max_age=365 * 24 * 3600)
+
+
 @api.get("/db-status")
 def db_status():
 	try:
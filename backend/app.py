@@ -15,6 +15,11 @@ try:
 except ImportError:  # pragma: no cover
     from api import api
 
+try:
+    from .indexes import bootstrap_indexes
+except ImportError:  # pragma: no cover
+    from indexes import bootstrap_indexes
+
 try:
     from .routes.admin import admin_bp
     from .routes.student import student_bp
@@ -71,6 +76,9 @@ def create_app() -> Flask:
     app.register_blueprint(student_bp)
     app.register_blueprint(hod_bp)
     app.register_blueprint(hostel_bp)
+
+    # Indexes are declared in indexes.py and created once here, not per request.
+    bootstrap_indexes()
     return app
 
 
@@ -0,0 +1,61 @@
+"""Full vs incremental runs of the knowafest bridge over a large event store.
+
+Usage: python bench_bridge_incremental.py [--records 50000] [--new 500]
+
+Writes N synthetic records (cycled from tests/golden/knowafest_records.json, unique
+event URLs) to a throwaway EventStore in a temp directory, then times
+knowafest_frontend_bridge.main() for: a full rebuild, an incremental run with nothing
+changed, an incremental run after --new records were appended, and an incremental run
+after a TRANSFORM_VERSION bump (which must discard the cache). Real output and cache
+files are never touched.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import knowafest_frontend_bridge as bridge
+from bench_records import make_records
+from event_store import EventStore
+
+
+def run(label, store, output_path, cache_path, incremental):
+    out = io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        bridge.main(incremental=incremental, store=store, output_path=output_path, cache_path=cache_path)
+    elapsed = time.perf_counter() - started
+    summary = next((line for line in out.getvalue().splitlines() if line.startswith("Records:")), "")
+    print(f"{label:<38} {elapsed:>7.2f}s  {summary}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=50_000)
+    parser.add_argument("--new", type=int, default=500, help="records appended before the second incremental run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EventStore(os.path.join(tmp, "events.jsonl"), legacy_path=None)
+        store.append_many(make_records(args.records))
+        output_path = os.path.join(tmp, "external_events.json")
+        cache_path = os.path.join(tmp, "bridge_cache.json")
+        print(f"{args.records} records in the store")
+
+        full = run("full rebuild (--full)", store, output_path, cache_path, incremental=False)
+        run("incremental, nothing changed", store, output_path, cache_path, incremental=True)
+        store.append_many(make_records(args.new, start=args.records))
+        appended = run(f"incremental, {args.new} appended", store, output_path, cache_path, incremental=True)
+
+        bridge.TRANSFORM_VERSION += 1
+        run("incremental, TRANSFORM_VERSION bumped", store, output_path, cache_path, incremental=True)
+
+        print(f"incremental run after appending {args.new}: {full / appended:.1f}x faster than a full rebuild")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Pages/second and peak memory for parsing knowafest detail pages (parse_event_details).
+
+Usage: python bench_detail_parsing.py [--pages 300] [--parsers html.parser,lxml]
+
+Parses the saved detail pages in tests/fixtures/knowafest, cycled to --pages, with each
+BeautifulSoup parser (lxml is skipped when it isn't installed) and reports pages/second
+and the tracemalloc peak of a single parse. It also times the six section lookups on
+already-parsed pages: SectionIndex against one soup.find rescan per lookup, which is how
+extract_section_content used to work.
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+import upcoming_scraper as scraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "fixtures", "knowafest")
+SECTIONS = [["About Event", "About"], ["Events", "Event Details"], ["Contact Details", "Contact"],
+            ["Last Dates", "Important Dates", "Deadlines"], ["Registration Fees", "Fees"],
+            ["How to reach", "Address", "Venue", "Event Sponsors"]]
+
+
+def load_pages():
+    pages = []
+    for name in sorted(os.listdir(FIXTURES)):
+        if name.startswith("detail_"):
+            with open(os.path.join(FIXTURES, name), "rb") as f:
+                pages.append(f.read())
+    return pages
+
+
+def rescan_section(soup, header_texts):
+    """One soup.find over the whole tree per lookup."""
+    for text in header_texts:
+        header = soup.find(scraper.SECTION_HEADER_TAGS, string=lambda t: t and text.lower() in t.lower())
+        if header:
+            content = []
+            for sibling in header.find_next_siblings():
+                if sibling.name in scraper.SECTION_HEADER_TAGS and sibling.get_text(strip=True):
+                    break
+                text_val = scraper.get_safe_text(sibling)
+                if text_val:
+                    content.append(text_val)
+            full_text = "\n".join(content).strip()
+            if full_text:
+                return full_text
+    return "N/A"
+
+
+def bench_parser(parser, pages, count):
+    results = [scraper.parse_event_details(page, parser) for page in pages]
+
+    started = time.perf_counter()
+    for i in range(count):
+        scraper.parse_event_details(pages[i % len(pages)], parser)
+    elapsed = time.perf_counter() - started
+
+    peaks = []
+    for page in pages:
+        tracemalloc.start()
+        scraper.parse_event_details(page, parser)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    size_kb = sum(len(page) for page in pages) / len(pages) / 1024
+    print(f"{parser:<12} {count / elapsed:>8.1f} pages/s  peak {max(peaks) / 1024 / 1024:.2f} MB per parse "
+          f"({size_kb:.0f} KB pages)")
+    return results
+
+
+def indexed_sections(soup):
+    index = scraper.SectionIndex(soup)
+    return [index.get(texts) for texts in SECTIONS]
+
+
+def rescanned_sections(soup):
+    return [rescan_section(soup, texts) for texts in SECTIONS]
+
+
+def bench_sections(pages, count):
+    soups = [BeautifulSoup(page, "html.parser") for page in pages]
+    for soup in soups:
+        assert indexed_sections(soup) == rescanned_sections(soup)
+
+    for label, lookup in (("rescan per lookup", rescanned_sections), ("SectionIndex", indexed_sections)):
+        started = time.perf_counter()
+        for n in range(count):
+            lookup(soups[n % len(soups)])
+        elapsed = time.perf_counter() - started
+        print(f"  {label:<18} {count / elapsed:>8.1f} pages/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--parsers", default="html.parser,lxml")
+    args = parser.parse_args()
+
+    pages = load_pages()
+    baseline = None
+    for name in args.parsers.split(","):
+        if scraper.resolve_parser(name) != name:
+            print(f"{name:<12} not installed, skipped")
+            continue
+        results = bench_parser(name, pages, args.pages)
+        if baseline is None:
+            baseline = results
+        elif results != baseline:
+            print(f"  note: {name} output differs from {args.parsers.split(',')[0]} on these pages")
+
+    print("six section lookups on parsed pages:")
+    bench_sections(pages, args.pages)
+
+
+if __name__ == "__main__":
+    main()
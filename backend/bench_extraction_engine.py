@@ -0,0 +1,109 @@
+"""Records/second for the knowafest field extraction (extraction_engine) and bridge transform.
+
+Usage: python bench_extraction_engine.py [--records 200000] [--repeat 3]
+
+Builds N records (bench_records.make_records), then times the field extraction before
+extraction_engine existed (legacy_fields: the inline re.search calls transform_event
+used to make) against extract_fee and extract_fields, and the bridge transform with
+each of them. Reports the best of --repeat runs.
+"""
+
+import argparse
+import re
+import time
+
+from bench_records import make_records
+from extraction_engine import extract_fee, extract_fields
+from knowafest_frontend_bridge import extraction_row, make_event_id, record_fingerprint, transform_event
+
+
+def legacy_fee(fee_text):
+    """parse_fee from the bridge before extraction_engine (patterns passed to re per call)."""
+    if not fee_text or fee_text.strip() == "N/A" or fee_text.strip() == "":
+        return "Check Link"
+    fee_lower = fee_text.lower()
+    match_currency = re.search(r'(?:Rs\.?|INR|₹|\$)\s*([\d,]+)', fee_text, re.IGNORECASE)
+    if match_currency:
+        return f"₹{match_currency.group(1)}"
+    match_suffix = re.search(r'(\d+)/-', fee_text)
+    if match_suffix:
+        return f"₹{match_suffix.group(1)}"
+    match_context = re.search(r'\b(\d{2,4})\b', fee_text)
+    if match_context:
+        amt = int(match_context.group(1))
+        if amt < 2025:
+            return f"₹{amt}"
+    if 'free' in fee_lower or 'no registration fee' in fee_lower:
+        return "Free"
+    return "Paid"
+
+
+def legacy_fields(fee_text, timing_text, google_map_link, venue_address):
+    """The inline timing/map/venue regexes of the old transform_event, as an extract_fields twin."""
+    start_time, end_time = "09:00", "17:00"
+    time_match = re.search(r'(\d{1,2}(?::|\.)\d{2}\s*(?:AM|PM))\s*(?:to|-)\s*(\d{1,2}(?::|\.)\d{2}\s*(?:AM|PM))',
+                           timing_text, re.IGNORECASE)
+    if time_match:
+        start_time = time_match.group(1).replace(".", ":")
+        end_time = time_match.group(2).replace(".", ":")
+    if not google_map_link or google_map_link == "N/A":
+        map_match = re.search(r'(https?://(?:maps\.app\.goo\.gl|www\.google\.com/maps|goo\.gl/maps)\S+)', venue_address)
+        if map_match:
+            google_map_link = map_match.group(1)
+            venue_address = venue_address.replace(google_map_link, "")
+            venue_address = re.sub(r'Google Map link:?', '', venue_address, flags=re.IGNORECASE)
+            venue_address = venue_address.strip()
+        else:
+            google_map_link = ""
+    venue_address = re.sub(r'\s+', ' ', venue_address).strip()
+    return {
+        "feeShort": legacy_fee(fee_text),
+        "startTime": start_time,
+        "endTime": end_time,
+        "venueMapUrl": google_map_link,
+        "venueAddress": venue_address,
+    }
+
+
+def best_rate(label, count, fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    rate = count / best
+    print(f"{label:<38} {rate:>12,.0f} records/s  ({best * 1000:.0f} ms)")
+    return rate
+
+
+def transform_all(records, fields_fn):
+    for item in records:
+        transform_event(item, make_event_id(item, record_fingerprint(item)), fields_fn(*extraction_row(item)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    rows = [extraction_row(item) for item in records]
+    fees = [row[0] for row in rows]
+    mismatched = sum(legacy_fields(*row) != extract_fields(*row) for row in rows)
+    print(f"{args.records} records ({mismatched} where legacy and engine output differ)")
+
+    pairs = [
+        ("fee", fees, lambda: [legacy_fee(fee) for fee in fees], lambda: [extract_fee(fee) for fee in fees]),
+        ("fields", rows, lambda: [legacy_fields(*row) for row in rows], lambda: [extract_fields(*row) for row in rows]),
+        ("bridge transform", records, lambda: transform_all(records, legacy_fields),
+         lambda: transform_all(records, extract_fields)),
+    ]
+    for name, data, legacy, engine in pairs:
+        before = best_rate(f"{name}: legacy inline regexes", len(data), legacy, args.repeat)
+        after = best_rate(f"{name}: extraction_engine", len(data), engine, args.repeat)
+        print(f"{'':<38} {after / before:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Load test for /api/student/notifications/stream with many idle SSE subscribers on one node.
+
+Usage: python bench_notification_stream.py [--subscribers 3000] [--broadcasts 20] [--port 5055]
+
+Starts the app on a threaded werkzeug server in this process, opens N idle streams
+(N/10 distinct students), then publishes broadcast and personal notifications through the
+in-process broker and reports fan-out latency, delivery counts and server memory.
+Without --mongo no database is touched (NOTIFICATION_STREAM_MODE=local, no `since`); with
+--mongo the notifications are written through insert_notification into BENCH_DB_NAME.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import statistics
+import threading
+import time
+
+os.environ.setdefault("MONGO_URI", "mongodb://127.0.0.1:27017")
+os.environ["MONGO_DB_NAME"] = os.getenv("BENCH_DB_NAME", "campus_connect_bench")
+os.environ.setdefault("MONGO_ENSURE_INDEXES", "0")
+os.environ.setdefault("NOTIFICATION_STREAM_MODE", "local")
+os.environ.setdefault("NOTIFICATION_STREAM_HEARTBEAT", "15")
+
+from flask_jwt_extended import create_access_token
+from werkzeug.serving import make_server
+
+from app import create_app
+from notification_stream import broker
+
+logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Subscriber:
+    def __init__(self, student_id):
+        self.student_id = student_id
+        self.received = {}  # title -> perf_counter when the event arrived
+
+    async def run(self, port, token, ready):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(
+            (
+                f"GET /api/student/notifications/stream?student_id={self.student_id} HTTP/1.1\r\n"
+                f"Host: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n"
+                "Accept: text/event-stream\r\n\r\n"
+            ).encode()
+        )
+        await writer.drain()
+        status = await reader.readline()
+        assert b" 200 " in status, status
+        ready()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                if line.startswith(b"data: "):
+                    # titles are unique per published notification
+                    title = line.split(b'"title": "', 1)[1].split(b'"', 1)[0].decode()
+                    self.received[title] = time.perf_counter()
+        finally:
+            writer.close()
+
+
+def publish(doc, use_mongo):
+    if use_mongo:
+        from db import get_db
+        from notifications import insert_notification
+
+        insert_notification(
+            get_db(),
+            student_id=doc["student_id"],
+            title=doc["title"],
+            message=doc["message"],
+            notif_type="event",
+            reference_id=doc["title"],
+        )
+    else:
+        broker.publish({**doc, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())})
+
+
+async def main_async(args):
+    app = create_app()
+    server = make_server("127.0.0.1", args.port, app, threaded=True)
+    server.timeout = None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    with app.app_context():
+        token = create_access_token(identity="bench", additional_claims={"role": "student"})
+
+    base_rss = rss_mb()
+    students = max(1, args.subscribers // 10)
+    subscribers = [Subscriber(f"bench{i % students}") for i in range(args.subscribers)]
+    connected = 0
+
+    def ready():
+        nonlocal connected
+        connected += 1
+
+    started = time.perf_counter()
+    tasks = []
+    for i, subscriber in enumerate(subscribers):
+        tasks.append(asyncio.create_task(subscriber.run(args.port, token, ready)))
+        if i % 200 == 199:
+            await asyncio.sleep(0.05)  # stay under the listen backlog
+    while connected < args.subscribers:
+        await asyncio.sleep(0.05)
+        if time.perf_counter() - started > 120:
+            raise SystemExit(f"only {connected}/{args.subscribers} streams connected")
+    while broker.subscriber_count() < args.subscribers:
+        await asyncio.sleep(0.05)
+    print(f"{args.subscribers} idle streams ({students} students) connected in "
+          f"{time.perf_counter() - started:.1f}s; server RSS +{rss_mb() - base_rss:.0f} MB, "
+          f"{threading.active_count()} threads")
+
+    await asyncio.sleep(args.idle)
+    print(f"idle {args.idle:.0f}s: {broker.subscriber_count()} streams still open")
+
+    latencies = []
+    for n in range(args.broadcasts):
+        title = f"broadcast-{n}"
+        sent = time.perf_counter()
+        await asyncio.to_thread(publish, {"student_id": "all", "title": title, "message": "bench"}, args.mongo)
+        while sum(title in s.received for s in subscribers) < args.subscribers:
+            await asyncio.sleep(0.005)
+            if time.perf_counter() - sent > 30:
+                break
+        latencies.append(max(s.received.get(title, float("inf")) for s in subscribers) - sent)
+
+    personal_sent = time.perf_counter()
+    for i in range(students):
+        await asyncio.to_thread(
+            publish, {"student_id": f"bench{i}", "title": f"personal-{i}", "message": "bench"}, args.mongo
+        )
+    while sum(f"personal-{int(s.student_id[5:])}" in s.received for s in subscribers) < args.subscribers:
+        await asyncio.sleep(0.005)
+        if time.perf_counter() - personal_sent > 30:
+            break
+    personal_elapsed = time.perf_counter() - personal_sent
+
+    latencies.sort()
+    print(f"broadcast fan-out to {args.subscribers} streams: p50 {statistics.median(latencies) * 1000:.0f} ms, "
+          f"max {latencies[-1] * 1000:.0f} ms")
+    print(f"{students} personal notifications delivered to all their streams in {personal_elapsed * 1000:.0f} ms")
+    print(f"broker stats: {broker.stats}")
+
+    for task in tasks:
+        task.cancel()
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=3000)
+    parser.add_argument("--broadcasts", type=int, default=20)
+    parser.add_argument("--idle", type=float, default=20, help="seconds to hold the streams idle")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--mongo", action="store_true", help="write through insert_notification")
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed = args.subscribers * 2 + 256
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Per-add cost of the processed-UID log (email_scraper.ProcessedUidLog) as it grows.
+
+Usage: python bench_processed_uids.py [--sizes 1000,10000,100000] [--adds 200] [--dir /path/on/real/disk]
+
+For each size, pre-fills a log with that many UIDs in a temp directory, then times
+--adds new ProcessedUidLog.add() calls (one line append + fsync each) and the load at
+startup. The old JSON-list approach (load the whole list, add, rewrite the file) is
+timed on the same data for comparison. fsync cost depends on the disk, so point --dir
+at the filesystem the scraper actually writes to.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("EMAIL_LLM_BACKEND", "stub")
+
+from email_scraper import ProcessedUidLog
+
+
+def legacy_save(path, uid):
+    """save_processed_uid before the append-only log: read the list, add, rewrite it."""
+    with open(path, 'r') as f:
+        uids = set(json.load(f))
+    uids.add(uid)
+    with open(path, 'w') as f:
+        json.dump(list(uids), f)
+
+
+def per_call_ms(fn, uids):
+    timings = []
+    for uid in uids:
+        started = time.perf_counter()
+        fn(uid)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), max(timings)
+
+
+def bench_size(size, adds, directory):
+    existing = [str(100_000_000 + i) for i in range(size)]
+    new = [str(200_000_000 + i) for i in range(adds)]
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        log_path = os.path.join(tmp, "processed_emails.log")
+        with open(log_path, 'w') as f:
+            f.write("".join(f"{uid}\n" for uid in existing))
+        started = time.perf_counter()
+        log = ProcessedUidLog(log_path, legacy_path=None)
+        load_ms = (time.perf_counter() - started) * 1000
+        add_median, add_max = per_call_ms(log.add, new)
+        log.close()
+
+        json_path = os.path.join(tmp, "processed_emails.json")
+        with open(json_path, 'w') as f:
+            json.dump(existing, f)
+        legacy_median, legacy_max = per_call_ms(lambda uid: legacy_save(json_path, uid), new)
+
+    print(f"{size:>9,} UIDs | log add p50 {add_median:7.3f} ms  max {add_max:7.3f} ms | "
+          f"JSON rewrite p50 {legacy_median:8.2f} ms  max {legacy_max:8.2f} ms | "
+          f"load {load_ms:6.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--adds", type=int, default=200)
+    parser.add_argument("--dir", default=None, help="directory for the temp files (default: system temp)")
+    args = parser.parse_args()
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        bench_size(size, args.adds, args.dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""QR decode latency, zbar passes and recall over the stored posters (email_scraper.decode_qr_from_pil).
+
+Usage: python bench_qr_decode.py [--dir event_posters] [--repeat 3] [--synthetic]
+
+Needs the zbar shared library (pyzbar). For every image in --dir, times the current
+decoder (downscaled probe, finder-pattern gate, candidate crops, then the full frame)
+against the previous one (original image, contrast-enhanced gray, inverted; always at
+full resolution) and reports latency, the number of zbar passes and which posters each
+one decoded. --synthetic also pastes the QR code of the first poster that has one into
+every poster without one (three sizes, dark and inverted, JPEG re-encoded). Recall is
+counted against the posters where either decoder found a code.
+"""
+
+import argparse
+import io
+import os
+import statistics
+import time
+
+os.environ.setdefault("EMAIL_LLM_BACKEND", "stub")
+
+from PIL import Image, ImageEnhance, ImageOps
+from pyzbar import pyzbar
+
+import email_scraper
+from email_scraper import DOWNLOAD_FOLDER, decode_qr_from_pil
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+SYNTHETIC_SIZES = (0.08, 0.12, 0.2)  # QR side as a fraction of the poster's shorter side
+
+passes = 0
+
+
+def counted_decode(img, *args, **kwargs):
+    global passes
+    passes += 1
+    return pyzbar.decode(img, *args, **kwargs)
+
+
+# Count the zbar calls made inside decode_qr_from_pil too
+email_scraper.decode = counted_decode
+
+
+def _decode_first(img):
+    decoded = counted_decode(img)
+    return decoded[0].data.decode('utf-8') if decoded else None
+
+
+def previous_decoder(img):
+    """decode_qr_from_image before the multi-resolution probe."""
+    return (_decode_first(img)
+            or _decode_first(ImageEnhance.Contrast(img.convert('L')).enhance(2.0))
+            or _decode_first(ImageOps.invert(img.convert('RGB'))))
+
+
+def load_posters(directory):
+    posters = []
+    for name in sorted(n for n in os.listdir(directory) if n.lower().endswith(IMAGE_EXTENSIONS)):
+        img = Image.open(os.path.join(directory, name))
+        img.load()
+        posters.append((name, img))
+    return posters
+
+
+def synthetic_posters(posters):
+    """Posters without a code, each with a real poster's QR code pasted into a corner."""
+    source = None
+    for name, img in posters:
+        found = pyzbar.decode(img.convert('L'))
+        if found:
+            left, top, width, height = found[0].rect
+            pad = width // 8
+            source = img.convert('RGB').crop((left - pad, top - pad, left + width + pad, top + height + pad))
+            break
+    if source is None:
+        raise SystemExit("--synthetic needs at least one poster with a decodable QR code")
+
+    synthetic = []
+    for name, img in posters:
+        if pyzbar.decode(img.convert('L')):
+            continue
+        for size in SYNTHETIC_SIZES:
+            for inverted in (False, True):
+                side = int(min(img.size) * size)
+                code = source.resize((side, side), Image.LANCZOS)
+                if inverted:
+                    code = ImageOps.invert(code)
+                poster = img.convert('RGB')
+                poster.paste(code, (img.size[0] - side - side // 4, img.size[1] - side - side // 4))
+                buffer = io.BytesIO()
+                poster.save(buffer, format="JPEG", quality=85)
+                label = f"{os.path.splitext(name)[0]}+qr{int(size * 100)}{'-inv' if inverted else ''}"
+                synthetic.append((label, Image.open(io.BytesIO(buffer.getvalue()))))
+    return synthetic
+
+
+def measure(fn, img, repeat):
+    global passes
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        passes = 0
+        started = time.perf_counter()
+        result = fn(img)
+        best = min(best, time.perf_counter() - started)
+    return best, passes, result
+
+
+def report(rows, label):
+    with_qr = [r for r in rows if r[3] or r[6]]
+    without_qr = [r for r in rows if not (r[3] or r[6])]
+    print(f"{label}: {len(rows)} posters, {len(with_qr)} with a QR code")
+    for name, time_index, passes_index, result_index in (("previous", 1, 2, 3), ("current", 4, 5, 6)):
+        times = [r[time_index] for r in rows]
+        found = sum(1 for r in with_qr if r[result_index])
+        line = (f"  {name:<9} median {statistics.median(times) * 1000:6.0f} ms  total {sum(times):6.2f}s  "
+                f"recall {found}/{len(with_qr)}")
+        if without_qr:
+            line += (f"  no-QR posters: median {statistics.median(r[time_index] for r in without_qr) * 1000:.0f} ms, "
+                     f"{max(r[passes_index] for r in without_qr)} zbar passes")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", default=DOWNLOAD_FOLDER, help="directory of poster images")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N timings per poster")
+    parser.add_argument("--synthetic", action="store_true", help="also test pasted QR codes")
+    args = parser.parse_args()
+
+    posters = load_posters(args.dir)
+    if not posters:
+        raise SystemExit(f"no images in {args.dir}")
+    sets = [("stored posters", posters)]
+    if args.synthetic:
+        sets.append(("synthetic", synthetic_posters(posters)))
+
+    for label, images in sets:
+        rows = []
+        for name, img in images:
+            old_s, old_passes, old = measure(previous_decoder, img, args.repeat)
+            new_s, new_passes, new = measure(decode_qr_from_pil, img, args.repeat)
+            rows.append((name, old_s, old_passes, old, new_s, new_passes, new))
+            print(f"{name:<34} previous {old_s * 1000:5.0f} ms {old_passes} passes {'QR' if old else '--'}   "
+                  f"current {new_s * 1000:5.0f} ms {new_passes} passes {'QR' if new else '--'}")
+            if old and new and old != new:
+                print(f"  decoded text differs: {old!r} vs {new!r}")
+        report(rows, label)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""Synthetic knowafest records for the benches, cycled from tests/golden/knowafest_records.json."""
+
+import json
+import os
+
+GOLDEN_RECORDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "golden", "knowafest_records.json")
+
+
+def make_records(count, start=0):
+    """Records start..start+count-1 with unique fest names and event URLs; every third gets its own fee."""
+    with open(GOLDEN_RECORDS, encoding="utf-8") as f:
+        base = json.load(f)
+    records = []
+    for i in range(start, start + count):
+        item = dict(base[i % len(base)])
+        if i % 3 == 0:
+            item["registration_fees"] = f"Rs. {100 + i % 900} per head"
+        item["fest_name"] = f"Bench Fest {i}"
+        item["event_url"] = f"https://www.knowafest.com/explore/events/bench-{i}"
+        records.append(item)
+    return records
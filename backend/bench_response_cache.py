@@ -0,0 +1,111 @@
+"""Requests/second for the cached student endpoints against a local mongod.
+
+Usage: MONGO_URI=mongodb://localhost:27017 python bench_response_cache.py [--events 500] [--seconds 5]
+
+Seeds a throwaway database (BENCH_DB_NAME, default campus_connect_bench), then measures
+/api/student/events and /api/student/vacancies with the cache off, on, and on with
+If-None-Match (304s). The database is dropped afterwards.
+"""
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+os.environ["MONGO_DB_NAME"] = os.getenv("BENCH_DB_NAME", "campus_connect_bench")
+os.environ.setdefault("MONGO_ENSURE_INDEXES", "0")
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from db import get_client, get_db
+from indexes import ensure_indexes
+from response_cache import response_cache
+
+
+def seed(count):
+    db = get_db()
+    now = datetime.now(timezone.utc)
+    db.events.insert_many([
+        {
+            "event_id": uuid4().hex,
+            "event_name": f"Bench Event {i}",
+            "date": (now + timedelta(days=i % 60)).strftime("%Y-%m-%d"),
+            "time_from": "10:00",
+            "description": "Lorem ipsum " * 40,
+            "club_name": f"Club {i % 12}",
+            "status": "Published",
+            "created_at": now.isoformat(),
+        }
+        for i in range(count)
+    ])
+    db.vacancies.insert_many([
+        {
+            "vacancy_id": uuid4().hex,
+            "club_name": f"Club {i % 12}",
+            "role": "Member",
+            "description": "Lorem ipsum " * 20,
+            "status": "Published",
+            "created_at": (now - timedelta(minutes=i)).isoformat(),
+        }
+        for i in range(count // 5)
+    ])
+    ensure_indexes(db)
+
+
+def measure(app, path, headers, seconds, threads):
+    done = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        client = app.test_client()
+        count = 0
+        while time.perf_counter() < deadline:
+            response = client.get(path, headers=headers)
+            assert response.status_code in (200, 304), response.status_code
+            count += 1
+        with lock:
+            done[0] += count
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return done[0] / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    app = create_app()
+    get_client().drop_database(os.environ["MONGO_DB_NAME"])
+    seed(args.events)
+    try:
+        with app.app_context():
+            token = create_access_token(identity="bench", additional_claims={"role": "student"})
+        auth = {"Authorization": f"Bearer {token}"}
+
+        for path in ("/api/student/events", "/api/student/vacancies"):
+            ttl = response_cache.ttl
+            response_cache.ttl = 0
+            uncached = measure(app, path, auth, args.seconds, args.threads)
+            response_cache.ttl = ttl or 30
+            cached = measure(app, path, auth, args.seconds, args.threads)
+            etag = app.test_client().get(path, headers=auth).headers["ETag"]
+            revalidated = measure(app, path, {**auth, "If-None-Match": etag}, args.seconds, args.threads)
+            print(f"{path}: no cache {uncached:8.0f} req/s | cached {cached:8.0f} req/s "
+                  f"({cached / uncached:.1f}x) | 304 {revalidated:8.0f} req/s")
+    finally:
+        get_client().drop_database(os.environ["MONGO_DB_NAME"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Sequential vs concurrent detail-page scraping against a local fixture server.
+
+Usage: python bench_upcoming_scraper.py [--pages 60] [--workers 6] [--latency 0.8] [--rate 2]
+
+Serves the saved knowafest pages in tests/fixtures/knowafest from http.server on
+127.0.0.1: a listing with --pages rows, each linking to one of the detail fixtures,
+answered after --latency seconds (a stand-in for the real site's response time). Then runs
+scrape_upcoming_fests with MAX_WORKERS=1 and with --workers, each into a throwaway store,
+HTTP cache and checkpoint, and reports pages/second. --rate is the per-host token-bucket
+limit (SCRAPER_RATE_PER_HOST), so the concurrent run can never beat it.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "fixtures", "knowafest")
+ROW_RE = re.compile(r"<tr onclick=.*?</tr>", re.DOTALL)
+URL_RE = re.compile(r"window\.open\('[^']+'\)")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def build_listing(pages, base_url):
+    """The listing fixture with its rows cycled out to `pages` rows pointing at `base_url`."""
+    html = read_fixture("listing.html").decode("utf-8")
+    rows = ROW_RE.findall(html)
+    first, last = html.index(rows[0]), html.index(rows[-1]) + len(rows[-1])
+    new_rows = [
+        URL_RE.sub(f"window.open('{base_url}/explore/events/bench-{i}')", rows[i % len(rows)])
+        for i in range(pages)
+    ]
+    return (html[:first] + "\n".join(new_rows) + html[last:]).encode("utf-8")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    listing = b""
+    details = []
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        if self.path == "/explore/upcomingfests":
+            body = self.listing
+        elif self.path.startswith("/explore/events/bench-"):
+            body = self.details[int(self.path.rsplit("-", 1)[1]) % len(self.details)]
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(scraper, workers, list_url):
+    scraper.MAX_WORKERS = workers
+    with tempfile.TemporaryDirectory() as tmp:
+        store = scraper.EventStore(os.path.join(tmp, "events.jsonl"), legacy_path=None)
+        cache = scraper.HttpCache(os.path.join(tmp, "http_cache"))
+        checkpoint = scraper.ScrapeCheckpoint(os.path.join(tmp, "checkpoint.jsonl"))
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            scraper.scrape_upcoming_fests(list_url=list_url, store=store, cache=cache, checkpoint=checkpoint)
+        elapsed = time.perf_counter() - started
+        events = list(store.iter_events())
+    return elapsed, events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.8, help="seconds before each response")
+    parser.add_argument("--rate", type=float, default=2, help="per-host requests/second")
+    parser.add_argument("--burst", type=int, default=4)
+    args = parser.parse_args()
+
+    # Read when upcoming_scraper is imported
+    os.environ["SCRAPER_RATE_PER_HOST"] = str(args.rate)
+    os.environ["SCRAPER_RATE_BURST"] = str(args.burst)
+    import upcoming_scraper as scraper
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    FixtureHandler.listing = build_listing(args.pages, base_url)
+    FixtureHandler.details = [read_fixture(name) for name in sorted(os.listdir(FIXTURES)) if name.startswith("detail_")]
+    FixtureHandler.latency = args.latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"{args.pages} detail pages, {args.latency:.2f}s latency, "
+          f"rate limit {args.rate:g}/s (burst {args.burst})")
+    results = {}
+    for workers in (1, args.workers):
+        elapsed, events = run(scraper, workers, f"{base_url}/explore/upcomingfests")
+        results[workers] = (elapsed, events)
+        print(f"MAX_WORKERS={workers:<3} {elapsed:>7.2f}s  {len(events) / elapsed:>6.2f} pages/s  ({len(events)} events)")
+    server.shutdown()
+
+    (sequential, seq_events), (concurrent, conc_events) = results[1], results[args.workers]
+    assert seq_events == conc_events, "concurrent run stored different events"
+    print(f"speedup: {sequential / concurrent:.1f}x (same {len(seq_events)} events in the same order)")
+
+
+if __name__ == "__main__":
+    main()
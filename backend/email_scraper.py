@@ -1,9 +1,20 @@
 import os
 import io
+import argparse
+import re
 import json
 import time
 import logging
+import atexit
+import signal
+import sys
+import threading
+import hashlib
+import multiprocessing
+from uuid import uuid4
+from collections import deque
 import fitz  # PyMuPDF
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
 from dotenv import load_dotenv, find_dotenv
@@ -13,6 +24,12 @@ from imap_tools import MailBox, OR, AND, A
 from google import genai
 from google.genai import types
 
+from llm_cache import ExtractionCache, subject_scope
+from preclassifier import PreClassifier, image_stats, ocr_text
+from poster_store import PosterStore
+import metrics as pipeline_metrics
+from metrics import metrics
+
 # --- 1. CONFIGURATION ---
 
 load_dotenv(find_dotenv())
@@ -25,9 +42,12 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 # File Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DOWNLOAD_FOLDER = os.path.join(BASE_DIR, "event_posters")
-EVENTS_JSON_FILE = os.path.join(BASE_DIR, "all_events.json")
-PROCESSED_LOG_FILE = os.path.join(BASE_DIR, "processed_emails.json")
+EVENTS_JSON_FILE = os.path.join(BASE_DIR, "all_events.jsonl")
+LEGACY_EVENTS_JSON_FILE = os.path.join(BASE_DIR, "all_events.json")
+PROCESSED_LOG_FILE = os.path.join(BASE_DIR, "processed_emails.log")
+LEGACY_PROCESSED_FILE = os.path.join(BASE_DIR, "processed_emails.json")
 USAGE_LOG_FILE = os.path.join(BASE_DIR, "model_usage.json")
+LLM_CACHE_FILE = os.path.join(BASE_DIR, "llm_cache.sqlite3")
 
 # POSITIVE KEYWORDS (We want these)
 SEARCH_KEYWORDS = [
@@ -50,18 +70,172 @@ MODELS_CONFIG = {
     "gemini-1.5-flash":      {"rpm": 10, "rpd": 1400, "priority": 3},
 }
 
+# PIPELINE CONFIGURATION
+# CPU stage (PDF rasterisation + QR decoding) runs in a process pool,
+# LLM extraction in a thread pool; throughput is bounded by the model quotas above.
+CPU_WORKERS = int(os.getenv("EMAIL_CPU_WORKERS", str(os.cpu_count() or 2)))
+LLM_WORKERS = int(os.getenv("EMAIL_LLM_WORKERS", str(2 * len(MODELS_CONFIG))))
+# Poster stage (WebP/AVIF variants of confirmed events) runs in its own process pool
+POSTER_WORKERS = int(os.getenv("EMAIL_POSTER_WORKERS", "2"))
+# The pools are created while shard and LLM threads run; a forked child can inherit a
+# lock (logging, metrics) held by one of them and hang, so workers start fresh
+POOL_START_METHOD = os.getenv("EMAIL_POOL_START_METHOD", "spawn")
+# Max emails between fetch and save at once (bounded queue between the stages)
+MAX_IN_FLIGHT = int(os.getenv("EMAIL_MAX_IN_FLIGHT", "16"))
+# "gemini" (default) or "stub" for a local fake model, used for benchmarks
+LLM_BACKEND = os.getenv("EMAIL_LLM_BACKEND", "gemini")
+STUB_LATENCY = float(os.getenv("EMAIL_STUB_LATENCY", "1.0"))
+
+# PDF RASTERISATION
+# Pixel budget for the rendered poster page; DPI is derived from the page size
+# (A4 at the 300 DPI cap is ~8.7M px, so A3 and larger get a lower DPI)
+PDF_PIXEL_BUDGET = int(os.getenv("EMAIL_PDF_PIXEL_BUDGET", "9000000"))
+PDF_MIN_DPI = 100
+PDF_MAX_DPI = 300
+# Pages inspected when looking for the poster page
+PDF_MAX_PAGES_SCANNED = 5
+# Image sent to the model: longest side and JPEG quality
+LLM_IMAGE_MAX_SIDE = int(os.getenv("EMAIL_LLM_IMAGE_MAX_SIDE", "2048"))
+LLM_JPEG_QUALITY = int(os.getenv("EMAIL_LLM_JPEG_QUALITY", "85"))
+
+# IMAP FETCH
+# Full messages (with attachments) are fetched this many at a time, after a header/structure prefilter
+FETCH_BATCH_SIZE = int(os.getenv("EMAIL_FETCH_BATCH_SIZE", "20"))
+# Start of one FETCH response as imaplib returns it ("* 12 FETCH (" -> b"12 (")
+FETCH_START_RE = re.compile(rb'^(\d+) \(')
+UID_RE = re.compile(rb'\bUID (\d+)')
+QUOTED_RE = re.compile(rb'"(?:[^"\\]|\\.)*"')
+# BODYSTRUCTURE fragments (lowercased) that mark a poster attachment
+POSTER_MIME_MARKERS = (b'"image"', b'"application" "pdf"', b'.pdf"')
+# Backfills are split into this many date shards, each scanned over its own IMAP connection
+SCAN_SHARDS = int(os.getenv("EMAIL_SCAN_SHARDS", "1"))
+IMAP_HOST = os.getenv("EMAIL_IMAP_HOST", "imap.gmail.com")
+
+# QR DECODING
+# Longest side of the downscaled probe image
+QR_PROBE_MAX_SIDE = int(os.getenv("EMAIL_QR_PROBE_MAX_SIDE", "1200"))
+# Candidate-region search: allowed deviation from the 1:1:3:1:1 finder-pattern ratio,
+# and how many regions to try at full resolution
+QR_FINDER_TOLERANCE = 0.5
+QR_MAX_CANDIDATES = 4
+# Set to 1 to always fall back to full-frame decoding, even without candidate regions
+QR_ALWAYS_FULL_SCAN = os.getenv("EMAIL_QR_ALWAYS_FULL_SCAN", "0") == "1"
+# Runs of black or white pixels in a binarized scanline
+QR_RUN_RE = re.compile(rb'\x00+|\xff+')
+QR_BINARIZE = [0] * 128 + [255] * 128
+
+# LLM RESULT CACHE
+# Bump PROMPT_VERSION whenever the extraction prompt changes, so old results are not reused
+PROMPT_VERSION = 1
+# "exact" (same image bytes) or "perceptual" (also near-identical re-encodes)
+LLM_CACHE_MODE = os.getenv("EMAIL_LLM_CACHE_MODE", "exact")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("EMAIL_LLM_CACHE_MAX_ENTRIES", "5000"))
+
+# PRE-CLASSIFIER
+# "on" skips likely non-events before the LLM, "shadow" only logs decisions, "off" disables it.
+# Shadow by default: switch to "on" once preclassifier_decisions.jsonl supports the threshold.
+PRECLASSIFY_MODE = os.getenv("EMAIL_PRECLASSIFY", "shadow")
+# Skip when the non-event confidence is at least this high; tune from preclassifier_decisions.jsonl
+PRECLASSIFY_THRESHOLD = float(os.getenv("EMAIL_PRECLASSIFY_THRESHOLD", "0.9"))
+# Set to 1 to add local OCR text (needs pytesseract + tesseract) to the keyword scoring
+PRECLASSIFY_OCR = os.getenv("EMAIL_PRECLASSIFY_OCR", "0") == "1"
+PRECLASSIFY_LOG_FILE = os.path.join(BASE_DIR, "preclassifier_decisions.jsonl")
+# Characters of the email body used for keyword scoring
+EMAIL_BODY_CHARS = 5000
+
+# EVENT OUTPUT
+# "file" (all_events.jsonl), "mongo" (the `events` collection) or "both"
+EVENT_SINK = os.getenv("EMAIL_EVENT_SINK", "file")
+# Saved events are buffered and written in batches of this size (and on exit/signal)
+EVENT_BATCH_SIZE = int(os.getenv("EMAIL_EVENT_BATCH_SIZE", "20"))
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
-client = genai.Client(api_key=GEMINI_API_KEY)
 
-if not os.path.exists(DOWNLOAD_FOLDER):
-    os.makedirs(DOWNLOAD_FOLDER)
 
-# --- 2. QUOTA SYSTEM (Unchanged) ---
+class StubModelClient:
+    """
+    Local stand-in for `genai.Client` with the same `models.generate_content` surface.
+    Sleeps EMAIL_STUB_LATENCY seconds and returns a fixed event, so the pipeline can be
+    benchmarked without network access or quota.
+    """
+
+    class _Response:
+        def __init__(self, text):
+            self.text = text
+
+    def __init__(self, latency=STUB_LATENCY):
+        self.latency = latency
+        self.models = self
+
+    def generate_content(self, model, contents, config=None):
+        time.sleep(self.latency)
+        return self._Response(json.dumps({
+            "is_event": True,
+            "event_title": f"Stub Event ({model})",
+            "venue": "None",
+            "start_date": str(date.today()),
+            "end_date": str(date.today()),
+            "registration_fee": "None",
+            "team_size": "None",
+            "category": "Workshop",
+            "registration_link": "None",
+            "organizer": "None",
+        }))
+
+
+if LLM_BACKEND == "stub":
+    client = StubModelClient()
+else:
+    client = genai.Client(api_key=GEMINI_API_KEY)
+
+# Shared state (poster store, quota manager, LLM cache, processed-UID log, event
+# writer) is created on first use through the get_* functions below, not at import:
+# each one opens or migrates files, and tests, benches and spawned pool workers
+# import this module without needing them.
+_shared_lock = threading.RLock()
+
+# Content-addressed: a poster forwarded in several emails is stored (and resized) once
+poster_store = None
+
+def get_poster_store():
+    global poster_store
+    with _shared_lock:
+        if poster_store is None:
+            os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
+            poster_store = PosterStore(DOWNLOAD_FOLDER)
+        return poster_store
+
+# --- 2. QUOTA SYSTEM ---
+
+# Usage is written to model_usage.json every N calls (and on exit), not on every call
+QUOTA_FLUSH_EVERY = int(os.getenv("EMAIL_QUOTA_FLUSH_EVERY", "10"))
+RPM_WINDOW_SECONDS = 60
 
 class QuotaManager:
-    def __init__(self, filename):
+    """
+    Rate limiter for the models in MODELS_CONFIG.
+
+    - RPM: sliding window of call timestamps per model (last 60 seconds).
+    - RPD: daily call count per model, reset when the date changes.
+    - `acquire()` is non-blocking: it reserves a slot on the model that is available
+      earliest (ties go to the higher-priority model) or says how long to wait.
+
+    Recent call timestamps are persisted with the daily counts so a restart does not
+    burst past a model's RPM.
+    """
+
+    def __init__(self, filename, flush_every=QUOTA_FLUSH_EVERY):
         self.filename = filename
+        self.flush_every = max(flush_every, 1)
+        self.lock = threading.Lock()
+        self.unsaved = 0
         self.usage = self._load_usage()
+        recent = self.usage.pop("recent", {})
+        cutoff = time.time() - RPM_WINDOW_SECONDS
+        self.windows = {
+            name: deque(t for t in recent.get(name, []) if t > cutoff)
+            for name in MODELS_CONFIG
+        }
 
     def _load_usage(self):
         if os.path.exists(self.filename):
@@ -69,102 +243,540 @@ class QuotaManager:
                 with open(self.filename, 'r') as f:
                     data = json.load(f)
                     if data.get("date") != str(date.today()):
-                        return {"date": str(date.today()), "models": {}}
+                        return {"date": str(date.today()), "models": {}, "recent": data.get("recent", {})}
                     return data
             except: pass
         return {"date": str(date.today()), "models": {}}
 
     def _save_usage(self):
-        with open(self.filename, 'w') as f:
-            json.dump(self.usage, f, indent=2)
-
-    def can_use_model(self, model_name):
-        limit = MODELS_CONFIG.get(model_name, {}).get("rpd", 1000)
-        current = self.usage["models"].get(model_name, 0)
-        if current >= limit:
-            logging.warning(f"  [!] Daily limit reached for {model_name}. Skipping.")
-            return False
-        return True
+        data = dict(self.usage)
+        data["recent"] = {name: list(window) for name, window in self.windows.items() if window}
+        tmp_path = f"{self.filename}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.filename)
+        self.unsaved = 0
+
+    def _roll_day(self):
+        today = str(date.today())
+        if self.usage["date"] != today:
+            self.usage = {"date": today, "models": {}}
 
-    def increment_usage(self, model_name):
-        current = self.usage["models"].get(model_name, 0)
-        self.usage["models"][model_name] = current + 1
-        self._save_usage()
+    def _next_available(self, model_name, now):
+        """Seconds until `model_name` has a free slot, or None if its daily quota is used up."""
+        config = MODELS_CONFIG[model_name]
+        if self.usage["models"].get(model_name, 0) >= config.get("rpd", 1000):
+            return None
+        window = self.windows[model_name]
+        while window and window[0] <= now - RPM_WINDOW_SECONDS:
+            window.popleft()
+        if len(window) < config["rpm"]:
+            return 0.0
+        return window[0] + RPM_WINDOW_SECONDS - now
 
-quota_manager = QuotaManager(USAGE_LOG_FILE)
+    def acquire(self, exclude=()):
+        """
+        Non-blocking slot reservation across models in priority order.
+
+        Returns (model_name, 0) when a call slot was reserved on `model_name`,
+        (model_name, seconds) when the earliest slot opens on `model_name` after that
+        many seconds (nothing reserved), or (None, None) when every model not in
+        `exclude` has reached its daily limit.
+        """
+        with self.lock:
+            self._roll_day()
+            now = time.time()
+            best_model, best_wait = None, None
+            for model_name in sorted(MODELS_CONFIG, key=lambda k: MODELS_CONFIG[k]['priority']):
+                if model_name in exclude:
+                    continue
+                wait = self._next_available(model_name, now)
+                if wait is not None and (best_wait is None or wait < best_wait):
+                    best_model, best_wait = model_name, wait
+
+            if best_model is None or best_wait > 0:
+                return best_model, best_wait
+
+            self.windows[best_model].append(now)
+            self.usage["models"][best_model] = self.usage["models"].get(best_model, 0) + 1
+            self.unsaved += 1
+            if self.unsaved >= self.flush_every:
+                self._save_usage()
+            return best_model, 0
+
+    def wait_for_model(self, exclude=(), stop=None):
+        """Blocking wrapper around `acquire()`; returns None once no model has quota left
+        (or as soon as the `stop` event is set)."""
+        while True:
+            model_name, wait = self.acquire(exclude)
+            if model_name is None or wait == 0:
+                return model_name
+            if stop is not None:
+                if stop.wait(wait):
+                    return None
+            else:
+                time.sleep(wait)
+
+    def remaining(self, model_name):
+        with self.lock:
+            self._roll_day()
+            return MODELS_CONFIG[model_name].get("rpd", 1000) - self.usage["models"].get(model_name, 0)
+
+    def flush(self):
+        with self.lock:
+            if self.unsaved:
+                self._save_usage()
+
+quota_manager = None
+
+def get_quota_manager():
+    global quota_manager
+    with _shared_lock:
+        if quota_manager is None:
+            quota_manager = QuotaManager(USAGE_LOG_FILE)
+            atexit.register(quota_manager.flush)
+        return quota_manager
+
+llm_cache = None
+
+def get_llm_cache():
+    global llm_cache
+    with _shared_lock:
+        if llm_cache is None:
+            llm_cache = ExtractionCache(LLM_CACHE_FILE, mode=LLM_CACHE_MODE, max_entries=LLM_CACHE_MAX_ENTRIES)
+        return llm_cache
+
+preclassifier = PreClassifier(PRECLASSIFY_MODE, PRECLASSIFY_THRESHOLD, PRECLASSIFY_LOG_FILE)
 
 # --- 3. DATA HELPERS ---
 
+class ProcessedUidLog:
+    """
+    Append-only log of processed email UIDs (one per line).
+
+    The log is read once into an in-memory set; each new UID is a single durable line
+    append, so marking a message costs the same no matter how many came before.
+    `add()` skips UIDs already in the set, so the file holds each UID once and never
+    needs compacting. The old JSON list file is migrated on first use.
+    """
+
+    def __init__(self, path=PROCESSED_LOG_FILE, legacy_path=LEGACY_PROCESSED_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.uids = set()
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.uids = {uid for uid in (line.strip() for line in f) if uid}
+        elif legacy_path and os.path.exists(legacy_path):
+            try:
+                with open(legacy_path, 'r') as f: self.uids = {str(u) for u in json.load(f)}
+            except: self.uids = set()
+            self._rewrite()
+        self.file = open(path, 'a')
+
+    def __contains__(self, uid):
+        return uid in self.uids
+
+    def __len__(self):
+        return len(self.uids)
+
+    def add(self, uid):
+        with self.lock:
+            if uid in self.uids:
+                return
+            self.uids.add(uid)
+            self.file.write(f"{uid}\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def _rewrite(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write("".join(f"{uid}\n" for uid in sorted(self.uids)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+processed_log = None
+
+def get_processed_log():
+    global processed_log
+    with _shared_lock:
+        if processed_log is None:
+            processed_log = ProcessedUidLog()
+        return processed_log
+
 def load_processed_uids():
-    if os.path.exists(PROCESSED_LOG_FILE):
-        try:
-            with open(PROCESSED_LOG_FILE, 'r') as f: return set(json.load(f))
-        except: return set()
-    return set()
+    return get_processed_log().uids
 
 def save_processed_uid(uid):
-    uids = load_processed_uids()
-    uids.add(uid)
-    with open(PROCESSED_LOG_FILE, 'w') as f: json.dump(list(uids), f)
+    get_processed_log().add(uid)
+
+def _extracted(value):
+    """LLM fields use the string "None" for missing values."""
+    value = (value or "").strip() if isinstance(value, str) else ""
+    return "" if value.lower() in ("none", "null", "n/a") else value
+
+def _split_datetime(value):
+    """'YYYY-MM-DD HH:MM' (either part optional) -> (date, time) strings."""
+    date_part = re.search(r'\d{4}-\d{2}-\d{2}', value)
+    time_part = re.search(r'\b\d{1,2}:\d{2}\b', value)
+    return (date_part.group(0) if date_part else "",
+            time_part.group(0).zfill(5) if time_part else "")
+
+NON_TECHNICAL_CATEGORIES = ("cultural", "sports", "music", "dance", "art", "literary", "fest")
+
+def event_document(event_data):
+    """
+    Maps an extracted email event onto the `events` collection schema used by
+    routes/admin.publish_event. The raw extraction is kept under `extracted`.
+    """
+    start_date, time_from = _split_datetime(_extracted(event_data.get("start_date")))
+    end_date, time_to = _split_datetime(_extracted(event_data.get("end_date")))
+    category = _extracted(event_data.get("category"))
+    organizer = _extracted(event_data.get("organizer"))
+    uid = event_data.get("email_uid")
+    return {
+        "source_key": f"email:{uid}" if uid else "email-sha1:" + hashlib.sha1(
+            json.dumps(event_data, sort_keys=True, ensure_ascii=False).encode()).hexdigest(),
+        "event_name": _extracted(event_data.get("event_title")) or event_data.get("email_subject", ""),
+        "event_type": "Non-Technical" if any(w in category.lower() for w in NON_TECHNICAL_CATEGORIES) else "Technical",
+        "category": "External",
+        "date": start_date,
+        "start_date": start_date,
+        "end_date": end_date or start_date,
+        "time_from": time_from,
+        "time_to": time_to,
+        "location": _extracted(event_data.get("venue")),
+        "description": event_data.get("email_subject", ""),
+        "contact_details": _extracted(event_data.get("registration_link")),
+        "club_name": organizer,
+        "created_by": organizer or "email",
+        "image_url": event_data.get("image_url", ""),
+        "extracted": event_data,
+    }
+
+class EventWriter:
+    """
+    Buffered writer for extracted events.
+
+    Events are collected in memory and written `batch_size` at a time:
+    - file: one append + fsync per batch to a JSON Lines file, so a crash can at worst
+      leave a torn last line, never truncate earlier events;
+    - mongo: one unordered `bulk_write` of upserts per batch into the `events`
+      collection, mapped to its schema and stored as drafts (status "Draft",
+      source "email") so they are not shown until published.
+
+    Each sink keeps its own pending list, so a Mongo failure with sink="both" does not
+    append the batch to the file again on the next flush. Mongo writes upsert on
+    `source_key` (the email UID), so retrying a partly applied batch is harmless.
+
+    `flush()` is also called at exit and from the SIGINT/SIGTERM handlers.
+    """
+
+    def __init__(self, path=EVENTS_JSON_FILE, legacy_path=LEGACY_EVENTS_JSON_FILE,
+                 batch_size=EVENT_BATCH_SIZE, sink=EVENT_SINK, collection=None):
+        if sink not in ("file", "mongo", "both"):
+            raise ValueError(f"Unknown event sink: {sink}")
+        self.path = path
+        self.batch_size = max(batch_size, 1)
+        self.sink = sink
+        self.pending = {name: [] for name in ("file", "mongo") if sink in (name, "both")}
+        self.lock = threading.RLock()
+        self._collection = collection
+        if not os.path.exists(path) and legacy_path and os.path.exists(legacy_path):
+            try:
+                with open(legacy_path, 'r') as f: legacy = json.load(f)
+            except: legacy = []
+            self._write_file(legacy)
+
+    def add(self, event_data):
+        with self.lock:
+            for queue in self.pending.values():
+                queue.append(event_data)
+            if max(len(q) for q in self.pending.values()) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        with self.lock:
+            error = None
+            for name, write in (("file", self._write_file), ("mongo", self._write_mongo)):
+                batch = self.pending.get(name)
+                if not batch:
+                    continue
+                try:
+                    write(batch)
+                except Exception as e:
+                    # Keep the events for this sink's next flush instead of dropping them
+                    error = error or e
+                    continue
+                self.pending[name] = []
+                logging.info(f"  > Flushed {len(batch)} event(s) to {name}")
+            if error:
+                raise error
+
+    def _write_file(self, events):
+        if not events:
+            return
+        data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write_mongo(self, events):
+        from pymongo import UpdateOne
+        if self._collection is None:
+            from db import get_db
+            self._collection = get_db().events
+            self._collection.create_index("source_key", unique=True, sparse=True)
+        now = datetime.now().astimezone().isoformat()
+        ops = []
+        for e in events:
+            doc = event_document(e)
+            ops.append(UpdateOne(
+                {"source_key": doc["source_key"]},
+                {"$setOnInsert": {**doc, "event_id": uuid4().hex, "status": "Draft",
+                                  "source": "email", "created_at": now}},
+                upsert=True,
+            ))
+        self._collection.bulk_write(ops, ordered=False)
+
+event_writer = None
+
+def get_event_writer():
+    global event_writer
+    with _shared_lock:
+        if event_writer is None:
+            event_writer = EventWriter()
+            atexit.register(event_writer.flush)
+        return event_writer
+
+def flush_shared_state():
+    """Writes buffered events and quota usage, for whichever of them were created."""
+    if event_writer is not None:
+        event_writer.flush()
+    if quota_manager is not None:
+        quota_manager.flush()
 
 def append_event_to_json(event_data):
-    events = []
-    if os.path.exists(EVENTS_JSON_FILE):
-        try:
-            with open(EVENTS_JSON_FILE, 'r') as f: events = json.load(f)
-        except: events = []
-    events.append(event_data)
-    with open(EVENTS_JSON_FILE, 'w') as f: json.dump(events, f, indent=2)
+    get_event_writer().add(event_data)
+
+# Set on SIGINT/SIGTERM: shards stop fetching, queued work is cancelled, quota waits end
+stop_event = threading.Event()
+
+def _flush_on_signal(signum, frame):
+    logging.warning(f"Received signal {signum}. Stopping and flushing buffered events...")
+    stop_event.set()
+    flush_shared_state()
+    if signum == signal.SIGINT:
+        raise KeyboardInterrupt
+    sys.exit(128 + signum)
 
 # --- 4. IMAGE PROCESSING ---
 
-def pdf_to_image_bytes(pdf_bytes):
+def _poster_page(doc):
+    """
+    Index of the page holding the poster: the one (among the first few) whose images
+    cover the largest share of the page. Falls back to page 0 for text-only PDFs.
+    """
+    best_index, best_coverage = 0, 0.0
+    for index in range(min(doc.page_count, PDF_MAX_PAGES_SCANNED)):
+        page = doc.load_page(index)
+        page_area = abs(page.rect.width * page.rect.height) or 1.0
+        covered = 0.0
+        for info in page.get_image_info():
+            bbox = fitz.Rect(info["bbox"]) & page.rect
+            covered += abs(bbox.width * bbox.height)
+        coverage = covered / page_area
+        if coverage > best_coverage:
+            best_index, best_coverage = index, coverage
+    return best_index
+
+def rasterize_pdf(pdf_bytes):
+    """
+    Renders the poster page of a PDF once, as an RGB PIL image.
+
+    DPI is chosen from the page size so the render stays within PDF_PIXEL_BUDGET
+    pixels (capped at PDF_MAX_DPI, which small pages still get).
+    """
     try:
         doc = fitz.open(stream=pdf_bytes, filetype="pdf")
         if doc.page_count < 1: return None
-        page = doc.load_page(0) 
-        # Increased DPI to 300 for better Text/QR recognition
-        pix = page.get_pixmap(dpi=300) 
-        return pix.tobytes("jpg")
+        page = doc.load_page(_poster_page(doc))
+        width_in, height_in = page.rect.width / 72.0, page.rect.height / 72.0
+        dpi = (PDF_PIXEL_BUDGET / max(width_in * height_in, 1e-6)) ** 0.5
+        dpi = int(max(PDF_MIN_DPI, min(PDF_MAX_DPI, dpi)))
+        pix = page.get_pixmap(dpi=dpi, alpha=False)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
     except Exception as e:
         logging.error(f"PDF Error: {e}")
         return None
 
+def encode_for_llm(img, original_bytes=None):
+    """
+    JPEG sent to the model (and stored as the poster): downscaled to LLM_IMAGE_MAX_SIDE
+    at LLM_JPEG_QUALITY. An original JPEG that already fits is passed through untouched.
+    """
+    if original_bytes and img.format == "JPEG" and max(img.size) <= LLM_IMAGE_MAX_SIDE:
+        return original_bytes
+    out = img if img.mode == "RGB" else img.convert("RGB")
+    if max(out.size) > LLM_IMAGE_MAX_SIDE:
+        out = out.copy()
+        out.thumbnail((LLM_IMAGE_MAX_SIDE, LLM_IMAGE_MAX_SIDE), Image.LANCZOS)
+    buffer = io.BytesIO()
+    out.save(buffer, format="JPEG", quality=LLM_JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+def pdf_to_image_bytes(pdf_bytes):
+    img = rasterize_pdf(pdf_bytes)
+    return encode_for_llm(img) if img else None
+
+def _decode_first(img):
+    decoded = decode(img)
+    return decoded[0].data.decode('utf-8') if decoded else None
+
+def _finder_runs(line):
+    """Centres of 1:1:3:1:1 run patterns (QR finder patterns) in one binarized scanline, with their module size."""
+    runs = [(m.start(), m.end() - m.start()) for m in QR_RUN_RE.finditer(line)]
+    hits = []
+    for i in range(len(runs) - 4):
+        # Either polarity, so white-on-dark codes are found too
+        s0, s1, s2, s3, s4 = (run[1] for run in runs[i:i + 5])
+        module = (s0 + s1 + s2 + s3 + s4) / 7.0
+        if module < 1.0:
+            continue
+        tolerance = module * QR_FINDER_TOLERANCE
+        if (abs(s0 - module) <= tolerance and abs(s1 - module) <= tolerance
+                and abs(s2 - 3 * module) <= 3 * tolerance
+                and abs(s3 - module) <= tolerance and abs(s4 - module) <= tolerance):
+            hits.append((runs[i + 2][0] + s2 / 2.0, module))
+    return hits
+
+def _qr_candidate_regions(small_gray):
+    """
+    Boxes (in `small_gray` pixels) likely to hold a QR code.
+
+    The image is binarized once (PIL lookup table) and run lengths come from a regex over
+    each row's bytes, so the per-pixel work stays in C. Every second row is scanned for
+    finder patterns; each hit is confirmed by a vertical scan through its centre. Finder
+    centres seen on several rows are grouped with neighbours of similar module size, and
+    any group of 2+ finders (a QR code has 3) gives a box padded by a few modules.
+    """
+    width, height = small_gray.size
+    data = small_gray.point(QR_BINARIZE).tobytes()
+
+    centres = []  # [x, y, module, rows]
+    for y in range(0, height, 2):
+        for cx, module in _finder_runs(data[y * width:(y + 1) * width]):
+            # Vertical check through the centre, limited to a few finder heights around this row
+            top = max(int(y - 8 * module), 0)
+            bottom = min(int(y + 8 * module) + 1, height)
+            column = data[top * width + int(cx):bottom * width:width]
+            if not any(abs(top + cy - y) <= 1.5 * module and abs(v_module - module) <= 0.5 * module
+                       for cy, v_module in _finder_runs(column)):
+                continue
+            for c in centres:
+                if abs(c[0] - cx) <= 3 * module and abs(c[1] - y) <= 3 * module:
+                    c[3] += 1
+                    break
+            else:
+                centres.append([cx, y, module, 1])
+
+    finders = [c for c in centres if c[3] >= 2]
+    regions = []
+    for a in finders:
+        group = [b for b in finders
+                 if abs(b[2] - a[2]) <= 0.5 * a[2]
+                 and abs(b[0] - a[0]) <= 60 * a[2] and abs(b[1] - a[1]) <= 60 * a[2]]
+        if len(group) < 2:
+            continue
+        pad = 8 * max(b[2] for b in group)
+        box = (
+            max(int(min(b[0] for b in group) - pad), 0),
+            max(int(min(b[1] for b in group) - pad), 0),
+            min(int(max(b[0] for b in group) + pad), width),
+            min(int(max(b[1] for b in group) + pad), height),
+        )
+        if box not in regions:
+            regions.append(box)
+    return regions[:QR_MAX_CANDIDATES]
+
+def decode_qr_from_pil(img):
+    """
+    Multi-resolution QR decoder with early exit.
+
+    1. Probe a downscaled grayscale copy (one zbar pass).
+    2. Gate: look for QR finder patterns on the probe. Without any, stop; posters
+       without a QR code cost one small zbar pass plus the gate.
+    3. Inverted probe, then the candidate regions cropped from the full-resolution
+       grayscale (plain + inverted).
+    4. Full frame: grayscale, contrast-enhanced and inverted.
+
+    One grayscale buffer is made up front and reused by every variant (zbar works on
+    grayscale anyway).
+    """
+    gray = img.convert('L')
+
+    small = gray
+    if max(gray.size) > QR_PROBE_MAX_SIDE:
+        small = gray.copy()
+        small.thumbnail((QR_PROBE_MAX_SIDE, QR_PROBE_MAX_SIDE))
+
+    # 1. Downscaled probe
+    result = _decode_first(small)
+    if result: return result
+
+    # 2. Finder-pattern gate (either polarity)
+    regions = _qr_candidate_regions(small)
+    if not regions and not QR_ALWAYS_FULL_SCAN:
+        return None
+
+    # 3. Inverted probe and candidate crops at full resolution
+    result = _decode_first(ImageOps.invert(small))
+    if result: return result
+    scale_x, scale_y = gray.size[0] / small.size[0], gray.size[1] / small.size[1]
+    for x0, y0, x1, y1 in regions:
+        crop = gray.crop((int(x0 * scale_x), int(y0 * scale_y), int(x1 * scale_x), int(y1 * scale_y)))
+        result = _decode_first(crop) or _decode_first(ImageOps.invert(crop))
+        if result: return result
+
+    if gray is small:
+        # Already tried the whole image at full resolution; only contrast is left
+        return _decode_first(ImageEnhance.Contrast(gray).enhance(2.0))
+
+    # 4. Full frame
+    return (_decode_first(gray)
+            or _decode_first(ImageEnhance.Contrast(gray).enhance(2.0))
+            or _decode_first(ImageOps.invert(gray)))
+
 def decode_qr_from_image(image_bytes):
     """
     Enhanced QR Decoder: Converts to Grayscale & Enhances Contrast
     to fix issues with detection on colored posters.
     """
     try:
-        img = Image.open(io.BytesIO(image_bytes))
-        
-        # 1. Try Original
-        decoded = decode(img)
-        if decoded: return decoded[0].data.decode('utf-8')
-
-        # 2. Try Enhanced (Grayscale + Contrast)
-        gray_img = img.convert('L')
-        enhancer = ImageEnhance.Contrast(gray_img)
-        enhanced_img = enhancer.enhance(2.0)
-        
-        decoded = decode(enhanced_img)
-        if decoded: return decoded[0].data.decode('utf-8')
-        
-        # 3. Try Inverted (Negative) - NEW FIX
-        # Many artistic QR codes are white-on-dark.
-        inverted_img = ImageOps.invert(img.convert('RGB'))
-        decoded = decode(inverted_img)
-        if decoded: return decoded[0].data.decode('utf-8')
-        
+        return decode_qr_from_pil(Image.open(io.BytesIO(image_bytes)))
     except Exception as e:
         # Suppress zbar assertions/warnings
         pass
     return None
 
-def extract_event_details(image_bytes, qr_link_context):
+def extract_event_details(image_bytes, qr_link_context, subject=None):
     """
     Strict AI Extraction: explicitly asks to ignore non-events.
+    Results are cached by poster hash, so forwarded copies don't use quota again.
     """
+    cached = get_llm_cache().get(image_bytes, qr_link_context, PROMPT_VERSION, scope=subject_scope(subject))
+    metrics.incr("email_llm_cache", result="miss" if cached is None else "hit")
+    if cached is not None:
+        logging.info("    [..] Using cached extraction.")
+        return cached
+
     prompt = f"""
     Analyze this image carefully.
     
@@ -196,142 +808,505 @@ def extract_event_details(image_bytes, qr_link_context):
     }}
     """
     
-    sorted_models = sorted(MODELS_CONFIG.keys(), key=lambda k: MODELS_CONFIG[k]['priority'])
+    failed_models = set()
     
-    for model_name in sorted_models:
-        if not quota_manager.can_use_model(model_name): continue
+    while True:
+        # Earliest free slot across the models (priority breaks ties); counts towards RPM/RPD
+        model_name = get_quota_manager().wait_for_model(exclude=failed_models, stop=stop_event)
+        if model_name is None: break
 
         try:
-            rpm = MODELS_CONFIG[model_name]["rpm"]
-            sleep_time = (60 / rpm) + 2
-            logging.info(f"    [..] Using {model_name} (Waiting {sleep_time:.1f}s)...")
-            time.sleep(sleep_time)
-
-            response = client.models.generate_content(
-                model=model_name,
-                contents=[prompt, types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg")],
-                config=types.GenerateContentConfig(response_mime_type="application/json")
-            )
+            logging.info(f"    [..] Using {model_name}...")
+            metrics.gauge("email_quota_remaining", get_quota_manager().remaining(model_name), model=model_name)
+
+            with metrics.timer("email_llm_request", model=model_name):
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=[prompt, types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg")],
+                    config=types.GenerateContentConfig(response_mime_type="application/json")
+                )
             
-            quota_manager.increment_usage(model_name)
-            return json.loads(response.text)
+            details = json.loads(response.text)
+            get_llm_cache().put(image_bytes, qr_link_context, PROMPT_VERSION, details, scope=subject_scope(subject))
+            metrics.incr("email_llm_calls", model=model_name, result="ok")
+            return details
 
         except Exception as e:
+            metrics.incr("email_llm_calls", model=model_name, result="error")
             logging.warning(f"    [x] Failed {model_name}: {e}")
+            failed_models.add(model_name)
             continue
 
-    logging.error("    [X] All models failed.")
+    if not stop_event.is_set():
+        logging.error("    [X] All models failed.")
     return None
 
-# --- 5. MAIN LOGIC ---
+# --- 5. PIPELINE STAGES ---
 
-def process_emails():
-    processed_uids = load_processed_uids()
-    
-    # --- USER INPUT FOR DATE ---
+def load_poster(content_type, payload):
+    """Decodes an image attachment or renders a PDF one; None for anything else."""
     try:
-        months_input = input("How many months back should I search? (Default: 1): ")
-        months_back = int(months_input) if months_input.strip() else 1
-    except ValueError:
-        months_back = 1
-        
-    cutoff_date = date.today() - relativedelta(months=months_back)
+        if "image" in content_type:
+            img = Image.open(io.BytesIO(payload))
+            img.load()
+            return img
+        if "pdf" in content_type:
+            return rasterize_pdf(payload)
+    except Exception as e:
+        logging.error(f"Attachment Error: {e}")
+    return None
+
+def prepare_attachments(attachments):
+    """
+    CPU stage (runs in the process pool): turns (content_type, payload) pairs into
+    (image_bytes, qr_link, features) triples; features holds the pre-classifier image
+    statistics and OCR text. Attachments that are not posters give (None, None, None).
+    Returns (prepared, metrics delta of this worker) so the parent can merge the counters.
+
+    Each poster is decoded/rendered once; the same image feeds the QR decoder (full
+    resolution) and the downscaled JPEG for the model.
+    """
+    prepared = []
+    for content_type, payload in attachments:
+        with metrics.timer("email_poster_load"):
+            img = load_poster(content_type, payload)
+        if img is None:
+            prepared.append((None, None, None))
+            continue
+
+        metrics.incr("email_qr_attempts")
+        try:
+            with metrics.timer("email_qr_decode"):
+                qr_link = decode_qr_from_pil(img)
+        except Exception:
+            # Suppress zbar assertions/warnings
+            qr_link = None
+        if qr_link:
+            metrics.incr("email_qr_hits")
+        features = None
+        if PRECLASSIFY_MODE != "off":
+            features = {"stats": image_stats(img), "text": ocr_text(img) if PRECLASSIFY_OCR else ""}
+        original = payload if "image" in content_type else None
+        prepared.append((encode_for_llm(img, original), qr_link, features))
+        img.close()
+    return prepared, metrics.drain()
+
+def analyze_email(email_info, filenames, prepared):
+    """
+    LLM stage (runs in the LLM thread pool): finds the first event poster of one email.
+    Returns (details, image_bytes) for the poster stage, or None when there is nothing to save.
+    """
+    uid = email_info["uid"]
+    poster_found = False
+    sent_to_llm = False
+
+    for filename, (image_bytes, qr_link, features) in zip(filenames, prepared):
+        if not image_bytes:
+            continue
+
+        poster_found = True
+        logging.info(f"  > Analyzing Visual: {filename} (UID {uid})")
+        if qr_link: logging.info(f"  > QR Detected: {qr_link}")
+
+        # A. Cheap local check before spending model quota
+        features = features or {}
+        if not preclassifier.classify(uid, email_info["subject"], email_info.get("body", ""),
+                                      features.get("stats"), features.get("text", ""), qr_link):
+            logging.info("  > [Pre-classifier] Likely not a student event. Skipping LLM.")
+            metrics.incr("email_llm_calls_avoided")
+            continue
+
+        # B. AI Analysis
+        sent_to_llm = True
+        details = extract_event_details(image_bytes, qr_link, email_info["subject"])
+
+        if details:
+            # C. CHECK IF IT IS ACTUALLY AN EVENT
+            if details.get("is_event") is False:
+                logging.info("  > [AI Decision] Not a student event. Discarding.")
+                break # Skip this attachment/email
+
+            # D. It IS an event: the poster stage stores the image, then save_event writes it
+            # Clean up the JSON (remove the flag)
+            del details["is_event"]
+            return details, image_bytes
+
+    # No poster, or every poster dropped by the pre-classifier: nothing to retry next run
+    if not poster_found or not sent_to_llm:
+        save_processed_uid(uid)
+    return None
+
+def store_poster(image_bytes):
+    """
+    Poster stage (runs in the poster process pool): stores the poster and its resized
+    variants. Returns (manifest, newly stored?, metrics delta of this worker).
+    """
+    store = get_poster_store()
+    stored_before = store.stats["stored"]
+    with metrics.timer("email_poster_store"):
+        manifest = store.save(image_bytes)
+    return manifest, store.stats["stored"] > stored_before, metrics.drain()
+
+def save_event(email_info, details, poster):
+    """Adds the stored poster to the extracted details and writes the event."""
+    uid = email_info["uid"]
+    details['image_url'] = poster["original"]
+    details['image_hash'] = poster["hash"]
+    details['image_variants'] = poster["srcset"]
+    details['image_placeholder'] = poster["placeholder"]
+    details['email_uid'] = uid
+    details['email_subject'] = email_info["subject"]
+    details['email_date'] = email_info["date"]
+
+    append_event_to_json(details)
+    metrics.incr("email_events_saved")
+    logging.info(f"  > SAVED EVENT (UID {uid})")
+
+    save_processed_uid(uid)
+
+class EmailPipeline:
+    """
+    Fetch -> CPU -> LLM -> poster pipeline.
+
+    The caller (fetch stage) submits one email at a time; its attachments are prepared in
+    a process pool and the result is handed to the LLM thread pool. Confirmed events go
+    to a second process pool that encodes the poster variants, so LLM workers only ever
+    wait on the model. At most `max_in_flight` emails are between the stages, so
+    `submit` blocks when the downstream stages fall behind instead of buffering the
+    whole mailbox in memory.
+    """
+
+    def __init__(self, cpu_workers=CPU_WORKERS, llm_workers=LLM_WORKERS, max_in_flight=MAX_IN_FLIGHT,
+                 poster_workers=POSTER_WORKERS):
+        # Workers start with empty metrics and return their deltas with each result
+        worker_args = {"mp_context": multiprocessing.get_context(POOL_START_METHOD),
+                       "initializer": pipeline_metrics.init_worker,
+                       "initargs": (pipeline_metrics.profiling_stage,)}
+        self.cpu_pool = ProcessPoolExecutor(max_workers=max(cpu_workers, 1), **worker_args)
+        self.llm_pool = ThreadPoolExecutor(max_workers=max(llm_workers, 1))
+        self.poster_pool = ProcessPoolExecutor(max_workers=max(poster_workers, 1), **worker_args)
+        self.slots = threading.BoundedSemaphore(max(max_in_flight, 1))
+
+    def submit(self, email_info, attachments):
+        """Hands one email to the CPU stage; returns False (nothing submitted) once stopping."""
+        while not self.slots.acquire(timeout=1):
+            if stop_event.is_set():
+                return False
+        if stop_event.is_set():
+            self.slots.release()
+            return False
+        filenames = [filename for filename, _, _ in attachments]
+        payloads = [(content_type, payload) for _, content_type, payload in attachments]
+        try:
+            cpu_future = self.cpu_pool.submit(prepare_attachments, payloads)
+        except Exception:
+            self.slots.release()
+            raise
+        cpu_future.add_done_callback(lambda f: self._to_llm_stage(email_info, filenames, f))
+        return True
+
+    def _to_llm_stage(self, email_info, filenames, cpu_future):
+        if cpu_future.cancelled() or stop_event.is_set():
+            self.slots.release()
+            return
+        try:
+            prepared, worker_metrics = cpu_future.result()
+            metrics.merge(worker_metrics)
+        except Exception as e:
+            logging.error(f"  [x] Attachment processing failed for UID {email_info['uid']}: {e}")
+            self.slots.release()
+            return
+        try:
+            llm_future = self.llm_pool.submit(self._run_llm_stage, email_info, filenames, prepared)
+        except RuntimeError:
+            # Pool already shut down by a stop
+            self.slots.release()
+            return
+        # The slot is released by the last stage the email reaches (or here, if cancelled)
+        llm_future.add_done_callback(lambda f: f.cancelled() and self.slots.release())
+
+    def _run_llm_stage(self, email_info, filenames, prepared):
+        event = None
+        try:
+            event = analyze_email(email_info, filenames, prepared)
+        except Exception as e:
+            logging.error(f"  [x] Extraction failed for UID {email_info['uid']}: {e}")
+        if event is None or not self._to_poster_stage(email_info, *event):
+            self.slots.release()
+
+    def _to_poster_stage(self, email_info, details, image_bytes):
+        try:
+            poster_future = self.poster_pool.submit(store_poster, image_bytes)
+        except RuntimeError:
+            # Pool already shut down by a stop
+            return False
+        poster_future.add_done_callback(lambda f: self._save_event(email_info, details, f))
+        return True
+
+    def _save_event(self, email_info, details, poster_future):
+        try:
+            if poster_future.cancelled():
+                return
+            manifest, stored, worker_metrics = poster_future.result()
+            metrics.merge(worker_metrics)
+            get_poster_store().record(stored)
+            save_event(email_info, details, manifest)
+        except Exception as e:
+            logging.error(f"  [x] Saving the poster failed for UID {email_info['uid']}: {e}")
+        finally:
+            self.slots.release()
+
+    def close(self, cancel=False):
+        """
+        Waits for every submitted email to finish, then shuts the pools down. With
+        `cancel` (after a signal) queued work is dropped and nothing is waited for; its
+        UIDs are not marked processed, so the next run picks them up again.
+        """
+        self.cpu_pool.shutdown(wait=not cancel, cancel_futures=cancel)
+        self.llm_pool.shutdown(wait=not cancel, cancel_futures=cancel)
+        self.poster_pool.shutdown(wait=not cancel, cancel_futures=cancel)
+
+# --- 6. IMAP FETCH ---
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _is_ignored_subject(subject):
+    subject_lower = (subject or "").lower()
+    return any(bad_word.lower() in subject_lower for bad_word in IGNORE_KEYWORDS)
+
+def _fetch_responses(data):
+    """
+    Groups imaplib FETCH data by message sequence number: {seq: (lines, structure)}.
+    A response may arrive as several items (a tuple per literal, then the rest of the
+    line), and servers order the items freely, so nothing is keyed on where UID appears.
+    `lines` is the protocol text outside literals; `structure` is the whole response
+    with each literal re-quoted, so literals match POSTER_MIME_MARKERS like strings do.
+    """
+    responses = {}
+    current = None
+    for item in data:
+        line, literal = item if isinstance(item, tuple) else (item, None)
+        if not isinstance(line, bytes):
+            continue
+        match = FETCH_START_RE.match(line)
+        if match:
+            current = responses.setdefault(match.group(1).decode(), ([], []))
+        if current is None:
+            continue
+        current[0].append(line)
+        current[1].append(line)
+        if isinstance(literal, bytes):
+            current[1].append(b'"' + literal + b'"')
+    return {seq: (b"".join(lines), b"".join(parts)) for seq, (lines, parts) in responses.items()}
+
+def _poster_uids(mailbox, uids):
+    """
+    UIDs (of `uids`) whose BODYSTRUCTURE lists an image or PDF part. Only the MIME
+    structure is fetched, never the attachment bytes. Whenever the answer is unclear
+    (an error, or no response for a UID) the UID is kept for the full fetch.
+    """
+    try:
+        typ, data = mailbox.client.uid('FETCH', ','.join(uids), '(UID BODYSTRUCTURE)')
+    except Exception as e:
+        logging.warning(f"  [!] BODYSTRUCTURE prefilter failed ({e}); fetching the batch in full")
+        return set(uids)
+    if typ != 'OK':
+        # Can't tell; let every message through to the full fetch
+        return set(uids)
+
+    structures = {}
+    for lines, structure in _fetch_responses(data).values():
+        # UID outside quoted strings (a filename can contain "UID 5")
+        match = UID_RE.search(QUOTED_RE.sub(b'""', lines))
+        if match:
+            structures[match.group(1).decode()] = structure.lower()
+
+    return {uid for uid in uids
+            if uid not in structures
+            or any(marker in structures[uid] for marker in POSTER_MIME_MARKERS)}
+
+def fetch_candidate_messages(mailbox, new_uids):
+    """
+    Two-phase fetch. Yields full messages only for UIDs that survive a cheap prefilter:
+    1. headers only (bulk, without marking as seen) -> IGNORE_KEYWORDS subject filter
+    2. BODYSTRUCTURE -> must carry an image or PDF attachment
+    3. full bodies for the survivors, FETCH_BATCH_SIZE messages per round trip
+    Filtered-out UIDs are marked as processed here.
+    """
+    # Newest first, like the old reverse=True fetch
+    uids = sorted(new_uids, key=int, reverse=True)
+    for batch in _chunks(uids, FETCH_BATCH_SIZE):
+        if stop_event.is_set():
+            return
+        survivors = []
+        for msg in mailbox.fetch(A(uid=batch), headers_only=True, mark_seen=False, bulk=True):
+            # --- STEP 1: SUBJECT FILTERING (Python Side) ---
+            if _is_ignored_subject(msg.subject):
+                logging.info(f"  [SKIP] Ignored Circular/Exam: {msg.subject[:40]}...")
+                save_processed_uid(msg.uid)
+                continue
+            survivors.append(msg.uid)
+
+        if not survivors:
+            continue
+
+        with_posters = _poster_uids(mailbox, survivors)
+        for uid in survivors:
+            if uid not in with_posters:
+                logging.info(f"  [SKIP] No image/PDF attachment (UID {uid})")
+                save_processed_uid(uid)
+        survivors = [uid for uid in survivors if uid in with_posters]
+
+        if survivors:
+            yield from mailbox.fetch(A(uid=survivors), reverse=True, bulk=True)
+
+# --- 7. MAIN LOGIC ---
+
+def date_shards(since, until, shards):
+    """
+    Splits the day range [since, until] into at most `shards` contiguous, non-overlapping
+    (since, before) windows. IMAP date search is day-granular, so no message can land
+    in two shards.
+    """
+    days = (until - since).days + 1
+    shards = max(1, min(shards, days))
+    step, extra = divmod(days, shards)
+    windows = []
+    start = since
+    for i in range(shards):
+        end = start + timedelta(days=step + (1 if i < extra else 0))
+        windows.append((start, end))
+        start = end
+    # Newest window first, like the single-connection scan
+    return windows[::-1]
+
+def scan_shard(pipeline, since, before):
+    """Scans one date window over its own IMAP connection. Returns the number of emails submitted."""
+    label = f"{since}..{before - timedelta(days=1)}"
+    with MailBox(IMAP_HOST).login(EMAIL_USER, EMAIL_PASS) as mailbox:
+        criteria = AND(
+            OR(subject=SEARCH_KEYWORDS, text=SEARCH_KEYWORDS),
+            date_gte=since,
+            date_lt=before
+        )
+
+        # OPTIMIZATION: Fetch UIDs first, filter locally, then fetch content
+        search_uids = mailbox.uids(criteria)
+        new_uids = [u for u in search_uids if u not in get_processed_log()]
+        logging.info(f"[{label}] Found {len(search_uids)} emails. New: {len(new_uids)} (Skipped: {len(search_uids) - len(new_uids)})")
+
+        email_count = 0
+        # Fetch stage: stream prefiltered messages and hand them to the CPU/LLM stages
+        for msg in fetch_candidate_messages(mailbox, new_uids):
+            if stop_event.is_set():
+                logging.info(f"[{label}] Stopping.")
+                break
+            email_count += 1
+            metrics.incr("email_messages_fetched")
+
+            logging.info(f"[{label}] Processing ({msg.date.date()}): {msg.subject[:40]}...")
+            email_info = {"uid": msg.uid, "subject": msg.subject, "date": str(msg.date),
+                          "body": (msg.text or msg.html or "")[:EMAIL_BODY_CHARS]}
+            attachments = [(att.filename, att.content_type, att.payload) for att in msg.attachments]
+            if not pipeline.submit(email_info, attachments):
+                break
+        return email_count
+
+def process_emails(since=None, until=None, shards=SCAN_SHARDS):
+    """
+    Scans the inbox for event emails dated `since`..`until` (inclusive, defaults: one
+    month back..today) and saves the extracted events.
+
+    The window is split into `shards` date ranges scanned concurrently, each over its own
+    IMAP connection. All shards feed one pipeline and share the processed-UID log, the
+    quota manager and the event writer, which are all lock-protected.
+    """
+    until = until or date.today()
+    since = since or (until - relativedelta(months=1))
+    if since > until:
+        raise ValueError(f"since ({since}) is after until ({until})")
+
+    # Don't lose buffered events on Ctrl+C / kill (handlers can only be set from the main thread)
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, _flush_on_signal)
+        signal.signal(signal.SIGTERM, _flush_on_signal)
+
+    windows = date_shards(since, until, shards)
     logging.info(f"--- STARTING SCAN ---")
-    logging.info(f"Scanning from: {cutoff_date} to Today")
+    logging.info(f"Scanning from: {since} to {until} ({len(windows)} shard(s))")
     logging.info(f"Connecting to {EMAIL_USER}...")
-    
+
+    stop_event.clear()
+    email_count = 0
+    pipeline = EmailPipeline()
+    shard_pool = ThreadPoolExecutor(max_workers=len(windows))
     try:
-        with MailBox('imap.gmail.com').login(EMAIL_USER, EMAIL_PASS) as mailbox:
-            
-            criteria = AND(
-                OR(subject=SEARCH_KEYWORDS, text=SEARCH_KEYWORDS),
-                date_gte=cutoff_date
-            )
-            logging.info(f"Criteria built. Fetching UIDs (Date >= {cutoff_date})...")
-            
-            # OPTIMIZATION: Fetch UIDs first, filter locally, then fetch content
-            search_uids = mailbox.uids(criteria)
-            new_uids = [u for u in search_uids if u not in processed_uids]
-            
-            logging.info(f"Found {len(search_uids)} emails. New: {len(new_uids)} (Skipped: {len(search_uids) - len(new_uids)})")
-            
-            email_count = 0
-            if new_uids:
-                # Fetch only the new UIDs
-                # Note: imap_tools fetch(uids=...) expects a list of UIDs
-                for msg in mailbox.fetch(A(uid=new_uids), reverse=True):
-                    email_count += 1
-                    
-                    # No need to check processed_uids again, but safe to keep logic consistent if needed
-                    # logging.info(f"Processing ({msg.date.date()}): {msg.subject[:40]}...")
-                    # ... processing logic continues below ...
-                    
-                    # --- STEP 1: SUBJECT FILTERING (Python Side) ---
-                    subject_lower = msg.subject.lower()
-                    if any(bad_word.lower() in subject_lower for bad_word in IGNORE_KEYWORDS):
-                        logging.info(f"  [SKIP] Ignored Circular/Exam: {msg.subject[:40]}...")
-                        save_processed_uid(msg.uid)
-                        continue
-
-                    logging.info(f"Processing ({msg.date.date()}): {msg.subject[:40]}...")
-                    poster_found = False
-                    
-                    for att in msg.attachments:
-                        image_bytes = None
-                        
-                        if "image" in att.content_type:
-                            image_bytes = att.payload
-                        elif "pdf" in att.content_type:
-                            image_bytes = pdf_to_image_bytes(att.payload)
-                        
-                        if image_bytes:
-                            poster_found = True
-                            logging.info(f"  > Analyzing Visual: {att.filename}")
-                            
-                            # A. Decode QR (Enhanced)
-                            qr_link = decode_qr_from_image(image_bytes)
-                            if qr_link: logging.info(f"  > QR Detected: {qr_link}")
-                            
-                            # B. AI Analysis
-                            details = extract_event_details(image_bytes, qr_link)
-                            
-                            if details:
-                                # C. CHECK IF IT IS ACTUALLY AN EVENT
-                                if details.get("is_event") is False:
-                                    logging.info("  > [AI Decision] Not a student event. Discarding.")
-                                    break # Skip this attachment/email
-
-                                # D. Save if it IS an event
-                                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                                filename = f"{timestamp}_{msg.uid}.jpg"
-                                local_path = os.path.join(DOWNLOAD_FOLDER, filename)
-                                
-                                with open(local_path, "wb") as f:
-                                    f.write(image_bytes)
-                                
-                                # Clean up the JSON (remove the flag)
-                                del details["is_event"]
-                                
-                                details['image_url'] = f"./{DOWNLOAD_FOLDER}/{filename}"
-                                details['email_subject'] = msg.subject
-                                details['email_date'] = str(msg.date)
-                                
-                                append_event_to_json(details)
-                                logging.info(f"  > SAVED EVENT to {EVENTS_JSON_FILE}")
-                                
-                                save_processed_uid(msg.uid)
-                                break 
-                    
-                    if not poster_found:
-                        save_processed_uid(msg.uid)
-
-            if email_count == 0:
-                logging.warning("No emails found matching criteria in INBOX.")
-            else:
-                logging.info(f"Finished. Total emails scanned: {email_count}")
+        futures = {shard_pool.submit(scan_shard, pipeline, start, before): (start, before)
+                   for start, before in windows}
+        for future, (start, before) in futures.items():
+            try:
+                email_count += future.result()
+            except Exception as e:
+                logging.error(f"Critical Error in shard {start}..{before - timedelta(days=1)}: {e}")
+        shard_pool.shutdown(wait=True)
 
-    except Exception as e:
-        logging.error(f"Critical Error: {e}")
+        if email_count == 0:
+            logging.warning("No emails with posters found matching criteria in INBOX.")
+        else:
+            logging.info(f"Fetched {email_count} emails. Waiting for analysis to finish...")
+        pipeline.close()
+    except BaseException:
+        # SIGINT/SIGTERM (or a crash): don't wait for the remaining shards or queued LLM work
+        stop_event.set()
+        shard_pool.shutdown(wait=False, cancel_futures=True)
+        pipeline.close(cancel=True)
+        raise
+    finally:
+        flush_shared_state()
+
+    logging.info(get_llm_cache().summary())
+    logging.info(preclassifier.summary())
+    logging.info(get_poster_store().summary())
+    logging.info("Finished.")
+    return email_count
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got {value!r}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract events from poster emails in the inbox.")
+    parser.add_argument("--since", type=_parse_date, help="first day to scan (YYYY-MM-DD)")
+    parser.add_argument("--until", type=_parse_date, help="last day to scan (YYYY-MM-DD, default: today)")
+    parser.add_argument("--months", type=int, help="scan this many months back from --until (ignored with --since)")
+    parser.add_argument("--shards", type=int, default=SCAN_SHARDS,
+                        help=f"date shards / parallel IMAP connections (default: {SCAN_SHARDS})")
+    parser.add_argument("--profile", action="store_true", help="dump cProfile stats to profiles/")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("METRICS_PORT", "0")),
+                        help="serve Prometheus metrics on this local port while running")
+    args = parser.parse_args(argv)
+
+    until = args.until or date.today()
+    since = args.since
+    if since is None:
+        months_back = args.months
+        if months_back is None and sys.stdin.isatty():
+            # --- USER INPUT FOR DATE --- (only when run by hand without a window)
+            try:
+                months_input = input("How many months back should I search? (Default: 1): ")
+                months_back = int(months_input) if months_input.strip() else 1
+            except ValueError:
+                months_back = 1
+        since = until - relativedelta(months=months_back or 1)
+
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+    with pipeline_metrics.stage("Email", profile=args.profile):
+        process_emails(since=since, until=until, shards=args.shards)
 
 if __name__ == "__main__":
-    process_emails()
\ No newline at end of file
+    main()
@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+
+# Use absolute paths relative to this script
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_PATH = os.path.join(SCRIPT_DIR, 'knowafest_events.jsonl')
+LEGACY_JSON_PATH = os.path.join(SCRIPT_DIR, 'knowafest_complete_data.json')
+
+
+class EventStore:
+    """
+    Append-only JSON Lines store for scraped events.
+
+    - `<name>.jsonl` holds one event per line and is only ever appended to.
+    - `<name>.idx` is a sidecar index with one `end_offset<TAB>event_url` line per record,
+      so dedupe lookups never have to read the event history.
+
+    If a run crashes between the data append and the index append, the missing index
+    entries are recovered from the tail of the data file (past the last indexed offset).
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, legacy_path=LEGACY_JSON_PATH):
+        self.path = path
+        self.index_path = os.path.splitext(path)[0] + '.idx'
+        self.legacy_path = legacy_path
+        self.lock = threading.Lock()
+        self._migrate_legacy()
+        self._repair_tail()
+
+    # --- Setup ---
+
+    def _migrate_legacy(self):
+        """One-time conversion of the old single-array JSON file into the JSONL store."""
+        if os.path.exists(self.path) or not (self.legacy_path and os.path.exists(self.legacy_path)):
+            return
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                legacy_events = json.load(f)
+        except Exception as e:
+            print(f"Error loading legacy data: {e}")
+            return
+        self.append_many(legacy_events)
+        print(f"Migrated {len(legacy_events)} events from {os.path.basename(self.legacy_path)}.")
+
+    def _repair_tail(self):
+        """Drops a torn (newline-less) last record left behind by an interrupted append."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            # Walk back to the last complete line
+            pos = size - 1
+            while pos > 0:
+                step = min(4096, pos)
+                f.seek(pos - step)
+                chunk = f.read(step)
+                nl = chunk.rfind(b'\n')
+                if nl != -1:
+                    pos = pos - step + nl + 1
+                    break
+                pos -= step
+            f.truncate(pos)
+        print(f"Repaired torn record at end of {os.path.basename(self.path)}.")
+
+    # --- Index ---
+
+    def _read_index(self):
+        urls = set()
+        last_offset = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    offset, _, url = line.rstrip('\n').partition('\t')
+                    if not offset.isdigit():
+                        continue
+                    last_offset = int(offset)
+                    if url:
+                        urls.add(url)
+        return urls, last_offset
+
+    def _append_index(self, entries):
+        if not entries:
+            return
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(''.join(f"{offset}\t{url or ''}\n" for offset, url in entries))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _scan(self, start_offset):
+        """Yields (end_offset, event) for every record at or after `start_offset`."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(start_offset)
+            offset = start_offset
+            for raw in f:
+                offset += len(raw)
+                try:
+                    yield offset, json.loads(raw)
+                except ValueError:
+                    continue
+
+    def load_urls(self):
+        """Returns the set of stored event URLs using only the sidecar index."""
+        with self.lock:
+            urls, last_offset = self._read_index()
+            data_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+            if data_size < last_offset:
+                # Index is ahead of the data (data file replaced/truncated): rebuild it
+                if os.path.exists(self.index_path):
+                    os.remove(self.index_path)
+                urls, last_offset = set(), 0
+
+            if data_size > last_offset:
+                recovered = [(offset, e.get('event_url')) for offset, e in self._scan(last_offset)]
+                self._append_index(recovered)
+                urls.update(url for _, url in recovered if url)
+            return urls
+
+    # --- Data ---
+
+    def append_many(self, events):
+        """Atomically appends a batch of events: one write() on an O_APPEND handle, then fsync."""
+        if not events:
+            return
+        lines = [json.dumps(e, ensure_ascii=False).encode('utf-8') + b'\n' for e in events]
+        with self.lock:
+            with open(self.path, 'ab') as f:
+                start = f.tell()
+                f.write(b''.join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+
+            entries = []
+            offset = start
+            for event, line in zip(events, lines):
+                offset += len(line)
+                entries.append((offset, event.get('event_url')))
+            self._append_index(entries)
+
+    def append(self, event):
+        self.append_many([event])
+
+    def iter_events(self):
+        """Streams stored events one at a time without loading the whole history."""
+        for _, event in self._scan(0):
+            yield event
+
+    def count(self):
+        with self.lock:
+            if not os.path.exists(self.index_path):
+                return sum(1 for _ in self._scan(0))
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return sum(1 for _ in f)
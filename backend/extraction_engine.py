@@ -0,0 +1,95 @@
+import re
+
+# --- Precompiled Patterns ---
+
+# Fee heuristics, tried in priority order (first hit wins)
+FEE_CURRENCY_RE = re.compile(r'(?:Rs\.?|INR|₹|\$)\s*([\d,]+)', re.IGNORECASE)  # Rs. 500, INR 500, ₹2,500, $100
+FEE_SUFFIX_RE = re.compile(r'(\d+)/-')  # 500/-
+FEE_NUMBER_RE = re.compile(r'\b(\d{2,4})\b')  # "150 for online", "Fee 200"
+FEE_FREE_RE = re.compile(r'free|no registration fee', re.IGNORECASE)
+
+# Time ranges like "9.30 AM to 4.30 PM"
+TIME_RANGE_RE = re.compile(
+    r'(\d{1,2}(?::|\.)\d{2}\s*(?:AM|PM))\s*(?:to|-)\s*(\d{1,2}(?::|\.)\d{2}\s*(?:AM|PM))',
+    re.IGNORECASE,
+)
+
+# Google Maps links embedded in the venue text (incl. goo.gl/maps)
+MAP_LINK_RE = re.compile(r'(https?://(?:maps\.app\.goo\.gl|www\.google\.com/maps|goo\.gl/maps)\S+)')
+MAP_PREFIX_RE = re.compile(r'Google Map link:?', re.IGNORECASE)
+WHITESPACE_RE = re.compile(r'\s+')
+
+DEFAULT_START_TIME = "09:00"
+DEFAULT_END_TIME = "17:00"
+
+# Keys of an `extract_fields` result
+FIELDS = ("feeShort", "startTime", "endTime", "venueMapUrl", "venueAddress")
+
+
+# --- Field Extractors ---
+
+def extract_fee(fee_text):
+    """Short fee label ("₹500", "Free", "Paid", "Check Link") from the raw fees text."""
+    if not fee_text or fee_text.strip() == "N/A" or fee_text.strip() == "":
+        return "Check Link"
+
+    match = FEE_CURRENCY_RE.search(fee_text)
+    if match:
+        return f"₹{match.group(1)}"
+
+    match = FEE_SUFFIX_RE.search(fee_text)
+    if match:
+        return f"₹{match.group(1)}"
+
+    match = FEE_NUMBER_RE.search(fee_text)
+    if match:
+        # Simple heuristic: avoid years like 2026
+        amt = int(match.group(1))
+        if amt < 2025:
+            return f"₹{amt}"
+
+    if FEE_FREE_RE.search(fee_text):
+        return "Free"
+
+    return "Paid"  # Fallback
+
+
+def extract_timing(text):
+    """(start, end) times found in `text`, or the 09:00-17:00 defaults."""
+    match = TIME_RANGE_RE.search(text)
+    if match:
+        return match.group(1).replace(".", ":"), match.group(2).replace(".", ":")
+    return DEFAULT_START_TIME, DEFAULT_END_TIME
+
+
+def extract_map_link(google_map_link, venue_address):
+    """
+    Returns (map_link, cleaned_venue_address). Falls back to a Maps link embedded in the
+    venue text when the scraper found none, removing it from the address.
+    """
+    if not google_map_link or google_map_link == "N/A":
+        match = MAP_LINK_RE.search(venue_address)
+        if match:
+            google_map_link = match.group(1)
+            venue_address = venue_address.replace(google_map_link, "")
+            venue_address = MAP_PREFIX_RE.sub('', venue_address).strip()
+        else:
+            google_map_link = ""
+
+    # Clean up any leftover messy characters or newlines in venue
+    venue_address = WHITESPACE_RE.sub(' ', venue_address).strip()
+    return google_map_link, venue_address
+
+
+def extract_fields(fee_text, timing_text, google_map_link, venue_address):
+    """Runs every extractor for one record and returns a dict keyed by `FIELDS`."""
+    start_time, end_time = extract_timing(timing_text)
+    map_link, venue = extract_map_link(google_map_link, venue_address)
+    return {
+        "feeShort": extract_fee(fee_text),
+        "startTime": start_time,
+        "endTime": end_time,
+        "venueMapUrl": map_link,
+        "venueAddress": venue,
+    }
+
@@ -0,0 +1,202 @@
+# Declared MongoDB indexes, applied once at startup (see `bootstrap_indexes`).
+# Each index matches the filter + sort of a route query: equality fields first, then sort keys,
+# then `_id` (the keyset-pagination tiebreaker appended by pagination.keyset_sort).
+
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.database import Database
+
+try:
+    from .db import get_db, get_users_collection
+except ImportError:  # pragma: no cover
+    from db import get_db, get_users_collection
+
+logger = logging.getLogger(__name__)
+
+USERS = "<users>"  # placeholder for the (configurable) users collection name
+
+# collection -> [(keys, options)]
+INDEXES: Dict[str, List[Tuple[list, dict]]] = {
+    "events": [
+        # student /events: status=Published, sorted by date, time_from
+        ([("status", ASCENDING), ("date", ASCENDING),
+          ("time_from", ASCENDING), ("_id", ASCENDING)], {}),
+    ],
+    "notifications": [
+        # student /notifications: student_id in [all, id], newest first
+        ([("student_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        # dedupe lookup in notifications.insert_notification
+        ([("student_id", ASCENDING), ("type", ASCENDING), ("reference_id", ASCENDING)], {}),
+    ],
+    "certificates": [
+        ([("student_id", ASCENDING), ("status", ASCENDING),
+          ("issued_at", DESCENDING), ("_id", DESCENDING)], {}),
+    ],
+    "vacancies": [
+        # student: status=Published [+ club_name]; admin: any of club_name/status; newest first
+        ([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("status", ASCENDING), ("club_name", ASCENDING),
+          ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("club_name", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+    ],
+    "attendances": [
+        ([("event_id", ASCENDING), ("marked_at", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("attendance_id", ASCENDING)], {}),
+    ],
+    "od_requests": [
+        ([("od_request_id", ASCENDING)], {"unique": True}),
+    ],
+    "hostel_permissions": [
+        # student list: student_id, sorted by created_at, requested_at
+        ([("student_id", ASCENDING), ("created_at", DESCENDING),
+          ("requested_at", DESCENDING), ("_id", DESCENDING)], {}),
+        # FA list: optional status/section filters, sorted by requested_at, responded_at
+        ([("status", ASCENDING), ("requested_at", DESCENDING),
+          ("responded_at", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("section", ASCENDING), ("requested_at", DESCENDING),
+          ("responded_at", DESCENDING), ("_id", DESCENDING)], {}),
+        ([("requested_at", DESCENDING), ("responded_at", DESCENDING), ("_id", DESCENDING)], {}),
+    ],
+    USERS: [
+        # auth login: role + (user_id | email)
+        ([("user_id", ASCENDING), ("role", ASCENDING)], {}),
+        ([("email", ASCENDING), ("role", ASCENDING)], {}),
+    ],
+    "club_admins": [
+        ([("admin_id", ASCENDING)], {"unique": True}),
+    ],
+}
+
+# Query shapes checked by `check_query_plans`: (collection, filter, sort)
+QUERY_SHAPES: List[Tuple[str, dict, Optional[list]]] = [
+    ("events", {"status": "Published"}, [("date", 1), ("time_from", 1), ("_id", 1)]),
+    ("notifications", {"student_id": {"$in": ["all", "x"]}}, [("created_at", -1), ("_id", -1)]),
+    ("notifications", {"student_id": "x", "type": "event", "reference_id": "x"}, None),
+    ("certificates", {"student_id": "x", "status": "Issued"}, [("issued_at", -1), ("_id", -1)]),
+    ("vacancies", {"status": "Published"}, [("created_at", -1), ("_id", -1)]),
+    ("vacancies", {"status": "Published", "club_name": "x"}, [("created_at", -1), ("_id", -1)]),
+    ("vacancies", {"club_name": "x"}, [("created_at", -1), ("_id", -1)]),
+    ("vacancies", {}, [("created_at", -1), ("_id", -1)]),
+    ("attendances", {"event_id": "x"}, [("marked_at", -1), ("_id", -1)]),
+    ("attendances", {"attendance_id": "x"}, None),
+    ("od_requests", {"od_request_id": "x"}, None),
+    ("hostel_permissions", {"student_id": "x"}, [("created_at", -1), ("requested_at", -1), ("_id", -1)]),
+    ("hostel_permissions", {"status": "Pending"}, [("requested_at", -1), ("responded_at", -1), ("_id", -1)]),
+    ("hostel_permissions", {"section": "x"}, [("requested_at", -1), ("responded_at", -1), ("_id", -1)]),
+    ("hostel_permissions", {}, [("requested_at", -1), ("responded_at", -1), ("_id", -1)]),
+    (USERS, {"role": "student", "$or": [{"user_id": "x"}, {"email": "x"}]}, None),
+    ("club_admins", {"admin_id": "x"}, None),
+]
+
+
+def _collection_name(name: str) -> str:
+    return get_users_collection().name if name == USERS else name
+
+
+def _key_tuple(keys) -> tuple:
+    """Comparable form of an index key spec. index_information() reports 1/-1 as floats;
+    special index types ("text", "2dsphere", "hashed", ...) are kept as strings."""
+    return tuple(
+        (field, int(direction) if isinstance(direction, (int, float)) else direction)
+        for field, direction in keys
+    )
+
+
+def ensure_indexes(db: Optional[Database] = None) -> dict:
+    """Creates missing declared indexes and reports drift.
+
+    Returns {"created": [...], "extra": [...], "conflicts": [...]} with
+    "collection: keys" strings. Extra (undeclared) indexes are reported, never dropped;
+    a declared index whose options differ from the existing one is a conflict.
+    """
+    db = db if db is not None else get_db()
+    report: dict = {"created": [], "extra": [], "conflicts": []}
+
+    for declared_name, specs in INDEXES.items():
+        name = _collection_name(declared_name)
+        collection = db[name]
+        existing = {
+            _key_tuple(info["key"]): info
+            for index_name, info in collection.index_information().items()
+            if index_name != "_id_"
+        }
+        declared = {_key_tuple(keys): options for keys, options in specs}
+
+        missing = []
+        for keys, options in specs:
+            info = existing.get(_key_tuple(keys))
+            if info is None:
+                missing.append(IndexModel(keys, **options))
+            elif bool(info.get("unique")) != bool(options.get("unique")):
+                report["conflicts"].append(f"{name}: {keys} unique={info.get('unique', False)}")
+
+        if missing:
+            try:
+                collection.create_indexes(missing)
+                report["created"].extend(f"{name}: {m.document['key']}" for m in missing)
+            except Exception as exc:
+                report["conflicts"].append(f"{name}: create failed ({exc})")
+
+        report["extra"].extend(f"{name}: {list(keys)}" for keys in existing if keys not in declared)
+
+    for entry in report["created"]:
+        logger.info(f"Created index {entry}")
+    for entry in report["extra"]:
+        logger.info(f"Undeclared index {entry}")
+    for entry in report["conflicts"]:
+        logger.warning(f"Index conflict {entry}")
+    return report
+
+
+def _plan_stages(plan: dict):
+    yield plan.get("stage")
+    for child_key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(child_key), dict):
+            yield from _plan_stages(plan[child_key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+def check_query_plans(db: Optional[Database] = None) -> List[str]:
+    """Explains every declared query shape; returns the ones with a COLLSCAN or in-memory SORT."""
+    db = db if db is not None else get_db()
+    problems = []
+    for declared_name, query, sort in QUERY_SHAPES:
+        name = _collection_name(declared_name)
+        cursor = db[name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        stages = set(_plan_stages(winning))
+        bad = stages & {"COLLSCAN", "SORT"}
+        if bad:
+            problems.append(f"{name} {query} sort={sort}: {', '.join(sorted(bad))}")
+    for problem in problems:
+        logger.warning(f"Query without index: {problem}")
+    return problems
+
+
+def bootstrap_indexes(background: bool = True) -> None:
+    """Called once from create_app. Set MONGO_ENSURE_INDEXES=0 to skip and
+    MONGO_EXPLAIN_QUERIES=1 to also check the query plans."""
+    if os.getenv("MONGO_ENSURE_INDEXES", "1") != "1":
+        return
+
+    def _run() -> None:
+        try:
+            ensure_indexes()
+            if os.getenv("MONGO_EXPLAIN_QUERIES", "0") == "1":
+                check_query_plans()
+        except Exception as exc:
+            # Never block startup on index management
+            logger.warning(f"Index bootstrap failed: {exc}")
+
+    if background:
+        threading.Thread(target=_run, name="index-bootstrap", daemon=True).start()
+    else:
+        _run()
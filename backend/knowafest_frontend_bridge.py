@@ -1,40 +1,19 @@
+import hashlib
 import json
 import os
-import re
+import sys
 from datetime import datetime
 
+from event_store import EventStore
+from extraction_engine import extract_fee, extract_fields
+from metrics import metrics
+
+# Stored in .bridge_cache.json; a cache written by another version is discarded.
+# Bump whenever transform_event or extraction_engine changes its output.
+TRANSFORM_VERSION = 1
+
 def parse_fee(fee_text):
-    if not fee_text or fee_text.strip() == "N/A" or fee_text.strip() == "":
-        return "Check Link"
-    
-    fee_lower = fee_text.lower()
-    
-    # 1. Explicit Currency Formats (Rs. 500, INR 500, ₹500, $100, ₹2,500)
-    # Modified to accept commas in the number part
-    match_currency = re.search(r'(?:Rs\.?|INR|₹|\$)\s*([\d,]+)', fee_text, re.IGNORECASE)
-    if match_currency:
-        return f"₹{match_currency.group(1)}"
-
-    # 2. Suffix Style (500/-)
-    match_suffix = re.search(r'(\d+)/-', fee_text)
-    if match_suffix:
-        return f"₹{match_suffix.group(1)}"
-
-    # 3. Contextual Numbers (e.g., "150 for online", "Fee 200")
-    # Looking for 3-4 digit numbers that are likely prices
-    match_context = re.search(r'\b(\d{2,4})\b', fee_text)
-    if match_context:
-        # Simple heuristic: if we find a number, assume it's the price if no other format matched
-        # But avoid years like 2026
-        amt = int(match_context.group(1))
-        if amt < 2025: # simplistic filter for years
-            return f"₹{amt}"
-
-    # 4. Check for Free patterns
-    if 'free' in fee_lower or 'no registration fee' in fee_lower:
-        return "Free"
-        
-    return "Paid" # Fallback
+    return extract_fee(fee_text)
 
 def parse_date(date_str):
     # Formats: "02 Jan 2026" -> "2026-01-02"
@@ -46,127 +25,169 @@ def parse_date(date_str):
     except ValueError:
         return date_str
 
-def main():
+def record_fingerprint(item):
+    """Content hash of a scraped record; changes whenever any field changes."""
+    canonical = json.dumps(item, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def make_event_id(item, fingerprint):
+    """Stable ID derived from event_url, so IDs do not shift when input order changes."""
+    key = item.get("event_url") or fingerprint
+    return f"ext-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}"
+
+def clean_description(item):
+    description = item.get("about_event", "")
+    # Remove "Events" prefix if it exists (common in this scraper data)
+    if description.startswith("Events"):
+        description = description[6:].strip()
+    return description
+
+def clean_contact_info(item):
+    contact_info = item.get("contact_details", "")
+    if not contact_info or contact_info == "N/A":
+        contact_info = "Please check the official registration link for contact details."
+    return contact_info
+
+def extraction_row(item):
+    """Positional arguments for `extraction_engine.extract_fields`."""
+    description = clean_description(item)
+    contact_info = clean_contact_info(item)
+    return (
+        item.get("registration_fees", ""),
+        description + " " + contact_info,  # timings are looked up in description or contact info
+        item.get("google_map_link", ""),
+        item.get("venue_address", ""),
+    )
+
+def transform_event(item, event_id, fields):
+    """Maps one scraped knowafest record to the frontend event shape.
+
+    `fields` is `extract_fields(*extraction_row(item))`.
+    """
+    description = clean_description(item)
+    contact_info = clean_contact_info(item)
+
+    # Extract Departments
+    departments = []
+    dept_str = item.get("departments", "")
+    if dept_str:
+        # Split by comma, strip whitespace, and filter empty
+        departments = [d.strip() for d in dept_str.split(',') if d.strip()]
+    
+    # Extract Deadline (Important Dates)
+    deadline = item.get("important_dates", "")
+    if deadline == "N/A":
+        deadline = ""
+
+    event = {
+        "id": event_id,
+        "title": item.get("fest_name", "Untitled Event"),
+        "subtitle": item.get("fest_type", ""),
+        "startDate": parse_date(item.get("fest_starts", "")),
+        "endDate": parse_date(item.get("fest_ends", "")),
+        "startTime": fields["startTime"],
+        "endTime": fields["endTime"],
+        "location": item.get("location") or item.get("venue_address", "Unknown Location"),
+        "venueAddress": fields["venueAddress"],
+        "category": item.get("category", "Workshop"),
+        "type": "External",
+        "image": item.get("image_url", ""),
+        "organizer": item.get("organiser", "").replace("\n", ", ").replace(",,", ",").strip(),
+        "description": description,
+        "departments": departments,
+        "contactInfo": contact_info,
+        "registrationFees": item.get("registration_fees", "N/A"), # Full text
+        "feeShort": fields["feeShort"],
+        "feeDetails": item.get("registration_fees", ""), # Duplicate for explicit use in details
+        "deadline": deadline,
+        "venueMapUrl": fields["venueMapUrl"],
+        "registrationUrl": item.get("register_url", "#"),
+        "registered": 0,
+        "maxCapacity": 100,
+        "status": "Upcoming",
+        "seatsRemaining": 100
+    }
+    
+    return event
+
+def load_cache(cache_path):
+    """fingerprint -> transformed event; empty if missing, unreadable or from another TRANSFORM_VERSION."""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != TRANSFORM_VERSION:
+        return {}
+    return cache.get("events", {})
+
+def write_json_atomic(path, data, **dump_kwargs):
+    """Writes to a temp file in the same directory, then renames over the target."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        # dumps() + one write: json.dump() streams through the pure-Python encoder
+        f.write(json.dumps(data, ensure_ascii=False, **dump_kwargs))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def main(incremental=True, store=None, output_path=None, cache_path=None):
     # Paths relative to this script
     script_dir = os.path.dirname(os.path.abspath(__file__))
     # Assuming script is in backend/ and repo root is parent
     root_dir = os.path.dirname(script_dir)
     
-    input_path = os.path.join(script_dir, "knowafest_complete_data.json")
-    output_path = os.path.join(root_dir, "frontend", "data", "external_events.json")
+    output_path = output_path or os.path.join(root_dir, "frontend", "data", "external_events.json")
+    # fingerprint -> transformed event, reused for unchanged records
+    cache_path = cache_path or os.path.join(script_dir, ".bridge_cache.json")
 
-    print(f"Reading from: {input_path}")
+    store = store or EventStore()
+    print(f"Reading from: {store.path}")
     
-    try:
-        with open(input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except FileNotFoundError:
+    if not os.path.exists(store.path):
         print("Input file not found!")
         return
 
-    transformed_events = []
-    
-    for idx, item in enumerate(data):
-        # Create ID: ext-{timestamp}-{index} or just ext-{index}
-        # Using index for stability
-        event_id = f"ext-{idx+1}"
-        
-        parsed_fee = parse_fee(item.get("registration_fees", ""))
-        
-            
-        # Data Cleaning & Extraction
-        description = item.get("about_event", "")
-        # Remove "Events" prefix if it exists (common in this scraper data)
-        if description.startswith("Events"):
-            description = description[6:].strip()
-            
-        # Extract Departments
-        departments = []
-        dept_str = item.get("departments", "")
-        if dept_str:
-            # Split by comma, strip whitespace, and filter empty
-            departments = [d.strip() for d in dept_str.split(',') if d.strip()]
-            
-        # Extract Contact Info
-        contact_info = item.get("contact_details", "")
-        if not contact_info or contact_info == "N/A":
-             contact_info = "Please check the official registration link for contact details."
-        
-        # Extract Venue
-        venue_address = item.get("venue_address", "")
-        
-        # Attempt to find timings in description or contact info
-        start_time = "09:00"
-        end_time = "17:00"
-        
-        # Regex to look for time patterns like "9.30 AM to 4.30 PM"
-        time_match = re.search(r'(\d{1,2}(?::|\.)\d{2}\s*(?:AM|PM))\s*(?:to|-)\s*(\d{1,2}(?::|\.)\d{2}\s*(?:AM|PM))', description + " " + contact_info, re.IGNORECASE)
-        if time_match:
-            start_time = time_match.group(1).replace(".", ":")
-            end_time = time_match.group(2).replace(".", ":")
-
-        # Extract Google Map Link
-        google_map_link = item.get("google_map_link", "")
-        if not google_map_link or google_map_link == "N/A":
-            # Try to find in venue address
-            # Expanded regex to catch goo.gl/maps as well
-            map_match = re.search(r'(https?://(?:maps\.app\.goo\.gl|www\.google\.com/maps|goo\.gl/maps)\S+)', venue_address)
-            if map_match:
-                google_map_link = map_match.group(1)
-                # Remove the link from the address text
-                venue_address = venue_address.replace(google_map_link, "")
-                # Remove common prefixes like "Google Map link:"
-                venue_address = re.sub(r'Google Map link:?', '', venue_address, flags=re.IGNORECASE)
-                venue_address = venue_address.strip()
-            else:
-                google_map_link = ""
-        
-        # Clean up any leftover messy characters or newlines in venue
-        venue_address = re.sub(r'\s+', ' ', venue_address).strip()
-        
-        # Extract Deadline (Important Dates)
-        deadline = item.get("important_dates", "")
-        if deadline == "N/A":
-            deadline = ""
-
-        event = {
-            "id": event_id,
-            "title": item.get("fest_name", "Untitled Event"),
-            "subtitle": item.get("fest_type", ""),
-            "startDate": parse_date(item.get("fest_starts", "")),
-            "endDate": parse_date(item.get("fest_ends", "")),
-            "startTime": start_time,
-            "endTime": end_time,
-            "location": item.get("location") or item.get("venue_address", "Unknown Location"),
-            "venueAddress": venue_address,
-            "category": item.get("category", "Workshop"),
-            "type": "External",
-            "image": item.get("image_url", ""),
-            "organizer": item.get("organiser", "").replace("\n", ", ").replace(",,", ",").strip(),
-            "description": description,
-            "departments": departments,
-            "contactInfo": contact_info,
-            "registrationFees": item.get("registration_fees", "N/A"), # Full text
-            "feeShort": parsed_fee,
-            "feeDetails": item.get("registration_fees", ""), # Duplicate for explicit use in details
-            "deadline": deadline,
-            "venueMapUrl": google_map_link,
-            "registrationUrl": item.get("register_url", "#"),
-            "registered": 0,
-            "maxCapacity": 100,
-            "status": "Upcoming",
-            "seatsRemaining": 100
-        }
-        
-        transformed_events.append(event)
+    cache = load_cache(cache_path) if incremental else {}
+    new_cache = {}
+    reused = 0
+
+    # Stream records instead of loading the whole history
+    fingerprints = []
+    pending = {}  # fingerprint -> record that needs transforming
+    for item in store.iter_events():
+        fingerprint = record_fingerprint(item)
+        fingerprints.append(fingerprint)
+        if fingerprint in cache:
+            new_cache[fingerprint] = cache[fingerprint]
+            reused += 1
+        elif fingerprint not in pending:
+            pending[fingerprint] = item
+
+    # Run the regex heuristics only for changed records
+    with metrics.timer("bridge_extract"):
+        for fingerprint, item in pending.items():
+            fields = extract_fields(*extraction_row(item))
+            new_cache[fingerprint] = transform_event(item, make_event_id(item, fingerprint), fields)
+
+    transformed_events = [new_cache[fingerprint] for fingerprint in fingerprints]
+    transformed = len(pending)
+    print(f"Records: {len(transformed_events)} (transformed: {transformed}, reused: {reused})")
+    metrics.incr("bridge_records", transformed, result="transformed")
+    metrics.incr("bridge_records", reused, result="reused")
+
+    if incremental and transformed == 0 and set(new_cache) == set(cache) and os.path.exists(output_path):
+        print("No changes. Output is up to date.")
+        return
 
     # Ensure output dir exists
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(transformed_events, f, indent=2, ensure_ascii=False)
+    write_json_atomic(output_path, transformed_events, indent=2)
+    write_json_atomic(cache_path, {"version": TRANSFORM_VERSION, "events": new_cache})
         
     print(f"Successfully wrote {len(transformed_events)} events to {output_path}")
 
 if __name__ == "__main__":
-    main()
+    # `--full` ignores the transform cache and rebuilds every record
+    main(incremental="--full" not in sys.argv[1:])
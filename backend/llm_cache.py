@@ -0,0 +1,217 @@
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from PIL import Image
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_FILE = os.path.join(BASE_DIR, "llm_cache.sqlite3")
+
+
+def image_digest(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def perceptual_hash(image_bytes):
+    """
+    64-bit difference hash (dHash): re-encodes, resizes and small colour shifts of the
+    same poster land within a few bits of each other. Returns None if the image can't be read.
+    """
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        img.draft('L', (64, 64))  # lets JPEG decode at reduced size
+        pixels = list(img.convert('L').resize((9, 8), Image.LANCZOS).getdata())
+    except Exception:
+        return None
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _hamming(a, b):
+    return bin((a ^ b) & ((1 << 64) - 1)).count("1")
+
+
+def _bands(phash, count):
+    """
+    Splits the 64-bit hash into `count` bit ranges. Two hashes within count-1 bits of
+    each other agree exactly on at least one range, so looking up entries that share a
+    band finds every candidate without scanning the table.
+    """
+    value = phash & ((1 << 64) - 1)
+    bounds = [64 * i // count for i in range(count + 1)]
+    return [(band, (value >> lo) & ((1 << (hi - lo)) - 1))
+            for band, (lo, hi) in enumerate(zip(bounds, bounds[1:]))]
+
+
+_SUBJECT_PREFIX_RE = re.compile(r'^\s*((re|fw|fwd)\s*:\s*)+', re.IGNORECASE)
+
+
+def subject_scope(subject):
+    """Email subject without Re:/Fwd: prefixes, case and spacing, for `scope`."""
+    subject = _SUBJECT_PREFIX_RE.sub('', subject or '')
+    return ' '.join(subject.lower().split())
+
+
+class ExtractionCache:
+    """
+    Persistent cache of LLM extraction results.
+
+    Entries are keyed by SHA-256 of the image bytes + QR context + prompt version, so a
+    poster forwarded in several emails is only sent to the model once. In "perceptual"
+    mode a miss on the exact key falls back to the nearest entry (same QR context and
+    prompt version) whose dHash is within `max_distance` bits. Posters without a QR
+    code share one context, so for them the fallback also requires the same `scope`
+    (the caller passes the normalised email subject): otherwise another event in the
+    same poster template could match. Candidates are found through `max_distance + 1`
+    hash bands (see `_bands`) instead of a scan.
+
+    The least recently used entries are evicted once the cache exceeds `max_entries`.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, mode="exact", max_entries=5000, max_distance=6):
+        if mode not in ("exact", "perceptual"):
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.band_count = max_distance + 1
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "perceptual_hits": 0, "misses": 0}
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS extractions (
+                key TEXT PRIMARY KEY,
+                context TEXT NOT NULL,
+                phash INTEGER,
+                scope TEXT NOT NULL DEFAULT '',
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(extractions)")}
+        if "scope" not in columns:
+            self.conn.execute("ALTER TABLE extractions ADD COLUMN scope TEXT NOT NULL DEFAULT ''")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_extractions_context ON extractions (context)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_extractions_last_used ON extractions (last_used)")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS extraction_bands (
+                band INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (band, value, key)
+            ) WITHOUT ROWID"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_extraction_bands_key ON extraction_bands (key)")
+        # user_version records the band count; rebuild the bands when it changes
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != self.band_count:
+            self.conn.execute("DELETE FROM extraction_bands")
+            rows = self.conn.execute("SELECT key, phash FROM extractions WHERE phash IS NOT NULL").fetchall()
+            for key, phash in rows:
+                self._insert_bands(key, phash)
+            self.conn.execute(f"PRAGMA user_version = {self.band_count}")
+        self.conn.commit()
+
+    @staticmethod
+    def _context(qr_link, prompt_version):
+        return f"{prompt_version}|{qr_link or ''}"
+
+    def _key(self, image_bytes, context):
+        return hashlib.sha256(f"{image_digest(image_bytes)}|{context}".encode("utf-8")).hexdigest()
+
+    def _scope(self, qr_link, scope):
+        return "" if qr_link else (scope or "")
+
+    def _insert_bands(self, key, phash):
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO extraction_bands (band, value, key) VALUES (?, ?, ?)",
+            [(band, value, key) for band, value in _bands(phash, self.band_count)],
+        )
+
+    def _nearest(self, phash, context, scope):
+        bands = _bands(phash, self.band_count)
+        match = " OR ".join(["(b.band = ? AND b.value = ?)"] * len(bands))
+        best = None
+        # CROSS JOIN makes SQLite start from the band matches, not the (shared) context index
+        for candidate_key, candidate_hash, result in self.conn.execute(
+            "SELECT DISTINCT e.key, e.phash, e.result FROM extraction_bands b CROSS JOIN extractions e "
+            f"ON e.key = b.key WHERE ({match}) AND e.context = ? AND e.scope = ?",
+            [v for pair in bands for v in pair] + [context, scope],
+        ):
+            distance = _hamming(phash, candidate_hash)
+            if distance <= self.max_distance and (best is None or distance < best[0]):
+                best = (distance, candidate_key, result)
+        return best
+
+    def get(self, image_bytes, qr_link, prompt_version, scope=None):
+        """Returns a fresh copy of the cached result, or None on a miss."""
+        context = self._context(qr_link, prompt_version)
+        key = self._key(image_bytes, context)
+        with self.lock:
+            row = self.conn.execute("SELECT key, result FROM extractions WHERE key = ?", (key,)).fetchone()
+            stat = "hits"
+
+            if row is None and self.mode == "perceptual":
+                phash = perceptual_hash(image_bytes)
+                if phash is not None:
+                    best = self._nearest(phash, context, self._scope(qr_link, scope))
+                    if best:
+                        row = (best[1], best[2])
+                        stat = "perceptual_hits"
+
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+
+            self.stats[stat] += 1
+            self.conn.execute("UPDATE extractions SET last_used = ? WHERE key = ?", (time.time(), row[0]))
+            self.conn.commit()
+            return json.loads(row[1])
+
+    def put(self, image_bytes, qr_link, prompt_version, result, scope=None):
+        context = self._context(qr_link, prompt_version)
+        key = self._key(image_bytes, context)
+        phash = perceptual_hash(image_bytes) if self.mode == "perceptual" else None
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO extractions (key, context, phash, scope, result, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, context, phash, self._scope(qr_link, scope), json.dumps(result), now, now),
+            )
+            self.conn.execute("DELETE FROM extraction_bands WHERE key = ?", (key,))
+            if phash is not None:
+                self._insert_bands(key, phash)
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            evicted = "(SELECT key FROM extractions ORDER BY last_used ASC LIMIT ?)"
+            self.conn.execute(f"DELETE FROM extraction_bands WHERE key IN {evicted}", (excess,))
+            self.conn.execute(f"DELETE FROM extractions WHERE key IN {evicted}", (excess,))
+
+    def summary(self):
+        hits = self.stats["hits"] + self.stats["perceptual_hits"]
+        lookups = hits + self.stats["misses"]
+        rate = (100.0 * hits / lookups) if lookups else 0.0
+        return (f"LLM cache: {hits}/{lookups} hits ({rate:.0f}%), "
+                f"exact={self.stats['hits']} perceptual={self.stats['perceptual_hits']} misses={self.stats['misses']}")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,289 @@
+import cProfile
+import json
+import logging
+import multiprocessing.util
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# One JSON line per finished stage (timings + the counters it moved)
+METRICS_FILE = os.getenv("PIPELINE_METRICS_FILE", os.path.join(BASE_DIR, "pipeline_metrics.jsonl"))
+PROFILE_DIR = os.path.join(BASE_DIR, "profiles")
+
+
+def _key(name, labels):
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+
+class Metrics:
+    """
+    In-process registry of counters, gauges and timings, keyed by name + labels.
+
+    Counters only go up and timings record count/sum/max in seconds, so a snapshot diff
+    gives what one stage did. Process-pool workers start from a `reset()` registry and
+    ship their `drain()` deltas back to the parent, which `merge()`s them.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.timings = {}
+
+    def incr(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            timing = self.timings.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+            timing["count"] += 1
+            timing["sum"] += seconds
+            timing["max"] = max(timing["max"], seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    # --- Snapshots ---
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "timings": {k: dict(v) for k, v in self.timings.items()},
+            }
+
+    @staticmethod
+    def diff(before, after):
+        """What changed between two snapshots (gauges: current values)."""
+        counters = {k: v - before["counters"].get(k, 0) for k, v in after["counters"].items()}
+        timings = {}
+        for key, timing in after["timings"].items():
+            prev = before["timings"].get(key, {"count": 0, "sum": 0.0})
+            count = timing["count"] - prev["count"]
+            if count:
+                timings[key] = {"count": count, "sum": round(timing["sum"] - prev["sum"], 4),
+                                "max": round(timing["max"], 4)}
+        return {
+            "counters": {k: v for k, v in counters.items() if v},
+            "gauges": after["gauges"],
+            "timings": timings,
+        }
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.timings.clear()
+
+    def reset_in_child(self):
+        """
+        Lock-free reset for a new worker process: a forked child can inherit `lock`
+        held by a parent thread, so it is replaced rather than acquired.
+        """
+        self.lock = threading.Lock()
+        self.counters, self.gauges, self.timings = {}, {}, {}
+
+    def drain(self):
+        """Returns the current values and resets the registry (used by pool workers)."""
+        with self.lock:
+            data = {"counters": self.counters, "gauges": self.gauges, "timings": self.timings}
+            self.counters, self.gauges, self.timings = {}, {}, {}
+            return data
+
+    def merge(self, data):
+        with self.lock:
+            for key, value in data["counters"].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            self.gauges.update(data["gauges"])
+            for key, other in data["timings"].items():
+                timing = self.timings.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+                timing["count"] += other["count"]
+                timing["sum"] += other["sum"]
+                timing["max"] = max(timing["max"], other["max"])
+
+    # --- Export ---
+
+    def emit(self, stage, seconds, before, ok=True, path=METRICS_FILE):
+        """Appends one JSON line for a finished stage, with what it changed since `before`."""
+        record = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "stage": stage,
+            "ok": ok,
+            "seconds": round(seconds, 3),
+            **self.diff(before, self.snapshot()),
+        }
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logging.warning(f"Could not write metrics: {e}")
+        return record
+
+    def prometheus_text(self):
+        snap = self.snapshot()
+        lines = []
+        for key, value in sorted(snap["counters"].items()):
+            lines.append(f"{_prom_name(key, '_total')} {value}")
+        for key, value in sorted(snap["gauges"].items()):
+            lines.append(f"{_prom_name(key)} {value}")
+        for key, timing in sorted(snap["timings"].items()):
+            lines.append(f"{_prom_name(key, '_seconds_count')} {timing['count']}")
+            lines.append(f"{_prom_name(key, '_seconds_sum')} {timing['sum']:.6f}")
+            lines.append(f"{_prom_name(key, '_seconds_max')} {timing['max']:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serves `prometheus_text()` on http://host:port/metrics from a daemon thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logging.info(f"Metrics on http://{host}:{port}/metrics")
+        return server
+
+
+def _prom_name(key, suffix=""):
+    name, brace, labels = key.partition("{")
+    return f"pipeline_{name}{suffix}{brace}{labels}"
+
+
+# Process-wide registry
+metrics = Metrics()
+
+
+# Name of the stage being profiled, if any; pools pass it to `init_worker` so their
+# workers profile themselves too
+profiling_stage = None
+
+
+class _ThreadProfiles:
+    """
+    cProfile only sees the thread that enabled it. While installed (`threading.setprofile`),
+    every thread started during the stage enables its own profiler on its first event;
+    the results are added to the stage's stats when it ends.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.profilers = []
+
+    def hook(self, frame, event, arg):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()  # replaces this hook for the current thread
+        except ValueError:
+            # Another profiler is already active (3.12+ profiles through sys.monitoring)
+            sys.setprofile(None)
+            return
+        with self.lock:
+            self.profilers.append(profiler)
+
+    def add_to(self, stats):
+        with self.lock:
+            profilers, self.profilers = self.profilers, []
+        for profiler in profilers:
+            stats.add(profiler)
+        return len(profilers)
+
+
+@contextmanager
+def stage(name, profile=False):
+    """
+    Times a pipeline stage, appends its JSON metrics line and, with `profile`, dumps
+    cProfile stats to profiles/<stage>-<timestamp>.prof (top functions are logged).
+    The stage profile covers the calling thread and every thread started during the
+    stage; process-pool workers created with `init_worker` dump their own
+    profiles/<stage>-<timestamp>-pid<pid>.prof files.
+    """
+    global profiling_stage
+    before = metrics.snapshot()
+    profiler = cProfile.Profile() if profile else None
+    threads = _ThreadProfiles() if profile else None
+    started = time.perf_counter()
+    ok = False
+    if profiler:
+        profiling_stage = name
+        threading.setprofile(threads.hook)
+        profiler.enable()
+    try:
+        yield
+        ok = True
+    finally:
+        if profiler:
+            profiler.disable()
+            threading.setprofile(None)
+            profiling_stage = None
+        seconds = time.perf_counter() - started
+        metrics.observe("stage", seconds, stage=name)
+        metrics.emit(name, seconds, before, ok=ok, path=METRICS_FILE)
+        if profiler:
+            stats = pstats.Stats(profiler)
+            count = threads.add_to(stats)
+            _dump_profile(name, stats, f"main thread + {count} worker thread(s)")
+
+
+def init_worker(profile_stage=None):
+    """
+    Process-pool initializer: starts the worker from an empty registry (its `drain()`
+    deltas are merged by the parent) and, when the parent is profiling `profile_stage`,
+    profiles the worker until it exits. Takes no locks, so it is safe in a forked child.
+    """
+    metrics.reset_in_child()
+    if profile_stage:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        # multiprocessing runs finalizers with an exit priority when a worker exits cleanly
+        multiprocessing.util.Finalize(
+            None, _dump_worker_profile, args=(profile_stage, profiler), exitpriority=10)
+
+
+def _dump_worker_profile(name, profiler):
+    profiler.disable()
+    _dump_profile(name, pstats.Stats(profiler), f"worker pid {os.getpid()}", suffix=f"-pid{os.getpid()}")
+
+
+def _dump_profile(name, stats, scope, suffix=""):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = "".join(c if c.isalnum() else "_" for c in name.lower())
+    path = os.path.join(PROFILE_DIR, f"{slug}-{datetime.now():%Y%m%d_%H%M%S}{suffix}.prof")
+    stats.dump_stats(path)
+    top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:10]
+    logging.info(f"Profile for {name} ({scope}) written to {path}")
+    for (filename, line, func), (_, calls, _, cumulative, _) in top:
+        logging.info(f"  {cumulative:8.3f}s {calls:>8} {os.path.basename(filename)}:{line}({func})")
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+try:
+    from .db import get_db
+except ImportError:  # pragma: no cover
+    from db import get_db
+
+logger = logging.getLogger(__name__)
+
+# auto: Mongo change stream when the deployment supports it (replica set / Atlas), else in-process
+# changestream: change stream only; local: in-process only (single worker, or tests)
+NOTIFICATION_STREAM_MODE = os.getenv("NOTIFICATION_STREAM_MODE", "auto").strip().lower()
+# Seconds between SSE comment lines; keeps proxies from closing idle connections
+NOTIFICATION_STREAM_HEARTBEAT = float(os.getenv("NOTIFICATION_STREAM_HEARTBEAT", "25"))
+# Undelivered events per subscriber before it is dropped (the client reconnects and replays)
+NOTIFICATION_STREAM_QUEUE_SIZE = int(os.getenv("NOTIFICATION_STREAM_QUEUE_SIZE", "100"))
+
+BROADCAST = "all"
+_CLOSED = object()
+
+
+class Subscription:
+    def __init__(self, student_id: str, maxsize: int):
+        self.student_id = student_id
+        self.queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+
+    def get(self, timeout: float) -> Optional[dict]:
+        """Next notification, None on timeout; raises EOFError once the broker dropped us."""
+        try:
+            item = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if item is _CLOSED:
+            raise EOFError
+        return item
+
+
+class NotificationBroker:
+    """Fans new notification documents out to the open streams of one process.
+
+    Documents come either from a change stream on `notifications` (every worker sees every
+    insert, whichever process wrote it) or, when change streams aren't available, from
+    `notifications.insert_notification` calling `publish` in the writing process.
+    """
+
+    def __init__(self, mode: str = NOTIFICATION_STREAM_MODE, queue_size: int = NOTIFICATION_STREAM_QUEUE_SIZE):
+        self.mode = mode
+        self.queue_size = queue_size
+        self.lock = threading.Lock()
+        self.subscribers: Dict[str, Set[Subscription]] = {}
+        self.watching = False
+        self.watcher: Optional[threading.Thread] = None
+        self.stats = {"published": 0, "delivered": 0, "dropped": 0}
+
+    # --- subscribers -----------------------------------------------------------------
+
+    def subscribe(self, student_id: str) -> Subscription:
+        self.start()
+        subscription = Subscription(student_id, self.queue_size)
+        with self.lock:
+            self.subscribers.setdefault(student_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self.lock:
+            group = self.subscribers.get(subscription.student_id)
+            if group is not None:
+                group.discard(subscription)
+                if not group:
+                    del self.subscribers[subscription.student_id]
+
+    def subscriber_count(self) -> int:
+        with self.lock:
+            return sum(len(group) for group in self.subscribers.values())
+
+    def publish(self, doc: dict) -> int:
+        """Queues `doc` for its student (or everyone for broadcasts); returns deliveries."""
+        student_id = doc.get("student_id")
+        with self.lock:
+            if student_id == BROADCAST:
+                targets = [s for group in self.subscribers.values() for s in group]
+            else:
+                targets = list(self.subscribers.get(student_id, ()))
+
+        delivered = 0
+        for subscription in targets:
+            try:
+                subscription.queue.put_nowait(doc)
+                delivered += 1
+            except queue.Full:
+                # Slow consumer: close it rather than buffer without bound
+                self.unsubscribe(subscription)
+                self._close(subscription)
+                self.stats["dropped"] += 1
+        self.stats["published"] += 1
+        self.stats["delivered"] += delivered
+        return delivered
+
+    def publish_local(self, doc: dict) -> None:
+        """Called by the writer; skipped when the change stream will deliver the insert."""
+        if not self.watching:
+            self.publish(doc)
+
+    @staticmethod
+    def _close(subscription: Subscription) -> None:
+        while True:
+            try:
+                subscription.queue.put_nowait(_CLOSED)
+                return
+            except queue.Full:
+                pass
+            try:
+                subscription.queue.get_nowait()  # make room for the sentinel
+            except queue.Empty:
+                pass
+
+    # --- change stream ---------------------------------------------------------------
+
+    def start(self) -> None:
+        """Starts the change-stream watcher once (on the first subscriber)."""
+        if self.mode == "local":
+            return
+        with self.lock:
+            if self.watcher is not None:
+                return
+            self.watcher = threading.Thread(target=self._watch, name="notification-stream", daemon=True)
+        self.watcher.start()
+
+    def _watch(self) -> None:
+        resume_token = None
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        while True:
+            try:
+                with get_db().notifications.watch(pipeline, resume_after=resume_token) as stream:
+                    self.watching = True
+                    logger.info("Notification stream: watching the notifications change stream")
+                    for change in stream:
+                        resume_token = stream.resume_token
+                        doc = change.get("fullDocument") or {}
+                        doc.pop("_id", None)
+                        self.publish(doc)
+            except OperationFailure as exc:
+                self.watching = False
+                if self.mode == "auto":
+                    # Standalone mongod: no change streams, stay on in-process publishing
+                    logger.info(f"Notification stream: change streams unavailable ({exc}); using in-process delivery")
+                    return
+                logger.warning(f"Notification stream: change stream failed ({exc}); retrying")
+            except PyMongoError as exc:
+                self.watching = False
+                logger.warning(f"Notification stream: {exc}; retrying")
+            time.sleep(5)
+
+
+def sse_event(doc: dict, event: str = "notification") -> str:
+    """One Server-Sent Event; `id` is created_at so a reconnect can resume with Last-Event-ID."""
+    lines = [f"event: {event}"]
+    if doc.get("created_at"):
+        lines.append(f"id: {doc['created_at']}")
+    lines.append("data: " + json.dumps(doc, default=str))
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_events(subscription: Subscription, backlog=(), heartbeat: float = NOTIFICATION_STREAM_HEARTBEAT):
+    """Generator for the SSE response: backlog first, then live notifications."""
+    seen = set()
+    try:
+        yield "retry: 5000\n\n"
+        for doc in backlog:
+            if doc.get("seq") is not None:
+                seen.add((doc.get("student_id"), doc.get("seq")))
+            yield sse_event(doc)
+        while True:
+            try:
+                doc = subscription.get(timeout=heartbeat)
+            except EOFError:
+                return
+            if doc is None:
+                yield ": ping\n\n"
+                continue
+            key = (doc.get("student_id"), doc.get("seq"))
+            if key in seen:
+                # Inserted while the backlog was being read
+                seen.discard(key)
+                continue
+            yield sse_event({**doc, "is_read": False})
+    finally:
+        broker.unsubscribe(subscription)
+
+
+# One broker per process, shared by the stream route and insert_notification
+broker = NotificationBroker()
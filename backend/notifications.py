@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from pymongo import ReturnDocument
+
+try:
+    from .notification_stream import broker
+except ImportError:  # pragma: no cover
+    from notification_stream import broker
+
+# student_id of notifications shown to every student (stored once, fanned out on read)
+BROADCAST = "all"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _next_seq(db, scope: str) -> int:
+    """Next sequence number of a notification stream (BROADCAST or one student)."""
+    counter = db.notification_counters.find_one_and_update(
+        {"_id": scope},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return counter["seq"]
+
+
+def insert_notification(
+    db,
+    *,
+    student_id: str,
+    title: str,
+    message: str,
+    notif_type: str,
+    reference_id: str,
+) -> bool:
+    """Insert a notification if it doesn't already exist.
+
+    Dedupe key: (student_id, type, reference_id). Each notification gets the next `seq`
+    of its stream, which is what per-student read state and unread counts compare against.
+    Open notification streams receive the document (see notification_stream.broker).
+    """
+
+    existing = db.notifications.find_one(
+        {"student_id": student_id, "type": notif_type, "reference_id": reference_id},
+        {"_id": 1},
+    )
+    if existing:
+        return False
+
+    doc = {
+        "student_id": student_id,
+        "title": title,
+        "message": message,
+        "type": notif_type,  # event | vacancy | certificate | od | hostel
+        "reference_id": reference_id,
+        "seq": _next_seq(db, student_id),
+        "created_at": _now(),
+        "is_read": False,
+    }
+    db.notifications.insert_one(doc)
+    doc.pop("_id", None)
+    broker.publish_local(doc)
+    return True
+
+
+def notify_hostel_decision(db, permission: dict) -> bool:
+    """Tells the student their hostel permission was Approved/Rejected (once per decision)."""
+    status = permission.get("status")
+    student_id = permission.get("student_id")
+    if status not in {"Approved", "Rejected"} or not student_id:
+        return False
+    event_name = permission.get("event_name") or "your event"
+    return insert_notification(
+        db,
+        student_id=student_id,
+        title=f"Hostel Permission {status}",
+        message=f"Your hostel permission request for {event_name} has been {status.lower()}",
+        notif_type="hostel",
+        reference_id=f"{permission.get('_id')}:{status}",
+    )
+
+
+def _counters(db, student_id: str) -> dict:
+    docs = db.notification_counters.find({"_id": {"$in": [BROADCAST, student_id]}})
+    return {doc["_id"]: doc.get("seq", 0) for doc in docs}
+
+
+def read_state(db, student_id: str) -> dict:
+    """Per-student read cursor: last seen `seq` of the broadcast and personal streams."""
+    state = db.notification_reads.find_one({"_id": student_id}) or {}
+    return {
+        "broadcast_seq": state.get("broadcast_seq", 0),
+        "personal_seq": state.get("personal_seq", 0),
+        "read_at": state.get("read_at"),
+    }
+
+
+def _legacy_unread(db, student_id: str, state: dict) -> int:
+    """Unread notifications stored before `seq` existed, judged like `annotate_read` does.
+
+    Uses the (student_id, created_at) index; once the student has marked notifications
+    read, only documents newer than `read_at` are scanned.
+    """
+    query: dict = {"student_id": {"$in": [BROADCAST, student_id]}, "seq": {"$exists": False}, "is_read": False}
+    if state["read_at"]:
+        query["created_at"] = {"$gt": state["read_at"]}
+    return db.notifications.count_documents(query)
+
+
+def unread_count(db, student_id: str, state: Optional[dict] = None) -> int:
+    """Two point lookups by _id for sequenced notifications, plus the legacy ones without `seq`."""
+    state = state or read_state(db, student_id)
+    counters = _counters(db, student_id)
+    broadcast = counters.get(BROADCAST, 0) - state["broadcast_seq"]
+    personal = counters.get(student_id, 0) - state["personal_seq"]
+    return max(broadcast, 0) + max(personal, 0) + _legacy_unread(db, student_id, state)
+
+
+def mark_read(db, student_id: str) -> dict:
+    """Marks everything published so far as read for one student."""
+    counters = _counters(db, student_id)
+    state = {
+        "broadcast_seq": counters.get(BROADCAST, 0),
+        "personal_seq": counters.get(student_id, 0),
+        "read_at": _now(),
+    }
+    db.notification_reads.update_one({"_id": student_id}, {"$set": state}, upsert=True)
+    return state
+
+
+def annotate_read(docs: Iterable[dict], state: dict) -> None:
+    """Sets each document's `is_read` for this student (broadcast docs share one stored flag)."""
+    for doc in docs:
+        seq = doc.get("seq")
+        if seq is not None:
+            cursor = state["broadcast_seq"] if doc.get("student_id") == BROADCAST else state["personal_seq"]
+            doc["is_read"] = seq <= cursor
+        else:
+            # Written before read cursors existed
+            read_at = state["read_at"]
+            created_at = doc.get("created_at")
+            doc["is_read"] = bool(doc.get("is_read")) or bool(read_at and created_at and created_at <= read_at)
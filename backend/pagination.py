@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import base64
+import os
+import re
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from bson import json_util
+from pymongo.collection import Collection
+
+MAX_PAGE_LIMIT = int(os.getenv("API_MAX_PAGE_LIMIT", "200"))
+# Page size when the client sends no `limit`; every list response is bounded (clients
+# follow `next` for the rest)
+DEFAULT_PAGE_LIMIT = int(os.getenv("API_DEFAULT_PAGE_LIMIT", str(MAX_PAGE_LIMIT)))
+
+_FIELD_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+SortSpec = Sequence[Tuple[str, int]]
+
+
+def keyset_sort(sort: SortSpec) -> List[Tuple[str, int]]:
+    """The sort with `_id` appended as a unique tiebreaker (same direction as the last key)."""
+    keys = list(sort)
+    if not any(field == "_id" for field, _ in keys):
+        keys.append(("_id", keys[-1][1] if keys else 1))
+    return keys
+
+
+def encode_cursor(values: list) -> str:
+    raw = json_util.dumps(values).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, expected: int) -> list:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != expected:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _after(field: str, value, direction: int) -> Optional[dict]:
+    """Filter for documents strictly after `value` on one sort key.
+
+    Mongo sorts null/missing before every other value, so in descending order they come
+    last; comparison operators never match them, hence the explicit null branch.
+    """
+    if value is None:
+        return {field: {"$ne": None}} if direction == 1 else None
+    if direction == 1:
+        return {field: {"$gt": value}}
+    return {"$or": [{field: {"$lt": value}}, {field: None}]}
+
+
+def keyset_filter(sort: SortSpec, values: list) -> dict:
+    """(k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... for a multi-key sort."""
+    branches = []
+    for i, (field, direction) in enumerate(sort):
+        after = _after(field, values[i], direction)
+        if after is None:
+            continue
+        equal = [{f: values[j]} for j, (f, _) in enumerate(sort[:i])]
+        branches.append({"$and": equal + [after]} if equal else after)
+    return {"$or": branches} if branches else {"_id": {"$exists": False}}
+
+
+def parse_limit(args) -> int:
+    raw = args.get("limit")
+    if raw is None or str(raw).strip() == "":
+        return max(min(DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT), 1)
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    return min(limit, MAX_PAGE_LIMIT)
+
+
+def parse_fields(args) -> Optional[List[str]]:
+    """`fields=title,date` sparse fieldset, or None for full documents."""
+    raw = args.get("fields")
+    if not raw:
+        return None
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    for field in fields:
+        if not _FIELD_RE.match(field):
+            raise ValueError(f"Invalid field name: {field}")
+    return fields or None
+
+
+def select_fields(doc: dict, fields: Optional[Iterable[str]]) -> dict:
+    if not fields:
+        return doc
+    return {k: v for k, v in doc.items() if k in fields}
+
+
+def fetch_page(
+    collection: Collection,
+    query: dict,
+    sort: SortSpec,
+    args,
+    projection: Optional[dict] = None,
+    required: Sequence[str] = (),
+) -> Tuple[List[dict], Optional[str], Optional[List[str]]]:
+    """Runs a list query with keyset pagination and sparse fieldsets.
+
+    Query params read from `args`: `limit` (DEFAULT_PAGE_LIMIT when absent, capped at
+    MAX_PAGE_LIMIT), `cursor` (the `next` token of the previous page) and `fields`.
+
+    Returns (docs, next_token, fields); next_token is None on the last page. `_id` is
+    removed from the docs when `projection` excludes it. `required` fields are fetched
+    even with a sparse fieldset (for values the caller derives). Callers apply
+    `select_fields(serialized_doc, fields)` after their own serialisation.
+    """
+    limit = parse_limit(args)
+    fields = parse_fields(args)
+    token = args.get("cursor")
+    sort_keys = keyset_sort(sort)
+
+    strip_id = bool(projection) and projection.get("_id") == 0
+    if fields:
+        # Sort keys are needed for the next cursor; extra ones are dropped by select_fields
+        fetch_projection = {f: 1 for f in fields}
+        fetch_projection.update({f: 1 for f, _ in sort_keys})
+        fetch_projection.update({f: 1 for f in required})
+    else:
+        fetch_projection = {k: v for k, v in (projection or {}).items() if k != "_id"} or None
+
+    if token:
+        query = {"$and": [query, keyset_filter(sort_keys, decode_cursor(token, len(sort_keys)))]}
+
+    docs = list(collection.find(query, fetch_projection).sort(sort_keys).limit(limit + 1))
+
+    next_token = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_token = encode_cursor([docs[-1].get(field) for field, _ in sort_keys])
+
+    if strip_id:
+        for doc in docs:
+            doc.pop("_id", None)
+    return docs, next_token, fields
@@ -0,0 +1,143 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from PIL import Image, features
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_DIR = os.path.join(BASE_DIR, "event_posters")
+# URL prefix the posters are served under (see the /posters route in api.py)
+DEFAULT_URL_PREFIX = "/posters"
+
+VARIANT_WIDTHS = (320, 640, 1280)
+# Encoder settings per format; AVIF is only produced when Pillow was built with it
+FORMAT_OPTIONS = {
+    "avif": {"quality": 50, "speed": 8},
+    "webp": {"quality": 78, "method": 4},
+}
+PLACEHOLDER_WIDTH = 16
+MANIFEST_NAME = "manifest.json"
+
+
+def poster_hash(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+class PosterStore:
+    """
+    Content-addressed poster storage.
+
+    Each poster lives in `<root>/<hash[:2]>/<hash>/` (hash = SHA-256 of the image bytes):
+    the original JPEG, resized WebP/AVIF variants for every width in `widths` smaller
+    than the original, and `manifest.json` describing them, including a tiny inline
+    WebP blur placeholder. The manifest is written last, so its presence marks a
+    complete entry; saving a poster that is already stored only reads the manifest.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR, url_prefix=DEFAULT_URL_PREFIX, widths=VARIANT_WIDTHS, formats=None):
+        self.root = root
+        self.url_prefix = url_prefix.rstrip("/")
+        self.widths = tuple(sorted(widths))
+        if formats is None:
+            formats = [fmt for fmt in FORMAT_OPTIONS if features.check(fmt)]
+        self.formats = tuple(formats)
+        self.lock = threading.Lock()
+        self.stats = {"stored": 0, "deduped": 0}
+        os.makedirs(root, exist_ok=True)
+
+    def _relative_dir(self, digest):
+        return f"{digest[:2]}/{digest}"
+
+    def _url(self, digest, name):
+        return f"{self.url_prefix}/{self._relative_dir(digest)}/{name}"
+
+    def get(self, digest):
+        """Manifest of a stored poster, or None."""
+        path = os.path.join(self.root, self._relative_dir(digest), MANIFEST_NAME)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, image_bytes):
+        """Stores a JPEG poster (if new) and returns its manifest."""
+        digest = poster_hash(image_bytes)
+        manifest = self.get(digest)
+        if manifest is not None:
+            self.record(False)
+            return manifest
+
+        final_dir = os.path.join(self.root, self._relative_dir(digest))
+        os.makedirs(os.path.dirname(final_dir), exist_ok=True)
+        # Build the entry in a scratch directory next to its final place, then move it in
+        tmp_dir = tempfile.mkdtemp(prefix=f".{digest[:8]}-", dir=os.path.dirname(final_dir))
+        try:
+            manifest = self._build(digest, image_bytes, tmp_dir)
+            try:
+                os.replace(tmp_dir, final_dir)
+            except OSError:
+                # Another worker stored the same poster concurrently
+                existing = self.get(digest)
+                if existing is None:
+                    raise
+                manifest = existing
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self.record(True)
+        return manifest
+
+    def record(self, stored):
+        """Counts one save; also used by callers that saved in a worker process."""
+        with self.lock:
+            self.stats["stored" if stored else "deduped"] += 1
+
+    def _build(self, digest, image_bytes, out_dir):
+        with open(os.path.join(out_dir, "original.jpg"), "wb") as f:
+            f.write(image_bytes)
+
+        img = Image.open(io.BytesIO(image_bytes))
+        img = img if img.mode == "RGB" else img.convert("RGB")
+        width, height = img.size
+
+        variants = {fmt: [] for fmt in self.formats}
+        source = img
+        # Largest first, each width resized from the previous one (much cheaper than from the original)
+        for target in sorted([w for w in self.widths if w < width] or [width], reverse=True):
+            if target != source.width:
+                source = source.resize((target, round(height * target / width)), Image.LANCZOS)
+            for fmt in self.formats:
+                name = f"w{target}.{fmt}"
+                source.save(os.path.join(out_dir, name), format=fmt.upper(), **FORMAT_OPTIONS[fmt])
+                variants[fmt].insert(0, {"width": target, "url": self._url(digest, name)})
+
+        manifest = {
+            "hash": digest,
+            "width": width,
+            "height": height,
+            "original": self._url(digest, "original.jpg"),
+            "variants": variants,
+            "srcset": {fmt: ", ".join(f"{v['url']} {v['width']}w" for v in items) for fmt, items in variants.items()},
+            "placeholder": self._placeholder(img),
+        }
+        with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        return manifest
+
+    @staticmethod
+    def _placeholder(img):
+        """Data URI of a ~16px wide blurred WebP, for showing while the real image loads."""
+        size = (PLACEHOLDER_WIDTH, max(1, round(img.height * PLACEHOLDER_WIDTH / img.width)))
+        small = img.resize(size, Image.BILINEAR)
+        buffer = io.BytesIO()
+        small.save(buffer, format="WEBP", quality=30)
+        return "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    def summary(self):
+        return f"Poster store: {self.stats['stored']} stored, {self.stats['deduped']} duplicate(s) skipped"
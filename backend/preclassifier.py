@@ -0,0 +1,166 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+
+from PIL import ImageStat
+
+try:
+    import pytesseract  # optional: local OCR of the poster text
+except ImportError:
+    pytesseract = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DECISION_LOG = os.path.join(BASE_DIR, "preclassifier_decisions.jsonl")
+
+# --- Scoring Weights ---
+# Positive = looks like a student event, negative = looks like an administrative notice.
+# Matched case-insensitively on whole words against subject, body and OCR text.
+KEYWORD_WEIGHTS = {
+    # Events
+    "hackathon": 2.5, "workshop": 2.0, "symposium": 2.0, "fest": 1.5, "webinar": 1.5,
+    "competition": 1.5, "contest": 1.5, "bootcamp": 1.5, "meetup": 1.5, "conference": 1.0,
+    "register now": 1.5, "registration link": 1.0, "prizes": 1.5, "prize pool": 2.0,
+    "team size": 1.5, "certificate": 0.5, "venue": 0.5, "speaker": 1.0, "guest lecture": 1.0,
+    "invitation": 0.5,
+    # Notices
+    "time table": -2.5, "timetable": -2.5, "exam schedule": -2.5, "arrear": -2.5,
+    "hall ticket": -2.5, "internal assessment": -2.0, "cat schedule": -2.0, "syllabus": -1.5,
+    "circular": -2.0, "attendance": -1.5, "marks": -1.0, "results": -1.0, "revaluation": -2.0,
+    "fee payment": -2.0, "fee receipt": -2.0, "tuition fee": -2.0, "holiday": -1.5,
+    "bus route": -2.0, "disciplinary": -2.0, "course registration": -2.0, "reschedule": -1.0,
+    "hostel": -0.5, "office order": -2.0, "notice": -0.5,
+}
+KEYWORD_RE = re.compile(
+    r'\b(' + '|'.join(re.escape(k) for k in sorted(KEYWORD_WEIGHTS, key=len, reverse=True)) + r')\b',
+    re.IGNORECASE,
+)
+# Each keyword counts once per text, and the total keyword contribution is clamped
+MAX_KEYWORD_SCORE = 6.0
+
+# Image heuristics: scanned notices/timetables are mostly white paper with little colour
+WHITE_LEVEL = 235
+NOTICE_WHITE_FRACTION = 0.70  # share of near-white pixels above which the image looks like a document
+POSTER_SATURATION = 60        # mean saturation (0-255) above which the image looks like a designed poster
+QR_BONUS = 1.5                # a registration QR code is a strong event signal
+
+STATS_SIDE = 256
+
+
+# --- Features ---
+
+def image_stats(img):
+    """
+    Cheap colour statistics of a poster image (computed on a small thumbnail):
+    white_fraction, mean saturation and aspect ratio (height / width).
+    """
+    thumb = img.copy()
+    thumb.thumbnail((STATS_SIDE, STATS_SIDE))
+    gray = thumb.convert("L")
+    histogram = gray.histogram()
+    pixels = sum(histogram) or 1
+    saturation = ImageStat.Stat(thumb.convert("HSV").getchannel("S")).mean[0]
+    return {
+        "white_fraction": round(sum(histogram[WHITE_LEVEL:]) / pixels, 3),
+        "saturation": round(saturation, 1),
+        "aspect": round(img.height / img.width, 2) if img.width else 0.0,
+    }
+
+
+def ocr_text(img):
+    """Poster text via local Tesseract, or "" when OCR is unavailable."""
+    if pytesseract is None:
+        return ""
+    try:
+        gray = img.convert("L")
+        gray.thumbnail((1600, 1600))
+        return pytesseract.image_to_string(gray)
+    except Exception:
+        return ""
+
+
+def keyword_score(*texts):
+    hits = {}
+    for text in texts:
+        if not text:
+            continue
+        for match in {m.group(1).lower() for m in KEYWORD_RE.finditer(text)}:
+            hits[match] = KEYWORD_WEIGHTS[match]
+    score = sum(hits.values())
+    return max(-MAX_KEYWORD_SCORE, min(MAX_KEYWORD_SCORE, score)), sorted(hits)
+
+
+def image_score(stats):
+    # Kept small enough that image statistics alone never reach the default threshold
+    if not stats:
+        return 0.0
+    score = 0.0
+    if stats["white_fraction"] >= NOTICE_WHITE_FRACTION:
+        score -= 1.5
+    if stats["saturation"] >= POSTER_SATURATION:
+        score += 1.5
+    elif stats["saturation"] < 15:
+        score -= 0.5
+    return score
+
+
+# --- Classifier ---
+
+class PreClassifier:
+    """
+    Local pre-filter in front of the LLM.
+
+    Combines keyword scoring (subject, body, optional OCR text), image colour statistics
+    and QR presence into a score; `non_event_confidence = 1 / (1 + e^score)`. Posters at
+    or above `threshold` are dropped without an LLM call.
+
+    Modes: "on" drops, "shadow" only logs what it would drop (for tuning the threshold),
+    "off" disables the stage. Every decision is appended to `decision_log` as JSON.
+    """
+
+    def __init__(self, mode="shadow", threshold=0.9, decision_log=DEFAULT_DECISION_LOG):
+        if mode not in ("on", "shadow", "off"):
+            raise ValueError(f"Unknown pre-classifier mode: {mode}")
+        self.mode = mode
+        self.threshold = threshold
+        self.decision_log = decision_log
+        self.lock = threading.Lock()
+        self.stats = {"checked": 0, "skipped": 0, "would_skip": 0}
+
+    def classify(self, uid, subject, body, stats=None, text="", qr_link=None):
+        """Returns True if the poster should still go to the LLM."""
+        if self.mode == "off":
+            return True
+
+        kw_score, keywords = keyword_score(subject, body, text)
+        score = kw_score + image_score(stats) + (QR_BONUS if qr_link else 0.0)
+        confidence = 1.0 / (1.0 + math.exp(score))
+        skip = confidence >= self.threshold
+
+        with self.lock:
+            self.stats["checked"] += 1
+            if skip:
+                self.stats["skipped" if self.mode == "on" else "would_skip"] += 1
+            self._log({
+                "ts": time.time(), "uid": uid, "subject": subject, "keywords": keywords,
+                "image": stats, "qr": bool(qr_link), "ocr": bool(text), "score": round(score, 2),
+                "non_event_confidence": round(confidence, 3), "skip": skip, "mode": self.mode,
+            })
+        return not (skip and self.mode == "on")
+
+    def _log(self, record):
+        if not self.decision_log:
+            return
+        try:
+            with open(self.decision_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError:
+            pass
+
+    def summary(self):
+        checked = self.stats["checked"]
+        if self.mode == "shadow":
+            return f"Pre-classifier (shadow): would have avoided {self.stats['would_skip']}/{checked} LLM calls"
+        return f"Pre-classifier: LLM calls avoided {self.stats['skipped']}/{checked}"
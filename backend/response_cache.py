@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Optional
+
+from flask import Response, request
+
+try:
+    import redis  # optional shared backend
+except ImportError:  # pragma: no cover
+    redis = None
+
+# Seconds a cached response stays valid; 0 disables caching (ETags are still sent)
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+# e.g. redis://localhost:6379/0 to share entries and invalidations across workers
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "")
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry expiry. Each worker process has its own copy."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.counters: dict = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def generation(self, namespace: str) -> int:
+        with self.lock:
+            return self.counters.get(namespace, 0)
+
+    def bump(self, namespace: str) -> None:
+        with self.lock:
+            self.counters[namespace] = self.counters.get(namespace, 0) + 1
+
+
+class RedisBackend:
+    """Shared backend: entries and namespace generations live in Redis."""
+
+    def __init__(self, url: str, prefix: str = "respcache:"):
+        if redis is None:
+            raise RuntimeError("RESPONSE_CACHE_URL is set but the redis package is not installed")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.hgetall(self.prefix + key)
+        if not raw:
+            return None
+        return raw[b"body"], raw[b"etag"].decode("ascii")
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        body, etag = value
+        pipe = self.client.pipeline()
+        pipe.hset(self.prefix + key, mapping={"body": body, "etag": etag})
+        pipe.pexpire(self.prefix + key, int(ttl * 1000))
+        pipe.execute()
+
+    def generation(self, namespace: str) -> int:
+        return int(self.client.get(f"{self.prefix}gen:{namespace}") or 0)
+
+    def bump(self, namespace: str) -> None:
+        self.client.incr(f"{self.prefix}gen:{namespace}")
+
+
+def _etag(body: bytes) -> str:
+    return hashlib.sha1(body).hexdigest()
+
+
+class ResponseCache:
+    """Read-through cache for JSON GET responses, with ETag / 304 support.
+
+    Entries are keyed by namespace generation + path + sorted query args. Writes call
+    `invalidate(namespace)`, which bumps the generation so every older entry is
+    skipped; the LRU (or Redis TTL) evicts them later.
+    """
+
+    def __init__(self, backend=None, ttl: float = RESPONSE_CACHE_TTL):
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        # Updated from concurrent request threads; read it through `snapshot_stats()`
+        self.stats_lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    def _count(self, name: str) -> None:
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def snapshot_stats(self) -> dict:
+        with self.stats_lock:
+            return dict(self.stats)
+
+    def _key(self, namespace: str) -> str:
+        args = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+        return f"{namespace}:{self.backend.generation(namespace)}:{request.path}?{args}"
+
+    def _respond(self, body: bytes, etag: str) -> Response:
+        if request.if_none_match.contains_weak(etag):
+            self._count("not_modified")
+            response = Response(status=304)
+        else:
+            response = Response(body, status=200, mimetype="application/json")
+        response.set_etag(etag)
+        # Let browsers reuse their copy but always revalidate with If-None-Match
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    def cached(self, namespace: str):
+        """Decorator for a view returning JSON; only 200 responses are cached."""
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                key = self._key(namespace) if self.ttl > 0 else None
+                entry = self.backend.get(key) if key else None
+                if entry is not None:
+                    self._count("hits")
+                    return self._respond(*entry)
+
+                self._count("misses")
+                result = view(*args, **kwargs)
+                response, status = result if isinstance(result, tuple) else (result, 200)
+                if status != 200 or not isinstance(response, Response):
+                    return result
+                body = response.get_data()
+                etag = _etag(body)
+                if key:
+                    self.backend.set(key, (body, etag), self.ttl)
+                return self._respond(body, etag)
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            self.backend.bump(namespace)
+
+
+def _default_backend():
+    return RedisBackend(RESPONSE_CACHE_URL) if RESPONSE_CACHE_URL else MemoryBackend()
+
+
+# Shared by the student (read) and admin (invalidate) routes
+response_cache = ResponseCache(_default_backend())
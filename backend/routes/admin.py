@@ -15,8 +15,14 @@ except Exception:  # pragma: no cover
 
 try:
     from ..db import get_club_admins_collection, get_db
+    from ..notifications import insert_notification
+    from ..pagination import fetch_page, select_fields
+    from ..response_cache import response_cache
 except ImportError:  # pragma: no cover
     from db import get_club_admins_collection, get_db
+    from notifications import insert_notification
+    from pagination import fetch_page, select_fields
+    from response_cache import response_cache
 
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
@@ -106,40 +112,6 @@ def club_admin_login():
         return jsonify({"error": str(exc)}), 500
 
 
-def _insert_notification(
-    db,
-    *,
-    student_id: str,
-    title: str,
-    message: str,
-    notif_type: str,
-    reference_id: str,
-) -> bool:
-    """Insert a notification if it doesn't already exist.
-
-    Dedupe key: (student_id, type, reference_id)
-    """
-
-    existing = db.notifications.find_one(
-        {"student_id": student_id, "type": notif_type, "reference_id": reference_id},
-        {"_id": 1},
-    )
-    if existing:
-        return False
-
-    doc = {
-        "student_id": student_id,
-        "title": title,
-        "message": message,
-        "type": notif_type,  # event | vacancy | certificate | od
-        "reference_id": reference_id,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "is_read": False,
-    }
-    db.notifications.insert_one(doc)
-    return True
-
-
 def _require_str(payload: dict, key: str) -> str:
     value = payload.get(key)
     if value is None:
@@ -307,9 +279,10 @@ def publish_event():
 
         db = get_db()
         db.events.insert_one(event_doc)
+        response_cache.invalidate("events")
 
         try:
-            _insert_notification(
+            insert_notification(
                 db,
                 student_id="all",
                 title="New Event Posted",
@@ -342,8 +315,12 @@ def list_vacancies_admin():
         if status:
             query["status"] = status
 
-        cursor = db.vacancies.find(query, {"_id": 0}).sort([("created_at", -1)])
-        return jsonify({"vacancies": list(cursor)}), 200
+        docs, next_cursor, fields = fetch_page(
+            db.vacancies, query, [("created_at", -1)], request.args, {"_id": 0}
+        )
+        return jsonify({"vacancies": [select_fields(d, fields) for d in docs], "next": next_cursor}), 200
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
@@ -401,10 +378,11 @@ def create_vacancy():
 
         db = get_db()
         db.vacancies.insert_one(vacancy_doc)
+        response_cache.invalidate("vacancies")
 
         if status == "Published":
             try:
-                _insert_notification(
+                insert_notification(
                     db,
                     student_id="all",
                     title="New Club Vacancies",
@@ -479,7 +457,7 @@ def send_certificate():
         }
         db.certificates.insert_one(certificate_doc)
 
-        _insert_notification(
+        insert_notification(
             db,
             student_id=student_id,
             title="Certificate Available",
@@ -551,9 +529,13 @@ def list_attendance_for_event():
             return jsonify({"error": "event_id query param is required"}), 400
 
         db = get_db()
-        cursor = db.attendances.find({"event_id": event_id}).sort([("marked_at", -1)])
-        records = [_attendance_public_doc(doc) for doc in cursor]
-        return jsonify({"attendances": records}), 200
+        docs, next_cursor, fields = fetch_page(
+            db.attendances, {"event_id": event_id}, [("marked_at", -1)], request.args
+        )
+        records = [select_fields(_attendance_public_doc(doc), fields) for doc in docs]
+        return jsonify({"attendances": records, "next": next_cursor}), 200
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
@@ -13,8 +13,12 @@ except ImportError:  # pragma: no cover
 
 try:
     from ..db import get_db
+    from ..notifications import insert_notification, notify_hostel_decision
+    from ..pagination import fetch_page, select_fields
 except ImportError:  # pragma: no cover
     from db import get_db
+    from notifications import insert_notification, notify_hostel_decision
+    from pagination import fetch_page, select_fields
 
 
 hod_bp = Blueprint("hod", __name__, url_prefix="/api/fa")
@@ -65,17 +69,6 @@ def _serialize_hostel_permission(doc: dict) -> dict:
     return out
 
 
-def _ensure_hostel_permissions_indexes(db) -> None:
-    try:
-        db.hostel_permissions.create_index("student_id")
-        db.hostel_permissions.create_index("status")
-        db.hostel_permissions.create_index("section")
-        db.hostel_permissions.create_index([("requested_at", -1)])
-    except Exception:
-        # Index creation is best-effort; shouldn't block requests.
-        pass
-
-
 @hod_bp.post("/od/approve")
 def approve_od_request():
     """Approve an OD request and notify the student once.
@@ -112,33 +105,17 @@ def approve_od_request():
             upsert=True,
         )
 
-        # Avoid duplicates: if already approved+notified, do nothing.
-        existing = db.notifications.find_one(
-            {"student_id": student_id, "type": "od", "reference_id": od_request_id},
-            {"_id": 1},
+        # Deduped on (student_id, "od", od_request_id): re-approving never re-notifies.
+        notified = insert_notification(
+            db,
+            student_id=student_id,
+            title="OD Approved",
+            message=f"Your OD request for {event_name} has been approved",
+            notif_type="od",
+            reference_id=od_request_id,
         )
-        if existing:
-            return jsonify({"success": True, "notified": False}), 200
 
-        # Once OD is approved, remove any previous OD-related notifications
-        # for this request so no further OD-related notifications appear.
-        db.notifications.delete_many(
-            {"student_id": student_id, "type": "od", "reference_id": od_request_id}
-        )
-
-        db.notifications.insert_one(
-            {
-                "student_id": student_id,
-                "title": "OD Approved",
-                "message": f"Your OD request for {event_name} has been approved",
-                "type": "od",
-                "reference_id": od_request_id,
-                "created_at": datetime.now(timezone.utc).isoformat(),
-                "is_read": False,
-            }
-        )
-
-        return jsonify({"success": True, "notified": True}), 200
+        return jsonify({"success": True, "notified": notified}), 200
 
     except ValueError as exc:
         return jsonify({"error": str(exc)}), 400
@@ -158,7 +135,6 @@ def list_hostel_permissions():
 
     try:
         db = get_db()
-        _ensure_hostel_permissions_indexes(db)
 
         query: dict = {}
         status = request.args.get("status")
@@ -175,10 +151,16 @@ def list_hostel_permissions():
         if student_id:
             query["student_id"] = student_id.strip()
 
-        cursor = db.hostel_permissions.find(query).sort(
-            [("requested_at", -1), ("responded_at", -1)]
+        docs, next_cursor, fields = fetch_page(
+            db.hostel_permissions,
+            query,
+            [("requested_at", -1), ("responded_at", -1)],
+            request.args,
         )
-        return jsonify({"hostel_permissions": [_serialize_hostel_permission(d) for d in cursor]}), 200
+        items = [select_fields(_serialize_hostel_permission(d), fields) for d in docs]
+        return jsonify({"hostel_permissions": items, "next": next_cursor}), 200
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
@@ -196,7 +178,6 @@ def send_hostel_permission_to_head(permission_id: str):
             return jsonify({"error": "permission_id is required"}), 400
 
         db = get_db()
-        _ensure_hostel_permissions_indexes(db)
 
         doc = db.hostel_permissions.find_one({"_id": permission_id})
         if not doc:
@@ -310,7 +291,6 @@ def update_hostel_permission_status(permission_id: str):
             return jsonify({"error": "status must be Pending, Approved, or Rejected"}), 400
 
         db = get_db()
-        _ensure_hostel_permissions_indexes(db)
 
         update: dict = {"status": status}
         if status in {"Approved", "Rejected"}:
@@ -325,6 +305,11 @@ def update_hostel_permission_status(permission_id: str):
         if result.matched_count == 0:
             return jsonify({"error": "hostel permission request not found"}), 404
 
+        try:
+            notify_hostel_decision(db, db.hostel_permissions.find_one({"_id": permission_id}) or {})
+        except Exception:
+            pass
+
         return jsonify({"success": True, "status": status, "responded_at": update.get("responded_at")}), 200
     except ValueError as exc:
         return jsonify({"error": str(exc)}), 400
@@ -6,8 +6,10 @@ from flask import Blueprint, jsonify, request, Response
 
 try:
     from ..db import get_db
+    from ..notifications import notify_hostel_decision
 except ImportError:  # pragma: no cover
     from db import get_db
+    from notifications import notify_hostel_decision
 
 
 hostel_bp = Blueprint("hostel", __name__, url_prefix="/api/hostel")
@@ -50,6 +52,12 @@ def respond_to_hostel_permission(permission_id: str):
             return jsonify({"error": "hostel permission request not found"}), 404
 
         doc = db.hostel_permissions.find_one({"_id": permission_id})
+        try:
+            notify_hostel_decision(db, doc or {})
+        except Exception:
+            # Notifications should not block the response page.
+            pass
+
         payload = {
             "success": True,
             "status": status,
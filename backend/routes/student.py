@@ -2,15 +2,23 @@ from __future__ import annotations
 
 from functools import wraps
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
 
 from datetime import datetime, timezone
 
 try:
     from ..db import get_db
+    from ..notification_stream import broker, stream_events
+    from ..notifications import annotate_read, mark_read, read_state, unread_count
+    from ..pagination import MAX_PAGE_LIMIT, fetch_page, select_fields
+    from ..response_cache import response_cache
 except ImportError:  # pragma: no cover
     from db import get_db
+    from notification_stream import broker, stream_events
+    from notifications import annotate_read, mark_read, read_state, unread_count
+    from pagination import MAX_PAGE_LIMIT, fetch_page, select_fields
+    from response_cache import response_cache
 
 
 student_bp = Blueprint("student", __name__, url_prefix="/api/student")
@@ -47,16 +55,6 @@ def _require_email(payload: dict, key: str) -> str:
     return value
 
 
-def _ensure_hostel_permissions_indexes(db) -> None:
-    try:
-        db.hostel_permissions.create_index("student_id")
-        db.hostel_permissions.create_index("status")
-        db.hostel_permissions.create_index("section")
-        db.hostel_permissions.create_index([("created_at", -1)])
-    except Exception:
-        pass
-
-
 def _serialize_hostel_permission(doc: dict) -> dict:
     out = {k: v for k, v in doc.items() if k != "_id"}
     if "_id" in doc:
@@ -66,21 +64,28 @@ def _serialize_hostel_permission(doc: dict) -> dict:
 
 @student_bp.get("/events")
 @student_required
+@response_cache.cached("events")
 def list_events():
     try:
         _user_id = get_jwt_identity()
         db = get_db()
-        cursor = (
-            db.events.find({"status": "Published"}, {"_id": 0})
-            .sort([("date", 1), ("time_from", 1)])
+        docs, next_cursor, fields = fetch_page(
+            db.events,
+            {"status": "Published"},
+            [("date", 1), ("time_from", 1)],
+            request.args,
+            {"_id": 0},
         )
-        return jsonify({"events": list(cursor)}), 200
+        return jsonify({"events": [select_fields(d, fields) for d in docs], "next": next_cursor}), 200
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
 
 @student_bp.get("/vacancies")
 @student_required
+@response_cache.cached("vacancies")
 def list_vacancies():
     try:
         _user_id = get_jwt_identity()
@@ -91,12 +96,35 @@ def list_vacancies():
         if club_name:
             query["club_name"] = club_name
 
-        cursor = db.vacancies.find(query, {"_id": 0}).sort([("created_at", -1)])
-        return jsonify({"vacancies": list(cursor)}), 200
+        docs, next_cursor, fields = fetch_page(
+            db.vacancies, query, [("created_at", -1)], request.args, {"_id": 0}
+        )
+        return jsonify({"vacancies": [select_fields(d, fields) for d in docs], "next": next_cursor}), 200
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
 
+def _student_id_arg(value) -> str:
+    if not (value and isinstance(value, str) and value.strip()):
+        raise ValueError("student_id is required")
+    return value.strip()
+
+
+def _parse_since(value):
+    """`since` watermark (ISO timestamp) normalised to the stored created_at format."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError("since must be an ISO 8601 timestamp")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
 @student_bp.get("/notifications")
 @student_required
 def list_notifications():
@@ -104,30 +132,140 @@ def list_notifications():
 
     Query params:
     - student_id: the student's identifier (e.g., register number)
+    - since: optional `fetched_at` of a previous response; only newer notifications are returned
 
-    Returns notifications in reverse chronological order.
+    Returns notifications in reverse chronological order with this student's `is_read`,
+    plus `unread_count` and `fetched_at` (the newest `created_at` matching the query, read
+    before the page so nothing inserted meanwhile is skipped; send it back as `since`).
     """
 
     try:
         _user_id = get_jwt_identity()
         db = get_db()
 
-        student_id = request.args.get("student_id")
-        if not (student_id and isinstance(student_id, str) and student_id.strip()):
-            return jsonify({"error": "student_id is required"}), 400
-        student_id = student_id.strip()
+        student_id = _student_id_arg(request.args.get("student_id"))
+        since = _parse_since(request.args.get("since"))
 
         query = {"student_id": {"$in": ["all", student_id]}}
-        cursor = db.notifications.find(query, {"_id": 0}).sort([("created_at", -1)])
+        if since:
+            query["created_at"] = {"$gt": since}
+        newest = db.notifications.find_one(query, {"_id": 0, "created_at": 1}, sort=[("created_at", -1)])
+        fetched_at = (newest or {}).get("created_at") or since or datetime.now(timezone.utc).isoformat()
+        docs, next_cursor, fields = fetch_page(
+            db.notifications,
+            query,
+            [("created_at", -1)],
+            request.args,
+            {"_id": 0},
+            required=("student_id", "seq", "is_read"),
+        )
+
+        state = read_state(db, student_id)
+        annotate_read(docs, state)
         return (
             jsonify(
                 {
-                    "notifications": list(cursor),
-                    "fetched_at": datetime.now(timezone.utc).isoformat(),
+                    "notifications": [select_fields(d, fields) for d in docs],
+                    "next": next_cursor,
+                    "unread_count": unread_count(db, student_id, state),
+                    "fetched_at": fetched_at,
                 }
             ),
             200,
         )
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except Exception as exc:
+        return jsonify({"error": str(exc)}), 500
+
+
+@student_bp.get("/notifications/unread-count")
+@student_required
+def get_unread_count():
+    """Unread notifications for a student, from two counter lookups (no notification scan).
+
+    Query params:
+    - student_id: the student's identifier
+    """
+
+    try:
+        db = get_db()
+        student_id = _student_id_arg(request.args.get("student_id"))
+        return jsonify({"unread_count": unread_count(db, student_id)}), 200
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except Exception as exc:
+        return jsonify({"error": str(exc)}), 500
+
+
+@student_bp.post("/notifications/read")
+@student_required
+def mark_notifications_read():
+    """Mark every notification published so far as read for a student.
+
+    Body: {"student_id": "..."}
+    """
+
+    if not request.is_json:
+        return jsonify({"error": "Request body must be JSON"}), 400
+
+    payload = request.get_json(silent=True) or {}
+
+    try:
+        db = get_db()
+        student_id = _student_id_arg(_require_str(payload, "student_id"))
+        state = mark_read(db, student_id)
+        return jsonify({"success": True, "unread_count": 0, "read_at": state["read_at"]}), 200
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    except Exception as exc:
+        return jsonify({"error": str(exc)}), 500
+
+
+@student_bp.get("/notifications/stream")
+@student_required
+def stream_notifications():
+    """Server-Sent Events stream of new notifications for a student.
+
+    Query params:
+    - student_id: the student's identifier
+    - since: optional watermark (`fetched_at` of the last list call); missed notifications
+      newer than it are sent first. A reconnecting EventSource sends Last-Event-ID instead.
+
+    Events are `notification` with the document as JSON; `: ping` comments keep idle
+    connections open.
+    """
+
+    try:
+        db = get_db()
+        student_id = _student_id_arg(request.args.get("student_id"))
+        since = _parse_since(request.headers.get("Last-Event-ID") or request.args.get("since"))
+
+        # Subscribe before reading the backlog so nothing inserted in between is lost
+        subscription = broker.subscribe(student_id)
+        backlog = []
+        if since:
+            try:
+                backlog = list(
+                    db.notifications.find(
+                        {"student_id": {"$in": ["all", student_id]}, "created_at": {"$gt": since}},
+                        {"_id": 0},
+                    )
+                    .sort([("created_at", 1), ("_id", 1)])
+                    .limit(MAX_PAGE_LIMIT)
+                )
+                annotate_read(backlog, read_state(db, student_id))
+            except Exception:
+                broker.unsubscribe(subscription)
+                raise
+
+        return Response(
+            stream_events(subscription, backlog),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
@@ -152,22 +290,25 @@ def list_certificates():
             return jsonify({"error": "student_id is required"}), 400
         student_id = student_id.strip()
 
-        cursor = (
-            db.certificates.find(
-                {"student_id": student_id, "status": "Issued"},
-                {"_id": 0},
-            )
-            .sort([("issued_at", -1)])
+        docs, next_cursor, fields = fetch_page(
+            db.certificates,
+            {"student_id": student_id, "status": "Issued"},
+            [("issued_at", -1)],
+            request.args,
+            {"_id": 0},
         )
         return (
             jsonify(
                 {
-                    "certificates": list(cursor),
+                    "certificates": [select_fields(d, fields) for d in docs],
+                    "next": next_cursor,
                     "fetched_at": datetime.now(timezone.utc).isoformat(),
                 }
             ),
             200,
         )
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
 
@@ -215,7 +356,6 @@ def create_hostel_permission_request():
         hostel_head_email = _require_email(payload, "hostel_head_email")
 
         db = get_db()
-        _ensure_hostel_permissions_indexes(db)
 
         # Use deterministic id from client if provided, otherwise create one.
         # This keeps schema clean (still just Mongo _id + specified fields).
@@ -269,16 +409,21 @@ def list_hostel_permission_requests():
     try:
         _user_id = get_jwt_identity()
         db = get_db()
-        _ensure_hostel_permissions_indexes(db)
 
         student_id = request.args.get("student_id")
         if not (student_id and isinstance(student_id, str) and student_id.strip()):
             return jsonify({"error": "student_id is required"}), 400
         student_id = student_id.strip()
 
-        cursor = db.hostel_permissions.find({"student_id": student_id}).sort(
-            [("created_at", -1), ("requested_at", -1)]
+        docs, next_cursor, fields = fetch_page(
+            db.hostel_permissions,
+            {"student_id": student_id},
+            [("created_at", -1), ("requested_at", -1)],
+            request.args,
         )
-        return jsonify({"hostel_permissions": [_serialize_hostel_permission(d) for d in cursor]}), 200
+        items = [select_fields(_serialize_hostel_permission(d), fields) for d in docs]
+        return jsonify({"hostel_permissions": items, "next": next_cursor}), 200
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     except Exception as exc:
         return jsonify({"error": str(exc)}), 500
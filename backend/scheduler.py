@@ -1,12 +1,20 @@
+import argparse
+import json
 import logging
 import os
-import sys
+import threading
 import time
-import subprocess
-from datetime import datetime
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from functools import partial
+
+import upcoming_scraper
+import knowafest_frontend_bridge
+import metrics as pipeline_metrics
 
 # Configure logging
-log_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scheduler.log')
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+log_file = os.path.join(SCRIPT_DIR, 'scheduler.log')
 logging.basicConfig(
     filename=log_file,
     level=logging.INFO,
@@ -14,58 +22,196 @@ logging.basicConfig(
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 
-def run_job():
+# Persisted last-run times, used to catch up on windows missed while the scheduler was down
+STATE_FILE = os.path.join(SCRIPT_DIR, 'scheduler_state.json')
+# Cron expression (minute hour day-of-month month day-of-week); default 18:00 daily
+SCRAPE_CRON = os.getenv("SCRAPE_CRON", "0 18 * * *")
+# Upper bound for one sleep, so clock changes / suspend are noticed reasonably soon
+MAX_SLEEP_SECONDS = 300
+
+
+# --- Cron Expressions ---
+
+class CronExpression:
+    """
+    Minimal 5-field cron expression: `minute hour day-of-month month day-of-week`.
+
+    Each field accepts `*`, numbers, ranges (`1-5`), lists (`1,15`) and steps (`*/10`,
+    `8-18/2`). Day-of-week uses 0-6 with 0 (or 7) = Sunday. As in cron, when both
+    day-of-month and day-of-week are restricted a day matches if either does.
+    """
+
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        parsed = [self._parse_field(f, lo, hi) for f, (lo, hi) in zip(fields, self.FIELD_RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {0 if d == 7 else d for d in weekdays}
+        self.day_restricted = fields[2] != "*"
+        self.weekday_restricted = fields[4] != "*"
+
+    @staticmethod
+    def _parse_field(field, lo, hi):
+        values = set()
+        for part in field.split(','):
+            base, _, step = part.partition('/')
+            step = int(step) if step else 1
+            if base == '*':
+                start, end = lo, hi
+            elif '-' in base:
+                start, end = (int(x) for x in base.split('-', 1))
+            else:
+                start = int(base)
+                end = hi if step > 1 else start
+            if start < lo or end > hi or start > end or step < 1:
+                raise ValueError(f"Invalid cron field: {field!r}")
+            values.update(range(start, end + 1, step))
+        return sorted(values)
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        dom = day.day in self.days
+        dow = (day.weekday() + 1) % 7 in self.weekdays  # Python: Monday=0, cron: Sunday=0
+        if self.day_restricted and self.weekday_restricted:
+            return dom or dow
+        return dom and dow
+
+    def next_fire(self, after):
+        """First matching minute strictly after `after`."""
+        start = (after + timedelta(minutes=1)).replace(second=0, microsecond=0)
+        day = start.date()
+        for _ in range(366 * 5):  # enough for any satisfiable expression (e.g. Feb 29)
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = datetime(day.year, day.month, day.day, hour, minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+
+# --- Persisted State ---
+
+def load_state():
+    try:
+        with open(STATE_FILE, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state):
+    tmp_path = f"{STATE_FILE}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_FILE)
+
+
+# --- Pipeline ---
+
+class _LogWriter:
+    """File-like object that forwards each printed line to the log as it is written."""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.buffer = ""
+        # redirect_stdout is process-wide, so stage worker threads print through here too
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        with self.lock:
+            self.buffer += text
+            while "\n" in self.buffer:
+                line, self.buffer = self.buffer.split("\n", 1)
+                if line.strip():
+                    logging.info(f"[{self.prefix}] {line}")
+        return len(text)
+
+    def flush(self):
+        with self.lock:
+            if self.buffer.strip():
+                logging.info(f"[{self.prefix}] {self.buffer}")
+            self.buffer = ""
+
+
+# Stages run in order inside this process; a failing stage is logged and the next one still runs.
+# The scraper resumes a crashed run's checkpoint (a fresh run would overwrite it) and
+# starts fresh when there is none.
+PIPELINE = [
+    ("Scraper", partial(upcoming_scraper.scrape_upcoming_fests, resume=True)),
+    ("Bridge", knowafest_frontend_bridge.main),
+]
+
+def run_job(profile=False):
+    """Runs every stage; each one appends a JSON metrics line (see metrics.py), and with
+    `profile` its cProfile stats are dumped to profiles/."""
     logging.info("--- Starting Scheduled Scraping Job ---")
     print(f"[{datetime.now()}] --- Starting Scheduled Scraping Job ---")
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    scraper_path = os.path.join(script_dir, 'upcoming_scraper.py')
-    bridge_path = os.path.join(script_dir, 'knowafest_frontend_bridge.py')
 
-    try:
-        # Run Scraper
-        logging.info("Running Scraper...")
-        result = subprocess.run([sys.executable, scraper_path], capture_output=True, text=True)
-        logging.info(f"Scraper Output: {result.stdout}")
-        if result.stderr:
-            logging.error(f"Scraper Error: {result.stderr}")
-        
-        # Run Bridge
-        logging.info("Running Frontend Bridge...")
-        result = subprocess.run([sys.executable, bridge_path], capture_output=True, text=True)
-        logging.info(f"Bridge Output: {result.stdout}")
-        if result.stderr:
-            logging.error(f"Bridge Error: {result.stderr}")
-            
-        logging.info("--- Job Completed ---")
-        
-    except Exception as e:
-        logging.error(f"Job failed exception: {e}")
-
-def main():
-    logging.info("Scheduler started. Waiting for 18:00 daily.")
-    print(f"[{datetime.now()}] Scheduler started. Waiting for 18:00 daily.")
-    
-    last_run_date = None
-    
+    for name, stage in PIPELINE:
+        logging.info(f"Running {name}...")
+        started = time.monotonic()
+        writer = _LogWriter(name)
+        try:
+            with redirect_stdout(writer), pipeline_metrics.stage(name, profile=profile):
+                stage()
+        except Exception as e:
+            logging.exception(f"{name} Error: {e}")
+        finally:
+            writer.flush()
+        logging.info(f"{name} finished in {time.monotonic() - started:.1f}s")
+
+    logging.info("--- Job Completed ---")
+
+def main(profile=False):
+    cron = CronExpression(SCRAPE_CRON)
+    state = load_state()
+    job_state = state.setdefault("scrape", {})
+
+    logging.info(f"Scheduler started. Schedule: '{cron.expression}'.")
+    print(f"[{datetime.now()}] Scheduler started. Schedule: '{cron.expression}'.")
+
+    last_run = job_state.get("last_run")
+    if last_run:
+        # Catch up if a scheduled time passed while we were not running
+        next_run = cron.next_fire(datetime.fromisoformat(last_run))
+    else:
+        next_run = cron.next_fire(datetime.now())
+    logging.info(f"Next run at {next_run:%Y-%m-%d %H:%M}.")
+
     while True:
         now = datetime.now()
-        
-        # Check if it's 18:00 (6 PM)
-        if now.hour == 18 and now.minute == 0:
-             # Ensure we haven't run already today
-             if last_run_date != now.date():
-                run_job()
-                last_run_date = now.date()
-                # Sleep long enough to pass the minute
-                time.sleep(60)
-        
-        # Check every 30 seconds
-        time.sleep(30)
+        if now < next_run:
+            time.sleep(min((next_run - now).total_seconds(), MAX_SLEEP_SECONDS))
+            continue
+
+        if now - next_run > timedelta(minutes=1):
+            logging.info(f"Missed run at {next_run:%Y-%m-%d %H:%M}. Catching up now.")
+
+        run_job(profile=profile)
+        job_state["last_run"] = datetime.now().isoformat(timespec="seconds")
+        save_state(state)
+        next_run = cron.next_fire(datetime.now())
+        logging.info(f"Next run at {next_run:%Y-%m-%d %H:%M}.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs the scrape pipeline on SCRAPE_CRON.")
     # Allow running immediately for testing
-    if len(sys.argv) > 1 and sys.argv[1] == 'test':
+    parser.add_argument("mode", nargs="?", choices=["test"], help="'test' runs the job once, now")
+    parser.add_argument("--profile", action="store_true", help="dump cProfile stats per stage to profiles/")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("METRICS_PORT", "0")),
+                        help="serve Prometheus metrics on this local port")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        pipeline_metrics.metrics.serve(args.metrics_port)
+    if args.mode == 'test':
         print("Running in TEST mode (immediate execution)...")
-        run_job()
+        run_job(profile=args.profile)
     else:
-        main()
+        main(profile=args.profile)
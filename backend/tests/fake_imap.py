@@ -0,0 +1,131 @@
+"""Minimal IMAP4rev1 server for tests: LOGIN, SELECT, UID SEARCH, UID FETCH, LOGOUT.
+
+Each message may script how its BODYSTRUCTURE response looks on the wire (literals,
+UID before or after the structure), and unsolicited FETCH responses can be interleaved,
+so client-side parsing is exercised against the shapes real servers send.
+"""
+
+import re
+import socketserver
+import threading
+from dataclasses import dataclass, field
+from typing import List, Union
+
+
+class Literal(bytes):
+    """A BODYSTRUCTURE segment sent as an IMAP literal ({n}\\r\\n...)."""
+
+
+@dataclass
+class FakeMessage:
+    uid: int
+    subject: str
+    bodystructure: List[Union[bytes, Literal]]
+    uid_last: bool = False  # send "BODYSTRUCTURE (...) UID n" instead of "UID n BODYSTRUCTURE (...)"
+    body: bytes = b"Hello"
+
+    @property
+    def header(self) -> bytes:
+        return (f"From: club@example.com\r\nTo: student@example.com\r\nSubject: {self.subject}\r\n"
+                f"Date: Mon, 06 Oct 2025 10:00:00 +0000\r\n\r\n").encode()
+
+
+@dataclass
+class Mailbox:
+    messages: List[FakeMessage]
+    unsolicited: List[bytes] = field(default_factory=list)  # untagged lines sent inside FETCH replies
+    fail: set = field(default_factory=set)  # FETCH item names answered with BAD
+    requests: List[bytes] = field(default_factory=list)
+
+
+def _uid_set(spec: bytes) -> set:
+    uids = set()
+    for part in spec.split(b","):
+        if b":" in part:
+            low, high = part.split(b":")
+            uids.update(range(int(low), int(high) + 1 if high != b"*" else 10 ** 9))
+        else:
+            uids.add(int(part))
+    return uids
+
+
+def _literal(data: bytes) -> bytes:
+    return b"{%d}\r\n" % len(data) + data
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def send(self, line: bytes) -> None:
+        self.wfile.write(line + b"\r\n")
+
+    def handle(self) -> None:
+        box: Mailbox = self.server.mailbox
+        self.send(b"* OK [CAPABILITY IMAP4rev1] fake server ready")
+        for line in self.rfile:
+            tag, _, command = line.rstrip(b"\r\n").partition(b" ")
+            box.requests.append(command)
+            name = command.split(b" ", 1)[0].upper()
+            if name == b"LOGOUT":
+                self.send(b"* BYE logging out")
+                self.send(tag + b" OK LOGOUT completed")
+                return
+            if name == b"SELECT" or name == b"EXAMINE":
+                self.send(b"* %d EXISTS" % len(box.messages))
+                self.send(tag + b" OK [READ-WRITE] SELECT completed")
+            elif name == b"UID":
+                self.uid_command(tag, command.split(b" ", 2)[1].upper(), command.split(b" ", 2)[2], box)
+            else:
+                self.send(tag + b" OK " + name + b" completed")
+
+    def uid_command(self, tag: bytes, name: bytes, args: bytes, box: Mailbox) -> None:
+        if name == b"SEARCH":
+            match = re.search(rb"UID ([\d,:*]+)", args)
+            wanted = _uid_set(match.group(1)) if match else None
+            found = [m.uid for m in box.messages if wanted is None or m.uid in wanted]
+            self.send(b"* SEARCH " + b" ".join(str(uid).encode() for uid in found))
+            self.send(tag + b" OK SEARCH completed")
+            return
+
+        spec, items = args.split(b" ", 1)
+        items = items.upper()
+        if any(item in items for item in box.fail):
+            self.send(tag + b" BAD fetch failed")
+            return
+        wanted = _uid_set(spec)
+        sent_unsolicited = False
+        for seq, message in enumerate(box.messages, start=1):
+            if message.uid not in wanted:
+                continue
+            uid = b"UID %d" % message.uid
+            if b"BODYSTRUCTURE" in items:
+                structure = b"BODYSTRUCTURE " + b"".join(
+                    _literal(part) if isinstance(part, Literal) else part for part in message.bodystructure
+                )
+                parts = [structure, uid] if message.uid_last else [uid, structure]
+            else:
+                section = b"BODY[HEADER]" if b"[HEADER]" in items else b"BODY[]"
+                data = message.header if b"[HEADER]" in items else message.header + message.body
+                parts = [uid, b"FLAGS ()", b"RFC822.SIZE %d" % len(data), section + b" " + _literal(data)]
+            self.send(b"* %d FETCH (" % seq + b" ".join(parts) + b")")
+            if not sent_unsolicited:
+                for extra in box.unsolicited:
+                    self.send(extra)
+                sent_unsolicited = True
+        self.send(tag + b" OK FETCH completed")
+
+
+class FakeImapServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, mailbox: Mailbox):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.mailbox = mailbox
+        self.port = self.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,49 @@
+"""Incremental runs of the knowafest bridge and its TRANSFORM_VERSION-tagged cache."""
+
+import json
+
+import pytest
+
+import knowafest_frontend_bridge as bridge
+from event_store import EventStore
+
+
+@pytest.fixture
+def paths(tmp_path):
+    store = EventStore(str(tmp_path / "events.jsonl"), legacy_path=None)
+    store.append_many([
+        {"fest_name": f"Fest {i}", "event_url": f"https://example.com/{i}", "registration_fees": "Rs. 100"}
+        for i in range(3)
+    ])
+    return store, str(tmp_path / "external_events.json"), str(tmp_path / "cache.json")
+
+
+def run(paths, capsys, incremental=True):
+    store, output_path, cache_path = paths
+    bridge.main(incremental=incremental, store=store, output_path=output_path, cache_path=cache_path)
+    return capsys.readouterr().out
+
+
+def test_unchanged_records_are_reused(paths, capsys):
+    assert "transformed: 3, reused: 0" in run(paths, capsys)
+    with open(paths[2], encoding="utf-8") as f:
+        assert json.load(f)["version"] == bridge.TRANSFORM_VERSION
+
+    assert "No changes" in run(paths, capsys)
+
+
+def test_cache_from_another_transform_version_is_discarded(paths, capsys, monkeypatch):
+    run(paths, capsys)
+    monkeypatch.setattr(bridge, "TRANSFORM_VERSION", bridge.TRANSFORM_VERSION + 1)
+
+    assert "transformed: 3, reused: 0" in run(paths, capsys)
+
+
+def test_unversioned_cache_is_discarded(paths, capsys):
+    store, output_path, cache_path = paths
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump({bridge.record_fingerprint(item): {"id": "stale"} for item in store.iter_events()}, f)
+
+    assert "transformed: 3, reused: 0" in run(paths, capsys)
+    with open(output_path, encoding="utf-8") as f:
+        assert all(event["id"] != "stale" for event in json.load(f))
@@ -0,0 +1,71 @@
+"""EventWriter retries: per-sink progress and idempotent Mongo upserts."""
+
+import json
+import os
+
+import pytest
+
+for module in ("fitz", "imap_tools", "google.genai", "pyzbar.pyzbar", "pymongo"):
+    pytest.importorskip(module, exc_type=ImportError)
+
+os.environ.setdefault("EMAIL_LLM_BACKEND", "stub")
+
+import email_scraper as es  # noqa: E402
+
+
+class FlakyCollection:
+    """Applies the first `apply_first` upserts of a call, then fails; later calls succeed."""
+
+    def __init__(self, failures=1, apply_first=1):
+        self.docs = {}
+        self.failures = failures
+        self.apply_first = apply_first
+
+    def bulk_write(self, ops, ordered=True):
+        for i, op in enumerate(ops):
+            if self.failures and i == self.apply_first:
+                self.failures -= 1
+                raise RuntimeError("connection reset")
+            doc = op._doc["$setOnInsert"]
+            self.docs.setdefault(op._filter["source_key"], doc)
+
+
+def extracted(uid):
+    return {"is_event": True, "event_title": f"Hackathon {uid}", "venue": "Main Hall",
+            "start_date": "2026-03-14 09:30", "end_date": "2026-03-15", "category": "Cultural fest",
+            "organizer": "IEEE", "registration_link": "None", "email_uid": uid,
+            "email_subject": f"Invite {uid}", "image_url": f"/posters/{uid}.jpg"}
+
+
+def test_mongo_failure_does_not_rewrite_the_file_or_duplicate_docs(tmp_path):
+    path = tmp_path / "events.jsonl"
+    collection = FlakyCollection()
+    writer = es.EventWriter(path=str(path), legacy_path=None, batch_size=10, sink="both",
+                            collection=collection)
+    for uid in ("1", "2", "3"):
+        writer.add(extracted(uid))
+
+    with pytest.raises(RuntimeError):
+        writer.flush()
+    assert list(collection.docs) == ["email:1"]
+    writer.add(extracted("4"))
+    writer.flush()
+
+    lines = [json.loads(line)["email_uid"] for line in path.read_text().splitlines()]
+    assert lines == ["1", "2", "3", "4"]
+    assert sorted(collection.docs) == ["email:1", "email:2", "email:3", "email:4"]
+    assert writer.pending == {"file": [], "mongo": []}
+
+
+def test_event_document_uses_the_events_schema():
+    doc = es.event_document(extracted("7"))
+
+    assert doc["source_key"] == "email:7"
+    assert doc["event_name"] == "Hackathon 7"
+    assert (doc["date"], doc["start_date"], doc["end_date"]) == ("2026-03-14", "2026-03-14", "2026-03-15")
+    assert (doc["time_from"], doc["time_to"]) == ("09:30", "")
+    assert doc["location"] == "Main Hall"
+    assert doc["event_type"] == "Non-Technical"
+    assert doc["club_name"] == "IEEE"
+    assert doc["contact_details"] == ""
+    assert "event_title" not in doc
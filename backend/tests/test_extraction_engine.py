@@ -0,0 +1,59 @@
+"""Golden-file tests for extraction_engine and the knowafest bridge transform.
+
+tests/golden/knowafest_events.json is the output of the bridge before the extraction
+engine existed (inline regexes in transform_event), for the records in
+tests/golden/knowafest_records.json. Quirks such as "₹," are kept on purpose: the
+engine must reproduce the old output exactly.
+"""
+
+import json
+import os
+
+import pytest
+
+from extraction_engine import FIELDS, extract_fee, extract_fields
+from knowafest_frontend_bridge import extraction_row, make_event_id, record_fingerprint, transform_event
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+
+def load_golden(name):
+    with open(os.path.join(GOLDEN_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def records():
+    return load_golden("knowafest_records.json")
+
+
+def test_bridge_output_matches_golden(records):
+    expected = load_golden("knowafest_events.json")
+    events = [
+        transform_event(item, make_event_id(item, record_fingerprint(item)), extract_fields(*extraction_row(item)))
+        for item in records
+    ]
+
+    assert len(events) == len(expected)
+    for event, golden in zip(events, expected):
+        assert event == golden, event["title"]
+
+
+def test_extract_fields_returns_every_field(records):
+    for item in records:
+        assert tuple(extract_fields(*extraction_row(item))) == FIELDS
+
+
+@pytest.mark.parametrize("fee_text, expected", [
+    ("Rs. 500", "₹500"),
+    ("INR 1,200 per team", "₹1,200"),
+    ("300/- per head", "₹300"),
+    ("150 for online participants", "₹150"),
+    ("Fee 2026 applicable", "Paid"),
+    ("No registration fee", "Free"),
+    ("N/A", "Check Link"),
+    ("   ", "Check Link"),
+    (None, "Check Link"),
+])
+def test_extract_fee(fee_text, expected):
+    assert extract_fee(fee_text) == expected
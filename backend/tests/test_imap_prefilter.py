@@ -0,0 +1,109 @@
+"""The BODYSTRUCTURE prefilter in email_scraper, against a fake IMAP server."""
+
+import os
+
+import pytest
+
+for module in ("fitz", "imap_tools", "google.genai", "pyzbar.pyzbar"):
+    pytest.importorskip(module, exc_type=ImportError)  # pyzbar raises ImportError without libzbar
+
+os.environ.setdefault("EMAIL_LLM_BACKEND", "stub")
+
+import email_scraper as es  # noqa: E402
+from imap_tools import MailBoxUnencrypted  # noqa: E402
+
+from fake_imap import FakeImapServer, FakeMessage, Literal, Mailbox  # noqa: E402
+
+TEXT = b'("text" "plain" ("charset" "utf-8") NIL NIL "7bit" 120 4 NIL NIL NIL NIL)'
+IMAGE = (b'(("text" "plain" ("charset" "utf-8") NIL NIL "7bit" 12 1 NIL NIL NIL NIL)'
+         b'("image" "jpeg" ("name" "poster.jpg") NIL NIL "base64" 51234 NIL '
+         b'("attachment" ("filename" "poster.jpg")) NIL NIL) "mixed" ("boundary" "b1") NIL NIL NIL)')
+
+
+def image_with_literal_name(name: bytes):
+    """Image part whose filename is sent as a literal, splitting the response in two items."""
+    return [
+        b'(("text" "plain" ("charset" "utf-8") NIL NIL "7bit" 12 1 NIL NIL NIL NIL)'
+        b'("image" "png" ("name" ',
+        Literal(name),
+        b') NIL NIL "base64" 4096 NIL NIL NIL NIL) "mixed" ("boundary" "b2") NIL NIL NIL)',
+    ]
+
+
+def pdf_as_octet_stream(name: bytes):
+    """A PDF only recognisable by its (literal) filename."""
+    return [
+        b'(("text" "plain" ("charset" "utf-8") NIL NIL "7bit" 12 1 NIL NIL NIL NIL)'
+        b'("application" "octet-stream" ("name" ',
+        Literal(name),
+        b') NIL NIL "base64" 4096 NIL NIL NIL NIL) "mixed" ("boundary" "b3") NIL NIL NIL)',
+    ]
+
+
+@pytest.fixture
+def imap():
+    servers = []
+
+    def connect(mailbox: Mailbox):
+        server = FakeImapServer(mailbox).__enter__()
+        servers.append(server)
+        return MailBoxUnencrypted("127.0.0.1", server.port).login("student", "secret")
+
+    yield connect
+    for server in servers:
+        server.__exit__(None, None, None)
+
+
+@pytest.fixture
+def processed(tmp_path, monkeypatch):
+    log = es.ProcessedUidLog(str(tmp_path / "processed.log"), legacy_path=None)
+    monkeypatch.setattr(es, "processed_log", log)
+    yield log
+    log.close()
+
+
+def test_poster_uids_groups_responses_by_sequence_number(imap):
+    mailbox = imap(Mailbox(
+        messages=[
+            FakeMessage(300, "Plain text", [TEXT]),
+            # UID after the structure, and a literal splitting the response
+            FakeMessage(301, "Hackathon", image_with_literal_name(b"hack.png"), uid_last=True),
+            FakeMessage(302, "Notes", [TEXT[:-1] + b' ("name" "UID 999 notes.txt"))'], uid_last=True),
+            FakeMessage(303, "Workshop", pdf_as_octet_stream(b"workshop.pdf")),
+            FakeMessage(304, "Symposium", [IMAGE], uid_last=True),
+        ],
+        unsolicited=[b"* 9 FETCH (FLAGS (\\Seen))"],
+    ))
+
+    assert es._poster_uids(mailbox, ["300", "301", "302", "303", "304"]) == {"301", "303", "304"}
+
+
+def test_poster_uids_keeps_uids_without_a_response(imap):
+    mailbox = imap(Mailbox(messages=[FakeMessage(300, "Plain text", [TEXT])]))
+
+    assert es._poster_uids(mailbox, ["300", "305"]) == {"305"}
+
+
+def test_poster_uids_keeps_the_batch_when_the_fetch_fails(imap):
+    mailbox = imap(Mailbox(messages=[FakeMessage(300, "Plain text", [TEXT])], fail={b"BODYSTRUCTURE"}))
+
+    assert es._poster_uids(mailbox, ["300"]) == {"300"}
+
+
+def test_fetch_candidate_messages_marks_filtered_uids(imap, processed, monkeypatch):
+    monkeypatch.setattr(es, "FETCH_BATCH_SIZE", 2)
+    box = Mailbox(messages=[
+        FakeMessage(400, "Exam Schedule for November", [IMAGE]),
+        FakeMessage(401, "Weekly newsletter", [TEXT], uid_last=True),
+        FakeMessage(402, "Robotics Workshop", image_with_literal_name(b"robo.png"), uid_last=True),
+        FakeMessage(403, "Coding contest", pdf_as_octet_stream(b"contest.pdf")),
+    ])
+    mailbox = imap(box)
+
+    fetched = [msg.uid for msg in es.fetch_candidate_messages(mailbox, ["400", "401", "402", "403"])]
+
+    assert fetched == ["403", "402"]
+    assert processed.uids == {"400", "401"}
+    # Full bodies were only requested for the survivors
+    full_fetches = [r for r in box.requests if b"BODY[]" in r.upper()]
+    assert all(b"400" not in r and b"401" not in r for r in full_fetches)
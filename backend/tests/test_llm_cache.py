@@ -0,0 +1,65 @@
+"""Perceptual lookups in llm_cache.ExtractionCache."""
+
+import io
+import random
+import sqlite3
+
+from PIL import Image, ImageDraw
+
+from llm_cache import ExtractionCache, _bands, _hamming, perceptual_hash, subject_scope
+
+
+def poster(seed, quality=90, size=(600, 800)):
+    rng = random.Random(seed)
+    img = Image.new("RGB", size, (240, 230, 210))
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.rectangle((x, y, x + rng.randrange(60, 240), y + rng.randrange(40, 200)),
+                       fill=tuple(rng.randrange(256) for _ in range(3)))
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def test_bands_find_every_hash_within_max_distance():
+    rng = random.Random(7)
+    for _ in range(500):
+        a = rng.getrandbits(64)
+        b = a
+        for bit in rng.sample(range(64), rng.randrange(7)):
+            b ^= 1 << bit
+        assert _hamming(a, b) <= 6
+        assert set(_bands(a, 7)) & set(_bands(b, 7))
+
+
+def test_no_qr_posters_only_match_within_the_same_subject(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache.sqlite3"), mode="perceptual")
+    original, reencoded = poster(1), poster(1, quality=60)
+    assert _hamming(perceptual_hash(original), perceptual_hash(reencoded)) <= 6
+    cache.put(original, None, 1, {"event_title": "Robotics Workshop"}, scope=subject_scope("Robotics Workshop"))
+
+    assert cache.get(reencoded, None, 1, scope=subject_scope("Fwd: robotics  workshop")) == {"event_title": "Robotics Workshop"}
+    # Same template, different event
+    assert cache.get(reencoded, None, 1, scope=subject_scope("Web Dev Bootcamp")) is None
+    assert cache.stats == {"hits": 0, "perceptual_hits": 1, "misses": 1}
+
+
+def test_eviction_drops_bands_and_old_caches_are_migrated(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE extractions (key TEXT PRIMARY KEY, context TEXT NOT NULL, phash INTEGER, "
+                 "result TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)")
+    conn.execute("INSERT INTO extractions VALUES ('old', '1|https://x.test', ?, '{\"old\": true}', 0, 0)",
+                 (perceptual_hash(poster(2)),))
+    conn.commit()
+    conn.close()
+
+    cache = ExtractionCache(path, mode="perceptual", max_entries=2)
+    assert cache.get(poster(2, quality=60), "https://x.test", 1) == {"old": True}
+
+    for seed in (3, 4, 5):
+        cache.put(poster(seed), None, 1, {"seed": seed}, scope="s")
+    keys = {row[0] for row in cache.conn.execute("SELECT key FROM extractions")}
+    band_keys = {row[0] for row in cache.conn.execute("SELECT DISTINCT key FROM extraction_bands")}
+    assert len(keys) == 2 and band_keys == keys
@@ -0,0 +1,30 @@
+"""Stage profiles include threads started during the stage."""
+
+import glob
+import pstats
+import threading
+
+import metrics
+
+
+def crunch_in_worker_thread(n=20000):
+    return sum(i * i for i in range(n))
+
+
+def test_stage_profile_covers_worker_threads(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "PROFILE_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setattr(metrics, "METRICS_FILE", str(tmp_path / "metrics.jsonl"))
+
+    with metrics.stage("Threads", profile=True):
+        assert metrics.profiling_stage == "Threads"
+        workers = [threading.Thread(target=crunch_in_worker_thread) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    assert metrics.profiling_stage is None
+    assert threading.getprofile() is None
+    [path] = glob.glob(str(tmp_path / "profiles" / "threads-*.prof"))
+    calls = {func: stat[1] for (_, _, func), stat in pstats.Stats(path).stats.items()}
+    assert calls["crunch_in_worker_thread"] == 2
@@ -0,0 +1,67 @@
+"""The finder-pattern gate in email_scraper.decode_qr_from_pil."""
+
+import os
+
+import pytest
+
+for module in ("fitz", "imap_tools", "google.genai", "pyzbar.pyzbar"):
+    pytest.importorskip(module, exc_type=ImportError)  # pyzbar raises ImportError without libzbar
+
+os.environ.setdefault("EMAIL_LLM_BACKEND", "stub")
+
+import email_scraper as es  # noqa: E402
+from PIL import Image, ImageDraw, ImageOps  # noqa: E402
+
+
+def finder_trio(module=6, size=(900, 1200), origin=(500, 700)):
+    """A poster-sized white image with the three 7x7 finder patterns of a QR code."""
+    img = Image.new("L", size, 255)
+    draw = ImageDraw.Draw(img)
+    x0, y0 = origin
+    for dx, dy in ((0, 0), (18, 0), (0, 18)):
+        x, y = x0 + dx * module, y0 + dy * module
+        draw.rectangle((x, y, x + 7 * module - 1, y + 7 * module - 1), fill=0)
+        draw.rectangle((x + module, y + module, x + 6 * module - 1, y + 6 * module - 1), fill=255)
+        draw.rectangle((x + 2 * module, y + 2 * module, x + 5 * module - 1, y + 5 * module - 1), fill=0)
+    return img
+
+
+@pytest.fixture
+def zbar_passes(monkeypatch):
+    calls = []
+    monkeypatch.setattr(es, "decode", lambda img: calls.append(img.size) or [])
+    return calls
+
+
+def test_gate_finds_finder_patterns_in_either_polarity():
+    for img in (finder_trio(), ImageOps.invert(finder_trio())):
+        regions = es._qr_candidate_regions(img)
+        assert len(regions) == 1
+        x0, y0, x1, y1 = regions[0]
+        assert x0 <= 500 and y0 <= 700 and x1 >= 500 + 25 * 6 and y1 >= 700 + 25 * 6
+
+
+def test_gate_ignores_text_and_blank_images():
+    img = Image.new("L", (900, 1200), 255)
+    draw = ImageDraw.Draw(img)
+    for y in range(50, 1150, 40):
+        draw.text((40, y), "Registration open - Rs. 500 - 9.30 AM to 4.30 PM - Main Auditorium " * 2, fill=0)
+    assert es._qr_candidate_regions(img) == []
+    assert es._qr_candidate_regions(Image.new("L", (900, 1200), 255)) == []
+
+
+def test_poster_without_a_code_costs_one_probe_pass(zbar_passes):
+    poster = Image.new("RGB", (2480, 3508), (240, 200, 120))
+
+    assert es.decode_qr_from_pil(poster) is None
+    assert len(zbar_passes) == 1
+    assert max(zbar_passes[0]) == es.QR_PROBE_MAX_SIDE
+
+
+def test_candidate_regions_escalate_to_crops_and_full_frame(zbar_passes):
+    poster = finder_trio(module=14, size=(2400, 3200), origin=(1400, 2200)).convert("RGB")
+
+    assert es.decode_qr_from_pil(poster) is None
+    # probe, inverted probe, crop + inverted crop, then gray, contrast and inverted full frame
+    assert len(zbar_passes) == 7
+    assert zbar_passes[-1] == (2400, 3200)
@@ -0,0 +1,63 @@
+"""Listing and detail-page parsing against the saved knowafest fixtures."""
+
+import os
+
+import pytest
+
+import upcoming_scraper as scraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "knowafest")
+PARSERS = ["html.parser", pytest.param("lxml", marks=pytest.mark.skipif(
+    scraper.resolve_parser("lxml") != "lxml", reason="lxml not installed"))]
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def test_parse_listing():
+    listing = scraper.parse_listing(fixture("listing.html"))
+
+    assert [event["fest_name"] for event in listing] == ["IoT Hands-on Workshop 2026", "TECHNOVATE 2026", "HackFest"]
+    assert listing[0]["event_url"] == (
+        "https://www.knowafest.com/explore/events/2026/01/0501-iot-hands-on-workshop-2026-abc-college"
+    )
+    assert listing[2]["event_url"].startswith("https://www.knowafest.com/explore/events/2026/02/")
+    assert (listing[1]["fest_starts"], listing[1]["fest_ends"]) == ("28 Jan 2026", "28 Jan 2026")
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_parse_event_details(parser):
+    details = scraper.parse_event_details(fixture("detail_workshop.html"), parser)
+
+    assert details == {
+        "image_url": "https://www.knowafest.com/explore/uploads/posters/iot-workshop-2026.jpg",
+        "about_event": "A two-day hands-on workshop on IoT with ESP32 boards. Timings 9.30 AM to 4.30 PM.",
+        "departments": "CSE, ECE, EEE",
+        "events_list": "Sensor interfacingMQTT and cloud dashboardsMini project demo",
+        "contact_details": "Dr. K. Ravi, Workshop Coordinator98xxxxxx10iot@abc.edu.in",
+        "important_dates": "Last date for registration: 30 Dec 2025",
+        "registration_fees": "Rs. 500 per participant (includes kit and lunch)",
+        "venue_address": "Main Auditorium, ABC College of Engineering,Chennai - 600001",
+        "google_map_link": "https://www.google.com/maps/embed?pb=!1m18!abc",
+        "register_url": "https://forms.example.com/iot-2026",
+        "location": "Chennai, Tamil Nadu",
+        "category": "Workshop",
+    }
+
+
+def test_parse_event_details_falls_back_to_a_maps_link():
+    details = scraper.parse_event_details(fixture("detail_symposium.html"))
+
+    assert details["google_map_link"] == "https://goo.gl/maps/XyZ987"
+    assert details["image_url"] == "https://cdn.example.com/uploads/technovate.png"
+    assert details["registration_fees"] == "Rs.300 per head for all events. On-spot registration 400/-"
+
+
+def test_parse_event_details_keeps_defaults_for_missing_sections():
+    details = scraper.parse_event_details(fixture("detail_hackathon.html"))
+
+    assert details["google_map_link"] == "N/A"
+    assert details["departments"] == "All Departments"
+    assert details["category"] == "Hackathon"
@@ -4,50 +4,275 @@ import json
 import time
 import re
 import os
+import sys
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from event_store import EventStore
+from metrics import metrics
+
+# --- Concurrency / Politeness Settings ---
+# Number of detail pages fetched in parallel. Set to 1 for the old sequential behaviour.
+MAX_WORKERS = int(os.getenv("SCRAPER_MAX_WORKERS", "6"))
+# Token-bucket limit per host: sustained requests/second and burst size.
+RATE_LIMIT_PER_HOST = float(os.getenv("SCRAPER_RATE_PER_HOST", "2"))
+RATE_LIMIT_BURST = int(os.getenv("SCRAPER_RATE_BURST", "4"))
+
+# --- HTTP Settings ---
+LIST_URL = os.getenv("SCRAPER_LIST_URL", "https://www.knowafest.com/explore/upcomingfests")
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+HTTP_CACHE_DIR = os.getenv("SCRAPER_HTTP_CACHE_DIR", os.path.join(SCRIPT_DIR, ".http_cache"))
+REQUEST_TIMEOUT = float(os.getenv("SCRAPER_REQUEST_TIMEOUT", "20"))
+# BeautifulSoup parser: "html.parser" (pure Python, always available) or "lxml" (faster, needs `pip install lxml`)
+HTML_PARSER = os.getenv("SCRAPER_HTML_PARSER", "html.parser")
+# --- Checkpointing ---
+CHECKPOINT_FILE = os.path.join(SCRIPT_DIR, '.scrape_checkpoint.jsonl')
+# Completed detail pages between checkpoint flushes
+CHECKPOINT_EVERY = int(os.getenv("SCRAPER_CHECKPOINT_EVERY", "10"))
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket. `acquire()` blocks until a token is available."""
+
+    def __init__(self, rate, capacity):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """Keeps one TokenBucket per host so every site gets its own budget."""
+
+    def __init__(self, rate=RATE_LIMIT_PER_HOST, burst=RATE_LIMIT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+
+def build_session(headers=None):
+    """Shared keep-alive session with a connection pool sized for the worker pool and retry/backoff."""
+    session = requests.Session()
+    session.headers.update(headers or DEFAULT_HEADERS)
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(MAX_WORKERS, 1), max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class HttpCache:
+    """
+    On-disk HTTP cache keyed by URL.
+
+    Each entry stores the ETag / Last-Modified validators plus the *parsed* result of the
+    page, so a 304 response returns the previous result without parsing the page again.
+    """
+
+    def __init__(self, directory=HTTP_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "bytes_saved": 0, "bytes_downloaded": 0}
+
+    def _path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _load(self, url):
+        try:
+            with open(self._path(url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, url, entry):
+        path = self._path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def fetch(self, session, url, parse):
+        """
+        Conditional GET for `url`. Returns `parse(content)` for fresh pages, the cached
+        result for 304s, or None when the request fails.
+        """
+        entry = self._load(url)
+        request_headers = {}
+        if entry:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        with metrics.timer("scraper_http_request"):
+            response = session.get(url, headers=request_headers, timeout=REQUEST_TIMEOUT)
+
+        if response.status_code == 304 and entry:
+            self._count("hits")
+            self._count("bytes_saved", entry.get("size", 0))
+            metrics.incr("scraper_pages", result="not_modified")
+            return entry.get("parsed")
+
+        self._count("misses")
+        if response.status_code != 200:
+            metrics.incr("scraper_pages", result="error")
+            return None
+
+        self._count("bytes_downloaded", len(response.content))
+        metrics.incr("scraper_pages", result="fetched")
+        metrics.incr("scraper_bytes", len(response.content))
+        with metrics.timer("scraper_parse", page=parse.__name__):
+            parsed = parse(response.content)
+
+        if response.headers.get("ETag") or response.headers.get("Last-Modified"):
+            try:
+                self._store(url, {
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "size": len(response.content),
+                    "parsed": parsed,
+                })
+            except OSError as e:
+                print(f"Cache write failed for {url}: {e}")
+        return parsed
+
+    def summary(self):
+        return (f"HTTP cache: hits={self.stats['hits']} misses={self.stats['misses']} "
+                f"bytes_saved={self.stats['bytes_saved']} bytes_downloaded={self.stats['bytes_downloaded']}")
+
+
 def get_safe_text(element):
     """Helper to safely extract text from an element."""
     if element:
         return element.get_text(strip=True)
     return "N/A"
 
-def extract_section_content(soup, header_texts):
-    """Finds a header and returns the text content immediately following it."""
-    if isinstance(header_texts, str):
-        header_texts = [header_texts]
-        
-    for text in header_texts:
-        # Search for headers (h3, h4, h5, strong, b) containing the text
-        header = soup.find(['h4', 'h3', 'h5', 'strong', 'b'], string=lambda t: t and text.lower() in t.lower())
-        if header:
+@lru_cache(maxsize=None)
+def resolve_parser(name=HTML_PARSER):
+    """Returns the configured parser, falling back to html.parser if lxml is not installed."""
+    if name == "lxml":
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            print("lxml not installed, falling back to html.parser")
+            return "html.parser"
+    return name
+
+SECTION_HEADER_TAGS = ['h4', 'h3', 'h5', 'strong', 'b']
+
+class SectionIndex:
+    """
+    Header -> section content map for one page.
+
+    The header tags are collected in a single walk of the document; the content below a
+    header (its following siblings up to the next header) is computed on first lookup
+    and memoised, so the six section lookups never rescan the tree.
+    """
+
+    def __init__(self, soup):
+        # (lowercased header string, original string, tag) in document order
+        self.headers = []
+        for tag in soup.find_all(SECTION_HEADER_TAGS):
+            if tag.string:
+                self.headers.append((tag.string.lower(), tag.string, tag))
+        self._content = {}
+
+    def _section_text(self, header):
+        key = id(header)
+        if key not in self._content:
             content = []
             # Gather text from siblings until the next header
             for sibling in header.find_next_siblings():
-                if sibling.name in ['h4', 'h3', 'h5', 'strong', 'b'] and sibling.get_text(strip=True):
+                if sibling.name in SECTION_HEADER_TAGS and sibling.get_text(strip=True):
                     break
                 text_val = get_safe_text(sibling)
                 if text_val:
                     content.append(text_val)
-            full_text = "\n".join(content).strip()
-            if full_text:
-                return full_text
-    return "N/A"
+            self._content[key] = "\n".join(content).strip()
+        return self._content[key]
 
-def scrape_event_details(event_url, headers):
-    """Visits the event detail page to scrape specific info."""
-    details = {k: "N/A" for k in ['image_url', 'about_event', 'departments', 'events_list', 
-                                  'contact_details', 'important_dates', 'registration_fees', 
-                                  'venue_address', 'google_map_link', 'register_url', 
-                                  'location', 'category']}
-    
-    if not event_url:
-        return details
+    def find_header(self, predicate):
+        """First header tag (in document order) whose original string satisfies `predicate`."""
+        for _, string, tag in self.headers:
+            if predicate(tag, string):
+                return tag
+        return None
+
+    def get(self, header_texts):
+        """Finds a header and returns the text content immediately following it."""
+        if isinstance(header_texts, str):
+            header_texts = [header_texts]
+
+        for text in header_texts:
+            needle = text.lower()
+            for lowered, _, tag in self.headers:
+                if needle in lowered:
+                    full_text = self._section_text(tag)
+                    if full_text:
+                        return full_text
+                    break  # only the first matching header counts for this text
+        return "N/A"
+
+def extract_section_content(soup, header_texts):
+    """Finds a header and returns the text content immediately following it."""
+    return SectionIndex(soup).get(header_texts)
+
+DETAIL_FIELDS = ['image_url', 'about_event', 'departments', 'events_list',
+                 'contact_details', 'important_dates', 'registration_fees',
+                 'venue_address', 'google_map_link', 'register_url',
+                 'location', 'category']
+
+def empty_details():
+    return {k: "N/A" for k in DETAIL_FIELDS}
+
+def parse_event_details(content, parser=HTML_PARSER):
+    """Parses a detail page body into the details dict."""
+    details = empty_details()
 
     try:
-        response = requests.get(event_url, headers=headers)
-        if response.status_code != 200:
-            return details
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = BeautifulSoup(content, resolve_parser(parser))
         base_url = "https://www.knowafest.com"
 
         # 1. Image URL
@@ -60,15 +285,16 @@ def scrape_event_details(event_url, headers):
             details['image_url'] = base_url + src if not src.startswith('http') else src
 
         # 2. Main Content Sections
-        details['about_event'] = extract_section_content(soup, ["About Event", "About"])
-        details['events_list'] = extract_section_content(soup, ["Events", "Event Details"])
-        details['contact_details'] = extract_section_content(soup, ["Contact Details", "Contact"])
-        details['important_dates'] = extract_section_content(soup, ["Last Dates", "Important Dates", "Deadlines"])
-        details['registration_fees'] = extract_section_content(soup, ["Registration Fees", "Fees"])
-        details['venue_address'] = extract_section_content(soup, ["How to reach", "Address", "Venue", "Event Sponsors"])
+        sections = SectionIndex(soup)
+        details['about_event'] = sections.get(["About Event", "About"])
+        details['events_list'] = sections.get(["Events", "Event Details"])
+        details['contact_details'] = sections.get(["Contact Details", "Contact"])
+        details['important_dates'] = sections.get(["Last Dates", "Important Dates", "Deadlines"])
+        details['registration_fees'] = sections.get(["Registration Fees", "Fees"])
+        details['venue_address'] = sections.get(["How to reach", "Address", "Venue", "Event Sponsors"])
 
         # 3. Departments
-        dept_header = soup.find(lambda tag: tag.name in ['h4', 'h3'] and "Departments" in (tag.string or ""))
+        dept_header = sections.find_header(lambda tag, string: tag.name in ['h4', 'h3'] and "Departments" in string)
         if dept_header:
             dept_links = [get_safe_text(s) for s in dept_header.find_next_siblings('a')]
             details['departments'] = ", ".join(dept_links)
@@ -101,49 +327,37 @@ def scrape_event_details(event_url, headers):
 
     return details
 
-def scrape_upcoming_fests():
-    list_url = "https://www.knowafest.com/explore/upcomingfests"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
+def scrape_event_details(event_url, session, limiter=None, cache=None):
+    """Visits the event detail page to scrape specific info."""
+    if not event_url:
+        return empty_details()
 
-    print("--- Fetching Listing Page ---")
-    response = requests.get(list_url, headers=headers)
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
-    # --- MAJOR FIX: Find rows with the 'onclick' attribute ---
-    rows = soup.find_all('tr', attrs={'onclick': True})
-    
-    if not rows:
-        print("No event rows found.")
-        return
+    try:
+        if limiter:
+            limiter.wait(event_url)
+        if cache:
+            details = cache.fetch(session, event_url, parse_event_details)
+        else:
+            response = session.get(event_url, timeout=REQUEST_TIMEOUT)
+            details = parse_event_details(response.content) if response.status_code == 200 else None
+    except Exception as e:
+        print(f"Error details: {e}")
+        details = None
 
-    print(f"Found {len(rows)} events. Processing...")
+    return details or empty_details()
 
-    # Use absolute path relative to this script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    output_file = os.path.join(script_dir, 'knowafest_complete_data.json')
+def parse_listing(content):
+    """Parses the listing page into basic event dicts (fest info + event_url)."""
+    soup = BeautifulSoup(content, resolve_parser())
 
-    # --- Load Existing Data ---
-    existing_events = []
-    existing_urls = set()
-    if os.path.exists(output_file):
-        try:
-            with open(output_file, 'r', encoding='utf-8') as f:
-                existing_events = json.load(f)
-                for e in existing_events:
-                    if e.get('event_url'):
-                        existing_urls.add(e['event_url'])
-            print(f"Loaded {len(existing_events)} existing events.")
-        except Exception as e:
-            print(f"Error loading existing data: {e}")
-
-    new_events = []
-    
+    # --- MAJOR FIX: Find rows with the 'onclick' attribute ---
+    rows = soup.find_all('tr', attrs={'onclick': True})
+
+    listing = []
     for row in rows:
         event = {}
         cols = row.find_all('td')
-        
+
         # 1. Basic Info
         event['fest_starts'] = get_safe_text(cols[0])
         event['fest_name'] = get_safe_text(cols[1]).replace("Read More", "").strip()
@@ -155,7 +369,7 @@ def scrape_upcoming_fests():
         # Format is: window.open('events/2025/...')
         onclick_text = row['onclick']
         match = re.search(r"window\.open\('([^']+)'", onclick_text)
-        
+
         if match:
             relative_url = match.group(1).strip()
             # Construct full URL
@@ -166,32 +380,161 @@ def scrape_upcoming_fests():
         else:
             event['event_url'] = None
 
-        # --- DUPLICATE CHECK ---
-        if event['event_url'] in existing_urls:
-            print(f" [Skip] Already exists: {event['fest_name']}")
-            continue
+        listing.append(event)
+    return listing
+
+class ScrapeCheckpoint:
+    """
+    JSON Lines checkpoint of an in-progress run.
+
+    The first line records the run's pending listing entries; every following line is one
+    completed event, written in listing order, so the number of event lines is the
+    position reached in the listing. A torn last line from a crash is ignored.
+    """
+
+    def __init__(self, path=CHECKPOINT_FILE, flush_every=CHECKPOINT_EVERY):
+        self.path = path
+        self.flush_every = max(flush_every, 1)
+        self.file = None
+        self.unflushed = 0
+
+    def load(self):
+        """Returns (pending, completed) from an existing checkpoint, or (None, []) if there is none."""
+        pending, completed = None, []
+        if not os.path.exists(self.path):
+            return pending, completed
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("type") == "run":
+                    pending = record["pending"]
+                elif record.get("type") == "event":
+                    completed.append(record["event"])
+        return pending, completed
+
+    def start(self, pending):
+        """Begins a fresh checkpoint for `pending`, replacing any previous one."""
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self._write({"type": "run", "pending": pending})
+        self.flush()
+
+    def reopen(self):
+        """Continues appending to an existing checkpoint (for --resume)."""
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def add(self, event):
+        self._write({"type": "event", "event": event})
+        self.unflushed += 1
+        if self.unflushed >= self.flush_every:
+            self.flush()
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unflushed = 0
+
+    def close(self):
+        if self.file:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def clear(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def scrape_upcoming_fests(resume=False, list_url=LIST_URL, store=None, cache=None, checkpoint=None):
+    session = build_session()
+    cache = cache or HttpCache()
+    checkpoint = checkpoint or ScrapeCheckpoint()
+
+    # --- Load Existing URLs (index only, history is not read) ---
+    store = store or EventStore()
+    existing_urls = store.load_urls()
+    print(f"Loaded {len(existing_urls)} existing event URLs.")
+
+    pending_events, completed_events = checkpoint.load() if resume else (None, [])
+
+    if pending_events is not None:
+        # --- Resume: reuse the saved listing and skip every URL already scraped ---
+        # (drop events that reached the store before the previous run died)
+        completed_events = [e for e in completed_events if e['event_url'] not in existing_urls]
+        done_urls = {e['event_url'] for e in completed_events}
+        pending_events = [e for e in pending_events
+                          if e['event_url'] not in done_urls and e['event_url'] not in existing_urls]
+        print(f"--- Resuming from checkpoint: {len(completed_events)} done, {len(pending_events)} remaining ---")
+        checkpoint.reopen()
+    else:
+        if resume:
+            print("No checkpoint found. Starting a fresh run.")
+
+        print("--- Fetching Listing Page ---")
+        listing = cache.fetch(session, list_url, parse_listing)
         
-        # 3. Scrape Details
-        if event['event_url']:
-            print(f" > Scraping New Event: {event['fest_name']}")
-            details = scrape_event_details(event['event_url'], headers)
-            event.update(details)
-            time.sleep(0.5)
+        if not listing:
+            print("No event rows found.")
+            print(cache.summary())
+            return
+
+        print(f"Found {len(listing)} events. Processing...")
+
+        pending_events = []
+        
+        for listed in listing:
+            event = dict(listed)
+
+            # --- DUPLICATE CHECK ---
+            if event['event_url'] in existing_urls:
+                print(f" [Skip] Already exists: {event['fest_name']}")
+                continue
+            
+            if event['event_url']:
+                pending_events.append(event)
+                # Add to set to prevent duplicate in same run
+                existing_urls.add(event['event_url'])
+            else:
+                print(f" ! No URL found for: {event['fest_name']}")
+
+        checkpoint.start(pending_events)
+
+    # 3. Scrape Details (concurrently, rate limited per host)
+    limiter = HostRateLimiter()
+
+    def scrape_one(event):
+        print(f" > Scraping New Event: {event['fest_name']}")
+        event.update(scrape_event_details(event['event_url'], session, limiter, cache))
+        return event
+
+    new_events = list(completed_events)
+    executor = ThreadPoolExecutor(max_workers=max(MAX_WORKERS, 1))
+    try:
+        # map() keeps listing order, so each checkpointed event extends the completed prefix
+        for event in executor.map(scrape_one, pending_events):
             new_events.append(event)
-            # Add to set to prevent duplicate in same run
-            existing_urls.add(event['event_url'])
-        else:
-            print(f" ! No URL found for: {event['fest_name']}")
+            checkpoint.add(event)
+    finally:
+        # On an error, don't keep scraping the queued pages; the checkpoint has what finished
+        executor.shutdown(wait=False, cancel_futures=True)
+        checkpoint.close()
 
     if new_events:
         print(f"New events found: {len(new_events)}")
-        # Combine and Save
-        all_events = existing_events + new_events
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(all_events, f, indent=4, ensure_ascii=False)
-        print(f"Updated database. Total events: {len(all_events)}")
+        store.append_many(new_events)
+        metrics.incr("scraper_events_saved", len(new_events))
+        print(f"Updated database. Total events: {store.count()}")
     else:
         print("No new events found. Database is up to date.")
 
+    checkpoint.clear()
+    print(cache.summary())
+
 if __name__ == "__main__":
-    scrape_upcoming_fests()
\ No newline at end of file
+    # `--resume` continues from the last checkpoint instead of starting over
+    scrape_upcoming_fests(resume="--resume" in sys.argv[1:])
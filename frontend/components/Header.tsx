@@ -10,6 +10,7 @@ import {
   ChevronDown,
   Shield,
 } from "lucide-react";
+import { fetchAllPages } from "../pagination";
 
 interface HeaderProps {
   currentView: string;
@@ -27,12 +28,17 @@ type NotificationItem = {
   student_id: string;
   title: string;
   message: string;
-  type: "event" | "vacancy" | "certificate" | "od";
+  type: "event" | "vacancy" | "certificate" | "od" | "hostel";
   reference_id: string;
   created_at: string;
   is_read: boolean;
 };
 
+const sameNotification = (a: NotificationItem, b: NotificationItem) =>
+  a.student_id === b.student_id &&
+  a.type === b.type &&
+  a.reference_id === b.reference_id;
+
 const Header: React.FC<HeaderProps> = ({
   currentView,
   setView,
@@ -51,6 +57,11 @@ const Header: React.FC<HeaderProps> = ({
   const [notifications, setNotifications] = useState<NotificationItem[]>([]);
   const [isNotifLoading, setIsNotifLoading] = useState(false);
   const [notifError, setNotifError] = useState<string | null>(null);
+  const [unreadCount, setUnreadCount] = useState(0);
+  const notifWatermark = useRef<string | null>(null);
+  const notifLoaded = useRef(false);
+  const notificationsRef = useRef<NotificationItem[]>([]);
+  const streamConnected = useRef(false);
   const [scrolled, setScrolled] = useState(false);
   const searchInputRef = useRef<HTMLInputElement>(null);
   const profileRef = useRef<HTMLDivElement>(null);
@@ -97,8 +108,22 @@ const Header: React.FC<HeaderProps> = ({
     return () => document.removeEventListener("mousedown", handleClickOutside);
   }, []);
 
-  const fetchNotifications = async () => {
-    if (!studentId) return;
+  const replaceNotifications = (items: NotificationItem[]) => {
+    notificationsRef.current = items;
+    setNotifications(items);
+  };
+
+  // Prepends items not already listed; returns how many unread ones were new
+  const addNotifications = (items: NotificationItem[]) => {
+    const fresh = items.filter(
+      (item) => !notificationsRef.current.some((n) => sameNotification(n, item)),
+    );
+    if (fresh.length) replaceNotifications([...fresh, ...notificationsRef.current]);
+    return fresh.filter((item) => !item.is_read).length;
+  };
+
+  const fetchNotifications = async (): Promise<boolean> => {
+    if (!studentId) return false;
     setIsNotifLoading(true);
     setNotifError(null);
     try {
@@ -106,40 +131,153 @@ const Header: React.FC<HeaderProps> = ({
         typeof window !== "undefined"
           ? localStorage.getItem("access_token")
           : null;
-      const res = await fetch(
+      // After the first load only ask for notifications newer than the last fetched_at
+      const since = notifLoaded.current ? notifWatermark.current : null;
+      const { res, data, items } = await fetchAllPages<NotificationItem>(
         `http://127.0.0.1:5000/api/student/notifications?student_id=${encodeURIComponent(
           studentId,
-        )}`,
+        )}${since ? `&since=${encodeURIComponent(since)}` : ""}`,
+        "notifications",
         {
           headers: token ? { Authorization: `Bearer ${token}` } : undefined,
         },
       );
-      const data = await res.json().catch(() => null);
       if (!res.ok) {
         setNotifError(data?.error || "Failed to load notifications");
-        return;
+        return false;
       }
-      setNotifications(
-        Array.isArray(data?.notifications) ? data.notifications : [],
-      );
+      if (since) addNotifications(items);
+      else replaceNotifications(items);
+      setUnreadCount(Number(data?.unread_count) || 0);
+      if (data?.fetched_at) notifWatermark.current = data.fetched_at;
+      notifLoaded.current = true;
+      return true;
     } catch {
       setNotifError("Failed to load notifications");
+      return false;
     } finally {
       setIsNotifLoading(false);
     }
   };
 
+  // Moves the student's read cursor past everything published so far
+  const markAllRead = async (): Promise<boolean> => {
+    if (!studentId) return false;
+    try {
+      const token =
+        typeof window !== "undefined"
+          ? localStorage.getItem("access_token")
+          : null;
+      const res = await fetch(
+        "http://127.0.0.1:5000/api/student/notifications/read",
+        {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+            ...(token ? { Authorization: `Bearer ${token}` } : {}),
+          },
+          body: JSON.stringify({ student_id: studentId }),
+        },
+      );
+      if (!res.ok) return false;
+      setUnreadCount(0);
+      return true;
+    } catch {
+      // Badge stays; retried the next time the dropdown opens
+      return false;
+    }
+  };
+
+  useEffect(() => {
+    notifWatermark.current = null;
+    notifLoaded.current = false;
+  }, [studentId]);
+
+  // Server-pushed notifications (SSE over fetch so the Authorization header can be sent)
+  useEffect(() => {
+    if (!studentId) return;
+    const controller = new AbortController();
+    let retryId: number | undefined;
+
+    const connect = async () => {
+      const token = localStorage.getItem("access_token");
+      const since = notifWatermark.current;
+      try {
+        const res = await fetch(
+          `http://127.0.0.1:5000/api/student/notifications/stream?student_id=${encodeURIComponent(
+            studentId,
+          )}${since ? `&since=${encodeURIComponent(since)}` : ""}`,
+          {
+            headers: token ? { Authorization: `Bearer ${token}` } : undefined,
+            signal: controller.signal,
+          },
+        );
+        if (!res.ok || !res.body) throw new Error("stream unavailable");
+        streamConnected.current = true;
+        const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = "";
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += value;
+          let end: number;
+          while ((end = buffer.indexOf("\n\n")) >= 0) {
+            const block = buffer.slice(0, end);
+            buffer = buffer.slice(end + 2);
+            const data = block
+              .split("\n")
+              .filter((line) => line.startsWith("data: "))
+              .map((line) => line.slice(6))
+              .join("\n");
+            if (!data) continue;
+            const item: NotificationItem = JSON.parse(data);
+            const added = addNotifications([item]);
+            if (added) setUnreadCount((count) => count + added);
+            if (!notifWatermark.current || item.created_at > notifWatermark.current) {
+              notifWatermark.current = item.created_at;
+            }
+          }
+        }
+      } catch {
+        // fall through to reconnect; polling covers the gap
+      } finally {
+        streamConnected.current = false;
+      }
+      if (!controller.signal.aborted) retryId = window.setTimeout(connect, 5000);
+    };
+
+    void connect();
+    return () => {
+      controller.abort();
+      window.clearTimeout(retryId);
+    };
+  }, [studentId]);
+
   useEffect(() => {
     if (!isNotifOpen) return;
-    void fetchNotifications();
+    let seen: NotificationItem[] = [];
+    // Opening the dropdown reads everything listed; unread markers stay until it closes
+    void fetchNotifications().then(async (loaded) => {
+      if (loaded && (await markAllRead())) seen = notificationsRef.current;
+    });
+    // Only poll while the push stream is down
     const intervalId = window.setInterval(() => {
-      void fetchNotifications();
+      if (!streamConnected.current) void fetchNotifications();
     }, 15000);
-    return () => window.clearInterval(intervalId);
+    return () => {
+      window.clearInterval(intervalId);
+      if (seen.length) {
+        replaceNotifications(
+          notificationsRef.current.map((n) =>
+            seen.includes(n) && !n.is_read ? { ...n, is_read: true } : n,
+          ),
+        );
+      }
+    };
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [isNotifOpen, studentId]);
 
-  const hasUnread = notifications.some((n) => !n.is_read);
+  const hasUnread = unreadCount > 0;
 
   // Auto-focus input when expanding
   useEffect(() => {
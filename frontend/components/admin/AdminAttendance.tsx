@@ -1,4 +1,5 @@
 import React, { useCallback, useMemo, useState } from "react";
+import { fetchAllPages } from "../../pagination";
 
 type AttendanceStatus = "Pending" | "Approved" | "Rejected";
 
@@ -46,23 +47,23 @@ const AdminAttendance: React.FC = () => {
     setIsLoading(true);
     setError(null);
     try {
-      const res = await fetch(
+      const { res, data, items } = await fetchAllPages<AttendanceRecord>(
         `${API_BASE}/api/admin/attendance?event_id=${encodeURIComponent(
           trimmed,
         )}`,
+        "attendances",
         {
           headers: {
             ...getAdminAuthHeaders(),
           },
         },
       );
-      const data = await res.json().catch(() => null);
       if (!res.ok) {
         setAttendances([]);
         setError(data?.error || "Failed to fetch attendance list");
         return;
       }
-      setAttendances((data?.attendances || []) as AttendanceRecord[]);
+      setAttendances(items);
     } catch (e: any) {
       setError(e?.message || "Failed to fetch attendance list");
     } finally {
@@ -2,6 +2,7 @@ import React, { useEffect, useMemo, useState } from "react";
 import { ClipboardList, Check, X, Plus, Briefcase } from "lucide-react";
 import { CAMPUS_CLUBS } from "../../constants";
 import { JobApplication, Vacancy } from "../../types";
+import { fetchAllPages } from "../../pagination";
 
 interface AdminVacanciesProps {
   applications: JobApplication[];
@@ -35,14 +36,17 @@ const AdminVacancies: React.FC<AdminVacanciesProps> = ({ applications }) => {
     setLoadingVacancies(true);
     setError(null);
     try {
-      const res = await fetch(`${API_BASE}/api/admin/vacancies`, {
-        headers: {
-          ...getAdminAuthHeaders(),
+      const { res, data, items } = await fetchAllPages<Vacancy>(
+        `${API_BASE}/api/admin/vacancies`,
+        "vacancies",
+        {
+          headers: {
+            ...getAdminAuthHeaders(),
+          },
         },
-      });
-      const data = await res.json();
+      );
       if (!res.ok) throw new Error(data?.error || "Failed to load vacancies");
-      setVacancies(Array.isArray(data?.vacancies) ? data.vacancies : []);
+      setVacancies(items);
     } catch (e: any) {
       setError(e?.message || "Failed to load vacancies");
     } finally {
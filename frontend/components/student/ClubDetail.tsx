@@ -1,6 +1,7 @@
 import React, { useEffect, useMemo, useState } from "react";
 import { ChevronLeft, MapPin, Rocket } from "lucide-react";
 import { Club, Project, OpenRole, Vacancy } from "../../types";
+import { fetchAllPages } from "../../pagination";
 
 interface ClubDetailProps {
   club: Club;
@@ -21,20 +22,20 @@ const ClubDetail: React.FC<ClubDetailProps> = ({ club, onBack }) => {
           typeof window !== "undefined"
             ? localStorage.getItem("access_token")
             : null;
-        const res = await fetch(
+        const { res, items } = await fetchAllPages<Vacancy>(
           `${API_BASE}/api/student/vacancies?club_name=${encodeURIComponent(
             club.name,
           )}`,
+          "vacancies",
           {
             headers: token ? { Authorization: `Bearer ${token}` } : undefined,
           },
         );
-        const data = await res.json();
         if (!res.ok) {
           setVacancies(null);
           return;
         }
-        setVacancies(Array.isArray(data?.vacancies) ? data.vacancies : []);
+        setVacancies(items);
       } catch {
         setVacancies(null);
       } finally {
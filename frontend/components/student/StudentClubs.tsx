@@ -2,6 +2,7 @@ import React, { useEffect, useMemo, useState } from "react";
 import { Users, Target, ArrowRight } from "lucide-react";
 import { CAMPUS_CLUBS } from "../../constants";
 import { Club, Vacancy } from "../../types";
+import { fetchAllPages } from "../../pagination";
 
 interface StudentClubsProps {
   onClubClick: (club: Club) => void;
@@ -26,15 +27,15 @@ const StudentClubs: React.FC<StudentClubsProps> = ({ onClubClick }) => {
           typeof window !== "undefined"
             ? localStorage.getItem("access_token")
             : null;
-        const res = await fetch(`${API_BASE}/api/student/vacancies`, {
-          headers: token ? { Authorization: `Bearer ${token}` } : undefined,
-        });
-        const data = await res.json();
+        const { res, items: vacancies } = await fetchAllPages<Vacancy>(
+          `${API_BASE}/api/student/vacancies`,
+          "vacancies",
+          {
+            headers: token ? { Authorization: `Bearer ${token}` } : undefined,
+          },
+        );
         if (!res.ok) return;
 
-        const vacancies: Vacancy[] = Array.isArray(data?.vacancies)
-          ? data.vacancies
-          : [];
         const countsByClub = new Map<string, number>();
         for (const v of vacancies) {
           if (!v?.club_name || !clubNameSet.has(v.club_name)) continue;
@@ -2,6 +2,7 @@ import React, { useEffect, useMemo, useState } from "react";
 import { Calendar, Code, Music } from "lucide-react";
 import EventCard from "../EventCard";
 import { Event } from "../../types";
+import { fetchAllPages } from "../../pagination";
 
 interface StudentEventsProps {
   eventsList: Event[];
@@ -30,13 +31,16 @@ const StudentEvents: React.FC<StudentEventsProps> = ({
           typeof window !== "undefined"
             ? localStorage.getItem("access_token")
             : null;
-        const res = await fetch("http://127.0.0.1:5000/api/student/events", {
-          headers: token ? { Authorization: `Bearer ${token}` } : undefined,
-        });
-        const data = await res.json();
+        const { res, items } = await fetchAllPages(
+          "http://127.0.0.1:5000/api/student/events",
+          "events",
+          {
+            headers: token ? { Authorization: `Bearer ${token}` } : undefined,
+          },
+        );
         if (!res.ok) return;
 
-        const mapped: Event[] = (data?.events || []).map((e: any) => {
+        const mapped: Event[] = items.map((e: any) => {
           const startDate = e.start_date || e.date || "";
           const endDate = e.end_date || e.date || startDate || "";
           const eventType =
@@ -2,6 +2,7 @@ import React, { useEffect, useMemo, useState } from "react";
 import { Medal, Plus, Award, Briefcase } from "lucide-react";
 import { Achievement } from "../../types";
 import { MY_ACHIEVEMENTS, STUDENT_PROFILE } from "../../constants";
+import { fetchAllPages } from "../../pagination";
 
 interface StudentInboxProps {
   onUploadClick: () => void;
@@ -38,19 +39,17 @@ const StudentInbox: React.FC<StudentInboxProps> = ({
         typeof window !== "undefined"
           ? localStorage.getItem("access_token")
           : null;
-      const res = await fetch(
+      const { res, items } = await fetchAllPages<CertificateDoc>(
         `http://127.0.0.1:5000/api/student/certificates?student_id=${encodeURIComponent(
           STUDENT_PROFILE.registerNumber,
         )}`,
+        "certificates",
         {
           headers: token ? { Authorization: `Bearer ${token}` } : undefined,
         },
       );
-      const data = await res.json().catch(() => null);
       if (!res.ok) return;
-      setIssuedCertificates(
-        Array.isArray(data?.certificates) ? data.certificates : [],
-      );
+      setIssuedCertificates(items);
     } catch {
       // no-op: keep existing UI
     }
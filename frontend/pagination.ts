@@ -0,0 +1,34 @@
+// List endpoints return at most `limit` items (API_DEFAULT_PAGE_LIMIT when the request
+// has none) plus a `next` cursor; see backend/pagination.py.
+
+export interface PagedResult<T> {
+  res: Response;
+  // Body of the first page (carries fields such as `unread_count`), or of the failed page
+  data: any;
+  items: T[];
+}
+
+// GETs every page of `url`, following `next`, and concatenates each page's `key` array.
+// Stops at the first non-OK response and returns it.
+export async function fetchAllPages<T = any>(
+  url: string,
+  key: string,
+  init?: RequestInit,
+): Promise<PagedResult<T>> {
+  const items: T[] = [];
+  let first: any = null;
+  let cursor: string | null = null;
+  let res: Response;
+  do {
+    const pageUrl = cursor
+      ? `${url}${url.includes("?") ? "&" : "?"}cursor=${encodeURIComponent(cursor)}`
+      : url;
+    res = await fetch(pageUrl, init);
+    const data = await res.json().catch(() => null);
+    if (!res.ok) return { res, data, items };
+    if (first === null) first = data;
+    if (Array.isArray(data?.[key])) items.push(...data[key]);
+    cursor = typeof data?.next === "string" && data.next ? data.next : null;
+  } while (cursor);
+  return { res, data: first, items };
+}